@@ -0,0 +1,5 @@
+"""Recursos compartilhados entre as fases do projeto FarmTech"""
+
+from comum.faixas import ABAIXO, ACIMA, DENTRO, TabelaFaixas, tabela_padrao
+
+__all__ = ['ABAIXO', 'ACIMA', 'DENTRO', 'TabelaFaixas', 'tabela_padrao']
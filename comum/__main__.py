@@ -0,0 +1,4 @@
+from comum.faixas import main
+
+if __name__ == '__main__':
+    main()
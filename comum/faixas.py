@@ -0,0 +1,230 @@
+"""
+Tabela compartilhada de faixas ideais por cultura
+
+Fonte única dos limites agronômicos usados no diagnóstico de solo (fase 2),
+na geração de dados de teste (fase 1) e na regra de irrigação do ESP32 (fase 3).
+
+Os limites são lidos de faixas_ideais.json e compilados em dois arrays NumPy
+densos (mínimo e máximo) indexados por [id da cultura, id da variável];
+limites ausentes ficam como NaN (sem limite). A tabela pode ser recarregada
+em tempo de execução quando o arquivo muda.
+
+Uso:
+    python -m comum listar
+    python -m comum header --cultura milho --saida fase3/esp32/faixas_ideais.h
+"""
+
+import argparse
+import json
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+CAMINHO_PADRAO = Path(__file__).resolve().parent / 'faixas_ideais.json'
+
+# Resultado da classificação de um valor em relação à faixa
+ABAIXO, DENTRO, ACIMA = -1, 0, 1
+
+
+def normalizar_nome(nome: str) -> str:
+    """'Café ' -> 'cafe' (minúsculas, sem acentos e espaços nas pontas)"""
+    sem_acento = unicodedata.normalize('NFKD', nome.strip().lower())
+    return ''.join(c for c in sem_acento if not unicodedata.combining(c))
+
+
+class _Compilada(NamedTuple):
+    """Estado imutável da tabela; trocado por inteiro ao recarregar"""
+    culturas: List[str]
+    variaveis: List[str]
+    indice_cultura: Dict[str, int]
+    indice_variavel: Dict[str, int]
+    minimo: np.ndarray
+    maximo: np.ndarray
+    mtime: float
+
+
+def _compilar(caminho: Path) -> _Compilada:
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+
+    padrao = dados.get('padrao', {})
+    culturas = [normalizar_nome(c) for c in dados['culturas']]
+    variaveis = list(dict.fromkeys(
+        [v for v in padrao] + [v for faixas in dados['culturas'].values() for v in faixas]
+    ))
+    indice_cultura = {c: i for i, c in enumerate(culturas)}
+    indice_variavel = {v: j for j, v in enumerate(variaveis)}
+
+    minimo = np.full((len(culturas), len(variaveis)), np.nan)
+    maximo = np.full((len(culturas), len(variaveis)), np.nan)
+    for nome, faixas in dados['culturas'].items():
+        i = indice_cultura[normalizar_nome(nome)]
+        for variavel, faixa in {**padrao, **faixas}.items():
+            j = indice_variavel[variavel]
+            minimo[i, j] = faixa.get('min', np.nan)
+            maximo[i, j] = faixa.get('max', np.nan)
+
+    invertidas = np.argwhere(minimo > maximo)
+    if len(invertidas):
+        i, j = invertidas[0]
+        raise ValueError(f"Faixa inválida em {caminho}: {culturas[i]}/{variaveis[j]} com min > max")
+
+    minimo.flags.writeable = False
+    maximo.flags.writeable = False
+    return _Compilada(culturas, variaveis, indice_cultura, indice_variavel,
+                      minimo, maximo, caminho.stat().st_mtime)
+
+
+class TabelaFaixas:
+    """Faixas ideais compiladas em arrays [cultura, variável]"""
+
+    def __init__(self, caminho=CAMINHO_PADRAO):
+        self.caminho = Path(caminho)
+        self._tabela = _compilar(self.caminho)
+
+    @property
+    def culturas(self) -> List[str]:
+        return self._tabela.culturas
+
+    @property
+    def variaveis(self) -> List[str]:
+        return self._tabela.variaveis
+
+    @property
+    def minimo(self) -> np.ndarray:
+        return self._tabela.minimo
+
+    @property
+    def maximo(self) -> np.ndarray:
+        return self._tabela.maximo
+
+    def recarregar(self) -> None:
+        """Relê o arquivo; leitores em andamento continuam com a versão anterior"""
+        self._tabela = _compilar(self.caminho)
+
+    def recarregar_se_alterado(self) -> bool:
+        """Recarrega apenas se o arquivo mudou desde a última leitura"""
+        if self.caminho.stat().st_mtime == self._tabela.mtime:
+            return False
+        self.recarregar()
+        return True
+
+    def id_cultura(self, cultura: str) -> int:
+        try:
+            return self._tabela.indice_cultura[normalizar_nome(cultura)]
+        except KeyError:
+            raise KeyError(f"Cultura sem faixas cadastradas: {cultura}") from None
+
+    def id_variavel(self, variavel: str) -> int:
+        try:
+            return self._tabela.indice_variavel[variavel]
+        except KeyError:
+            raise KeyError(f"Variável sem faixas cadastradas: {variavel}") from None
+
+    def ids_culturas(self, culturas: Iterable[str]) -> np.ndarray:
+        """Converte um lote de nomes de cultura em ids (um lookup por nome distinto)"""
+        nomes, inversos = np.unique(np.asarray(list(culturas), dtype=object).astype(str),
+                                    return_inverse=True)
+        return np.array([self.id_cultura(n) for n in nomes], dtype=np.intp)[inversos]
+
+    def faixa(self, cultura: str, variavel: str) -> Tuple[float, float]:
+        """(mínimo, máximo) da variável para a cultura; NaN = sem limite"""
+        tabela = self._tabela
+        i, j = self.id_cultura(cultura), self.id_variavel(variavel)
+        return float(tabela.minimo[i, j]), float(tabela.maximo[i, j])
+
+    def variaveis_da_cultura(self, cultura: str, prefixo: str = '') -> List[str]:
+        """Variáveis com algum limite definido para a cultura"""
+        tabela = self._tabela
+        i = self.id_cultura(cultura)
+        definidas = ~(np.isnan(tabela.minimo[i]) & np.isnan(tabela.maximo[i]))
+        return [v for v, ok in zip(tabela.variaveis, definidas) if ok and v.startswith(prefixo)]
+
+    def culturas_com(self, variaveis: Iterable[str]) -> List[str]:
+        """Culturas que têm limites para todas as variáveis informadas"""
+        tabela = self._tabela
+        colunas = [self.id_variavel(v) for v in variaveis]
+        definidas = ~(np.isnan(tabela.minimo[:, colunas]) & np.isnan(tabela.maximo[:, colunas]))
+        return [c for c, ok in zip(tabela.culturas, definidas.all(axis=1)) if ok]
+
+    def classificar(self, ids_cultura, variavel: str, valores) -> np.ndarray:
+        """
+        Classifica um lote de valores de uma variável: ABAIXO, DENTRO ou ACIMA.
+
+        Args:
+            ids_cultura: Id da cultura de cada valor (ou um único id)
+            variavel: Nome da variável
+            valores: Valores medidos
+        """
+        tabela = self._tabela
+        j = self.id_variavel(variavel)
+        ids_cultura = np.asarray(ids_cultura, dtype=np.intp)
+        valores = np.asarray(valores, dtype=np.float64)
+
+        # Comparações com NaN (sem limite) são falsas: o valor fica DENTRO
+        return ((valores > tabela.maximo[ids_cultura, j]).astype(np.int8)
+                - (valores < tabela.minimo[ids_cultura, j]).astype(np.int8))
+
+    def classificar_leitura(self, cultura: str, leitura: Dict[str, float]) -> Dict[str, int]:
+        """Classifica todas as variáveis de uma leitura avulsa de uma cultura"""
+        tabela = self._tabela
+        i = self.id_cultura(cultura)
+        colunas = np.array([self.id_variavel(v) for v in leitura], dtype=np.intp)
+        valores = np.array(list(leitura.values()), dtype=np.float64)
+
+        codigos = ((valores > tabela.maximo[i, colunas]).astype(np.int8)
+                   - (valores < tabela.minimo[i, colunas]).astype(np.int8))
+        return dict(zip(leitura, codigos.tolist()))
+
+    def gerar_header_c(self, cultura: str) -> str:
+        """Constantes #define com as faixas da cultura, para o firmware do ESP32"""
+        tabela = self._tabela
+        i = self.id_cultura(cultura)
+        linhas = [
+            '// Gerado por: python -m comum header (não editar manualmente)',
+            f'// Fonte: comum/{self.caminho.name} - cultura: {tabela.culturas[i]}',
+            '#pragma once',
+            ''
+        ]
+        for j, variavel in enumerate(tabela.variaveis):
+            for sufixo, limites in (('MIN', tabela.minimo), ('MAX', tabela.maximo)):
+                if not np.isnan(limites[i, j]):
+                    linhas.append(f'#define FAIXA_{variavel.upper()}_{sufixo} {float(limites[i, j])!r}f')
+        return '\n'.join(linhas) + '\n'
+
+
+_padrao: Optional[TabelaFaixas] = None
+
+
+def tabela_padrao() -> TabelaFaixas:
+    """Tabela compartilhada do processo, recarregada se o JSON tiver mudado"""
+    global _padrao
+    if _padrao is None:
+        _padrao = TabelaFaixas()
+    else:
+        _padrao.recarregar_se_alterado()
+    return _padrao
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='comum', description='Tabela de faixas ideais por cultura')
+    parser.add_argument('--arquivo', type=Path, default=CAMINHO_PADRAO, help='JSON de faixas')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    subparsers.add_parser('listar', help='Exibir a tabela compilada')
+    header_parser = subparsers.add_parser('header', help='Gerar header C para o firmware')
+    header_parser.add_argument('--cultura', required=True)
+    header_parser.add_argument('--saida', type=Path, required=True)
+    args = parser.parse_args()
+
+    tabela = TabelaFaixas(args.arquivo)
+    if args.comando == 'listar':
+        for i, cultura in enumerate(tabela.culturas):
+            print(f"\n{cultura}:")
+            for j, variavel in enumerate(tabela.variaveis):
+                if not (np.isnan(tabela.minimo[i, j]) and np.isnan(tabela.maximo[i, j])):
+                    print(f"  {variavel}: {tabela.minimo[i, j]:g} - {tabela.maximo[i, j]:g}")
+    else:
+        args.saida.write_text(tabela.gerar_header_c(args.cultura), encoding='utf-8')
+        print(f"Header gerado em: {args.saida}")
@@ -3,6 +3,7 @@ import csv
 import os
 from typing import List, Dict, Tuple
 from datetime import datetime
+from manifesto_exportacoes import registrar_exportacao
 
 class Cultura:
     def __init__(self, nome: str, area: float, ruas: int, comprimento_rua: float):
@@ -92,6 +93,10 @@ class SistemaAgricola:
         
         print(f"\nDados exportados com sucesso para o arquivo: {filename}")
 
+        # Índice das exportações (data/manifesto_exportacoes.csv) usado pela análise em R
+        entrada = registrar_exportacao(filename)
+        print(f"Exportação registrada no manifesto: {entrada['linhas']} linhas, culturas {entrada['culturas']}")
+
 def menu():
     print("\n=== FarmTech Solutions - Sistema de Gestão Agrícola ===")
     print("1. Entrada de dados")
@@ -2,8 +2,20 @@ import random
 import math
 from datetime import datetime
 import os
+import sys
+from pathlib import Path
 from farmtech_solutions import SistemaAgricola, Cultura
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from comum.faixas import tabela_padrao
+
+NOMES_INSUMOS = {
+    "dose_fertilizante_npk": "Fertilizante NPK",
+    "dose_herbicida": "Herbicida",
+    "dose_fungicida": "Fungicida",
+    "dose_inseticida": "Inseticida"
+}
+
 def gerar_dados_teste(num_culturas: int = 10):
     """
     Gera dados de teste com valores aleatórios para culturas e insumos.
@@ -13,19 +25,8 @@ def gerar_dados_teste(num_culturas: int = 10):
     """
     sistema = SistemaAgricola()
     
-    insumos_cafe = [
-        {"nome": "Fertilizante NPK", "min": 0.5, "max": 2.0},
-        {"nome": "Herbicida", "min": 0.3, "max": 1.0},
-        {"nome": "Fungicida", "min": 0.2, "max": 0.8},
-        {"nome": "Inseticida", "min": 0.2, "max": 0.8}
-    ]
-    
-    insumos_soja = [
-        {"nome": "Fertilizante NPK", "min": 0.8, "max": 2.5},
-        {"nome": "Herbicida", "min": 0.5, "max": 1.5},
-        {"nome": "Fungicida", "min": 0.3, "max": 1.0},
-        {"nome": "Inseticida", "min": 0.3, "max": 1.0}
-    ]
+    # Faixas de dose por insumo (comum/faixas_ideais.json, variáveis dose_*)
+    tabela = tabela_padrao()
     
     for _ in range(num_culturas):
 
@@ -39,14 +40,16 @@ def gerar_dados_teste(num_culturas: int = 10):
 
         cultura = Cultura(nome, area, ruas, comprimento_rua)
         
-        insumos_disponiveis = insumos_cafe if nome == "Café" else insumos_soja
+        referencia = "cafe" if nome == "Café" else "soja"
+        insumos_disponiveis = tabela.variaveis_da_cultura(referencia, 'dose_')
         num_insumos = random.randint(2, len(insumos_disponiveis))
         insumos_selecionados = random.sample(insumos_disponiveis, num_insumos)
         
         for insumo in insumos_selecionados:
-            quantidade = random.uniform(insumo["min"], insumo["max"])
+            dose_min, dose_max = tabela.faixa(referencia, insumo)
+            quantidade = random.uniform(dose_min, dose_max)
             cultura.insumos.append({
-                "nome": insumo["nome"],
+                "nome": NOMES_INSUMOS[insumo],
                 "quantidade": quantidade
             })
         
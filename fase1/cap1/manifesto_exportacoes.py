@@ -0,0 +1,345 @@
+"""
+Manifesto e compactação das exportações dados_agricolas_*.csv
+
+Cada chamada de SistemaAgricola.exportar_dados_csv grava um CSV novo em
+data/. Este módulo mantém um índice dessas exportações e as consolida em
+arquivos colunares:
+
+- Manifesto (data/manifesto_exportacoes.csv): uma linha por exportação com
+  data/hora, número de linhas, culturas, tamanho, SHA-256 do arquivo e o
+  arquivo consolidado que a contém; atualizado a cada exportação
+- Compactação: as exportações pendentes (e partes consolidadas pequenas)
+  são reunidas em um único Parquet em data/consolidado/, ordenado por
+  exportação e linha do CSV original, depois de conferir o checksum de
+  cada CSV
+- Consultas: "mais recente" e "histórico completo" são resolvidas pelo
+  manifesto, abrindo só os arquivos necessários em vez de listar e ler o
+  diretório inteiro
+
+O manifesto usa apenas a biblioteca padrão; compactação e consultas usam
+o DuckDB (pip install duckdb pandas).
+
+Uso:
+    python fase1/cap1/manifesto_exportacoes.py indexar
+    python fase1/cap1/manifesto_exportacoes.py listar
+    python fase1/cap1/manifesto_exportacoes.py compactar --manter-recentes 1
+    python fase1/cap1/manifesto_exportacoes.py verificar
+    python fase1/cap1/manifesto_exportacoes.py historico --saida historico.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DIRETORIO_PADRAO = Path(__file__).resolve().parent / 'data'
+ARQUIVO_MANIFESTO = 'manifesto_exportacoes.csv'
+PASTA_CONSOLIDADO = 'consolidado'
+PADRAO_EXPORTACAO = re.compile(r'^dados_agricolas_(\d{8}_\d{6})\.csv$')
+
+CAMPOS_MANIFESTO = ['exportacao', 'arquivo', 'exportado_em', 'linhas', 'culturas',
+                    'bytes', 'sha256', 'consolidado']
+# Nomes usados por analise_estatistica.R (os cabeçalhos antigos têm acentos e unidades)
+COLUNAS_DADOS = ['Cultura', 'Area', 'Numero_Ruas', 'Comprimento_Rua', 'Insumo', 'Quantidade']
+TIPOS_DADOS = {'Cultura': 'VARCHAR', 'Area': 'DOUBLE', 'Numero_Ruas': 'INTEGER',
+               'Comprimento_Rua': 'DOUBLE', 'Insumo': 'VARCHAR', 'Quantidade': 'DOUBLE'}
+TAMANHO_ALVO = 64 * 1024 * 1024    # Partes consolidadas menores que isso são recompactadas
+
+
+def resumir_exportacao(caminho: Path) -> Dict[str, str]:
+    """Entrada do manifesto para um CSV exportado (uma leitura do arquivo)"""
+    caminho = Path(caminho)
+    encontrado = PADRAO_EXPORTACAO.match(caminho.name)
+    if not encontrado:
+        raise ValueError(f"Nome fora do padrão dados_agricolas_<AAAAmmdd_HHMMSS>.csv: {caminho.name}")
+
+    conteudo = caminho.read_bytes()
+    leitor = csv.reader(io.StringIO(conteudo.decode('utf-8'), newline=''))
+    next(leitor, None)
+    linhas, culturas = 0, set()
+    for registro in leitor:
+        if registro:
+            linhas += 1
+            culturas.add(registro[0])
+
+    exportacao = encontrado.group(1)
+    return {
+        'exportacao': exportacao,
+        'arquivo': caminho.name,
+        'exportado_em': datetime.strptime(exportacao, '%Y%m%d_%H%M%S').isoformat(),
+        'linhas': str(linhas),
+        'culturas': ';'.join(sorted(culturas)),
+        'bytes': str(len(conteudo)),
+        'sha256': hashlib.sha256(conteudo).hexdigest(),
+        'consolidado': ''
+    }
+
+
+def _texto_sql(valor) -> str:
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def _lista_sql(caminhos) -> str:
+    return '[' + ', '.join(_texto_sql(c) for c in caminhos) + ']'
+
+
+def _conectar():
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("Compactação e consultas do histórico precisam do DuckDB: pip install duckdb pandas")
+    return duckdb.connect()
+
+
+class ManifestoExportacoes:
+    """Índice das exportações de um diretório data/ e suas partes consolidadas"""
+
+    def __init__(self, diretorio: Path = DIRETORIO_PADRAO):
+        self.diretorio = Path(diretorio)
+        self.caminho = self.diretorio / ARQUIVO_MANIFESTO
+
+    def entradas(self) -> List[Dict[str, str]]:
+        """Entradas do manifesto, da exportação mais antiga para a mais recente"""
+        if not self.caminho.exists():
+            return []
+        with open(self.caminho, 'r', newline='', encoding='utf-8') as f:
+            return sorted(csv.DictReader(f), key=lambda e: e['exportacao'])
+
+    def _gravar(self, entradas: List[Dict[str, str]]) -> None:
+        # Arquivo temporário + os.replace: quem lê nunca vê um manifesto pela metade
+        temporario = self.caminho.with_suffix('.tmp')
+        with open(temporario, 'w', newline='', encoding='utf-8') as f:
+            escritor = csv.DictWriter(f, fieldnames=CAMPOS_MANIFESTO)
+            escritor.writeheader()
+            escritor.writerows(sorted(entradas, key=lambda e: e['exportacao']))
+        os.replace(temporario, self.caminho)
+
+    def registrar(self, arquivo: Path) -> Dict[str, str]:
+        """Adiciona (ou atualiza) a entrada de um CSV exportado"""
+        entrada = resumir_exportacao(arquivo)
+        entradas = [e for e in self.entradas() if e['exportacao'] != entrada['exportacao']]
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self._gravar(entradas + [entrada])
+        return entrada
+
+    def indexar(self) -> int:
+        """Registra os CSVs do diretório que ainda não estão no manifesto; retorna quantos"""
+        conhecidos = {e['arquivo'] for e in self.entradas()}
+        novos = [resumir_exportacao(p) for p in sorted(self.diretorio.glob('dados_agricolas_*.csv'))
+                 if PADRAO_EXPORTACAO.match(p.name) and p.name not in conhecidos]
+        if novos:
+            self._gravar(self.entradas() + novos)
+        return len(novos)
+
+    def mais_recente(self) -> Optional[Dict[str, str]]:
+        entradas = self.entradas()
+        return entradas[-1] if entradas else None
+
+    def verificar(self) -> List[str]:
+        """Problemas encontrados (lista vazia se CSVs e partes batem com o manifesto)"""
+        problemas = []
+        for entrada in self.entradas():
+            arquivo = self.diretorio / entrada['arquivo']
+            if entrada['consolidado'] and not (self.diretorio / entrada['consolidado']).exists():
+                problemas.append(f"{entrada['exportacao']}: parte consolidada ausente ({entrada['consolidado']})")
+            if arquivo.exists():
+                if hashlib.sha256(arquivo.read_bytes()).hexdigest() != entrada['sha256']:
+                    problemas.append(f"{entrada['arquivo']}: checksum diferente do manifesto")
+            elif not entrada['consolidado']:
+                problemas.append(f"{entrada['arquivo']}: arquivo ausente e não consolidado")
+        return problemas
+
+    def _select_csv(self, entradas: List[Dict[str, str]]) -> str:
+        arquivos = [self.diretorio / e['arquivo'] for e in entradas]
+        ausentes = [str(a) for a in arquivos if not a.exists()]
+        if ausentes:
+            raise FileNotFoundError(f"Exportações não consolidadas ausentes: {', '.join(ausentes)}")
+        tipos = ', '.join(f"'{nome}': '{tipo}'" for nome, tipo in TIPOS_DADOS.items())
+        # Uma leitura sequencial por arquivo: row_number() OVER () segue a ordem das linhas do CSV
+        return ' UNION ALL '.join(f"""
+            SELECT {_texto_sql(entrada['exportacao'])} AS exportacao, row_number() OVER () AS linha,
+                   {', '.join(COLUNAS_DADOS)}
+            FROM read_csv({_texto_sql(arquivo)}, header = true, names = {COLUNAS_DADOS},
+                          types = {{{tipos}}}, parallel = false)
+        """ for entrada, arquivo in zip(entradas, arquivos))
+
+    def _select_partes(self, conn, partes: List[str]) -> str:
+        consultas = []
+        for parte in partes:
+            caminho = _texto_sql(self.diretorio / parte)
+            colunas = {c[0] for c in conn.execute(f"DESCRIBE SELECT * FROM read_parquet({caminho})").fetchall()}
+            # Partes gravadas antes da coluna linha: vale a ordem das linhas no arquivo
+            linha = 'linha' if 'linha' in colunas else 'file_row_number + 1 AS linha'
+            consultas.append(f"""
+                SELECT exportacao, {linha}, {', '.join(COLUNAS_DADOS)}
+                FROM read_parquet({caminho}, file_row_number = true)
+            """)
+        return ' UNION ALL '.join(consultas)
+
+    def carregar_mais_recente(self):
+        """DataFrame da exportação mais recente (do CSV ou da parte consolidada)"""
+        entrada = self.mais_recente()
+        if entrada is None:
+            raise FileNotFoundError(f"Nenhuma exportação no manifesto {self.caminho}")
+
+        conn = _conectar()
+        try:
+            if entrada['consolidado']:
+                consulta = f"{self._select_partes(conn, [entrada['consolidado']])} WHERE exportacao = ?"
+                parametros = [entrada['exportacao']]
+            else:
+                consulta, parametros = self._select_csv([entrada]), []
+            return conn.execute(f"SELECT * EXCLUDE (linha) FROM ({consulta}) ORDER BY linha", parametros).df()
+        finally:
+            conn.close()
+
+    def carregar_historico(self):
+        """DataFrame com todas as exportações (coluna exportacao), em ordem cronológica e de linha"""
+        entradas = self.entradas()
+        partes = sorted({e['consolidado'] for e in entradas if e['consolidado']})
+        pendentes = [e for e in entradas if not e['consolidado']]
+        if not entradas:
+            raise FileNotFoundError(f"Nenhuma exportação no manifesto {self.caminho}")
+
+        conn = _conectar()
+        try:
+            consultas = ([self._select_partes(conn, partes)] if partes else []) + \
+                        ([self._select_csv(pendentes)] if pendentes else [])
+            return conn.execute(f"""
+                SELECT * EXCLUDE (linha) FROM ({' UNION ALL '.join(consultas)})
+                ORDER BY exportacao, linha
+            """).df()
+        finally:
+            conn.close()
+
+    def compactar(self, manter_recentes: int = 1, remover_originais: bool = False,
+                  tamanho_alvo: int = TAMANHO_ALVO) -> Optional[Path]:
+        """
+        Consolida as exportações pendentes em uma nova parte Parquet.
+
+        As manter_recentes exportações mais novas continuam só em CSV; partes
+        consolidadas menores que tamanho_alvo entram na nova parte, então o
+        número de arquivos do histórico se mantém pequeno. A nova parte é
+        gravada antes do manifesto ser trocado e os arquivos antigos só são
+        removidos depois: uma interrupção não perde exportações.
+
+        Returns:
+            Caminho da nova parte, ou None se não havia o que compactar
+        """
+        entradas = self.entradas()
+        sem_parte = [e for e in entradas if not e['consolidado']]
+        pendentes = sem_parte[:max(0, len(sem_parte) - manter_recentes)]
+
+        alteradas = [e['arquivo'] for e in pendentes
+                     if hashlib.sha256((self.diretorio / e['arquivo']).read_bytes()).hexdigest() != e['sha256']]
+        if alteradas:
+            print(f"Ignorando exportações alteradas após o registro: {', '.join(alteradas)}")
+            pendentes = [e for e in pendentes if e['arquivo'] not in alteradas]
+
+        partes_pequenas = sorted({e['consolidado'] for e in entradas if e['consolidado']
+                                  and (self.diretorio / e['consolidado']).stat().st_size < tamanho_alvo})
+        if not pendentes and len(partes_pequenas) < 2:
+            return None
+
+        incluidas = pendentes + [e for e in entradas if e['consolidado'] in partes_pequenas]
+        exportacoes = sorted(e['exportacao'] for e in incluidas)
+        pasta = self.diretorio / PASTA_CONSOLIDADO
+        pasta.mkdir(parents=True, exist_ok=True)
+        nova_parte = pasta / f"dados_agricolas_{exportacoes[0]}_a_{exportacoes[-1]}.parquet"
+        temporario = nova_parte.with_suffix('.tmp')
+
+        conn = _conectar()
+        try:
+            consultas = ([self._select_csv(pendentes)] if pendentes else []) + \
+                        ([self._select_partes(conn, partes_pequenas)] if partes_pequenas else [])
+            # linha (posição no CSV original) vai junto: a ordem dentro de cada exportação é preservada
+            conn.execute(f"""
+                COPY (SELECT * FROM ({' UNION ALL '.join(consultas)}) ORDER BY exportacao, linha)
+                TO {_texto_sql(temporario)} (FORMAT PARQUET, COMPRESSION ZSTD)
+            """)
+            gravadas = conn.execute(f"SELECT count(*) FROM read_parquet({_texto_sql(temporario)})").fetchone()[0]
+        finally:
+            conn.close()
+
+        esperadas = sum(int(e['linhas']) for e in incluidas)
+        if gravadas != esperadas:
+            temporario.unlink()
+            raise ValueError(f"Parte consolidada com {gravadas} linhas, manifesto indica {esperadas}")
+        os.replace(temporario, nova_parte)
+
+        relativo = nova_parte.relative_to(self.diretorio).as_posix()
+        incluidas_ids = set(exportacoes)
+        for entrada in entradas:
+            if entrada['exportacao'] in incluidas_ids:
+                entrada['consolidado'] = relativo
+        self._gravar(entradas)
+
+        for parte in partes_pequenas:
+            if parte != relativo:
+                (self.diretorio / parte).unlink(missing_ok=True)
+        if remover_originais:
+            # Inclui CSVs de compactações anteriores (sem --remover-originais) cuja parte foi refeita
+            for entrada in incluidas:
+                (self.diretorio / entrada['arquivo']).unlink(missing_ok=True)
+        return nova_parte
+
+
+def registrar_exportacao(arquivo) -> Dict[str, str]:
+    """Registra um CSV recém-exportado no manifesto do diretório em que ele foi gravado"""
+    return ManifestoExportacoes(Path(arquivo).parent).registrar(arquivo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manifesto e compactação das exportações agrícolas')
+    parser.add_argument('--diretorio', type=Path, default=DIRETORIO_PADRAO,
+                        help='Diretório das exportações (padrão: fase1/cap1/data)')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    subparsers.add_parser('indexar', help='Registrar CSVs ainda fora do manifesto')
+    subparsers.add_parser('listar', help='Mostrar o manifesto')
+    subparsers.add_parser('verificar', help='Conferir checksums e arquivos do manifesto')
+
+    compactar_parser = subparsers.add_parser('compactar', help='Consolidar exportações em Parquet')
+    compactar_parser.add_argument('--manter-recentes', type=int, default=1,
+                                  help='Exportações mais novas mantidas só em CSV')
+    compactar_parser.add_argument('--remover-originais', action='store_true',
+                                  help='Apagar os CSVs depois de consolidados')
+
+    historico_parser = subparsers.add_parser('historico', help='Todas as exportações em uma tabela')
+    historico_parser.add_argument('--saida', type=Path, default=None, help='CSV de saída')
+
+    args = parser.parse_args(argv)
+    manifesto = ManifestoExportacoes(args.diretorio)
+
+    if args.comando == 'indexar':
+        print(f"Exportações registradas: {manifesto.indexar()} (manifesto: {manifesto.caminho})")
+    elif args.comando == 'listar':
+        for entrada in manifesto.entradas():
+            print(f"{entrada['exportado_em']}  {entrada['linhas']:>6} linhas  {entrada['culturas']:<12}  "
+                  f"{entrada['arquivo']}  {entrada['consolidado'] or '(pendente)'}")
+    elif args.comando == 'verificar':
+        problemas = manifesto.verificar()
+        for problema in problemas:
+            print(f"❌ {problema}")
+        print("✅ Manifesto consistente" if not problemas else f"{len(problemas)} problema(s) encontrados")
+        if problemas:
+            raise SystemExit(1)
+    elif args.comando == 'compactar':
+        parte = manifesto.compactar(args.manter_recentes, args.remover_originais)
+        print(f"Parte consolidada: {parte}" if parte else "Nada a compactar")
+    elif args.comando == 'historico':
+        historico = manifesto.carregar_historico()
+        if args.saida:
+            historico.to_csv(args.saida, index=False)
+            print(f"Histórico salvo em: {args.saida} ({len(historico):,} linhas)")
+        else:
+            print(historico.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
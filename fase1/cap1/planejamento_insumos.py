@@ -0,0 +1,332 @@
+"""
+Planejamento da demanda de insumos
+
+Calcula o volume de cada insumo (dose em L/m × ruas × comprimento da rua)
+para todos os talhões e insumos de uma vez, com arrays NumPy:
+
+- Fontes: um SistemaAgricola em memória, a exportação mais recente de um
+  diretório data/ (uma fazenda; as anteriores são versões dos mesmos
+  talhões) ou CSVs da cooperativa com a coluna Fazenda antes das colunas
+  da exportação
+- Totais por cultura e insumo, por fazenda e da cooperativa inteira
+- Cenários "e se" com fatores de dose por insumo ou por cultura/insumo,
+  avaliados juntos em uma única operação (cenários × grupos)
+- Compra: litros e embalagens por fazenda (arredondadas para cima)
+
+Exemplo de cenarios.json (o cenário "base" é sempre incluído):
+    [{"nome": "npk_mais_10", "fatores": {"Fertilizante NPK": 1.1}},
+     {"nome": "cafe_sem_herbicida", "fatores": {"Café/Herbicida": 0}},
+     {"nome": "tudo_menos_5", "fatores": {"*": 0.95}}]
+
+Uso:
+    python fase1/cap1/planejamento_insumos.py planejar fase1/cap1/data
+    python fase1/cap1/planejamento_insumos.py gerar cooperativa.csv --fazendas 5000
+    python fase1/cap1/planejamento_insumos.py planejar cooperativa.csv --cenarios cenarios.json --embalagem 20
+    python fase1/cap1/planejamento_insumos.py planejar regiao_norte.csv regiao_sul.csv
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from gerar_dados_teste import NOMES_INSUMOS
+from manifesto_exportacoes import PADRAO_EXPORTACAO, ManifestoExportacoes
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from comum.faixas import tabela_padrao
+
+COLUNAS_EXPORTACAO = ['Cultura', 'Area', 'Numero_Ruas', 'Comprimento_Rua', 'Insumo', 'Quantidade']
+COLUNAS_TALHOES = ['Fazenda', 'Cultura', 'Numero_Ruas', 'Comprimento_Rua', 'Insumo', 'Quantidade']
+TIPOS_TEXTO = {'Fazenda': 'category', 'Cultura': 'category', 'Insumo': 'category'}   # Fatoração pelos códigos
+FAZENDA_PADRAO = 'fazenda_1'   # Exportações do SistemaAgricola são de uma única fazenda
+CENARIO_BASE = {'nome': 'base', 'fatores': {}}
+
+
+def tabela_do_sistema(sistema, fazenda: str = FAZENDA_PADRAO) -> pd.DataFrame:
+    """Talhões e insumos de um SistemaAgricola em memória (uma linha por insumo)"""
+    linhas = [(fazenda, cultura.nome, cultura.ruas, cultura.comprimento_rua, insumo['nome'], insumo['quantidade'])
+              for cultura in sistema.culturas for insumo in cultura.insumos]
+    return pd.DataFrame(linhas, columns=COLUNAS_TALHOES)
+
+
+def _ler_csv(caminho: Path) -> pd.DataFrame:
+    with open(caminho, 'r', encoding='utf-8') as f:
+        cabecalho = f.readline().strip().split(',')
+    if cabecalho[0] == 'Fazenda':
+        return pd.read_csv(caminho, header=0, names=['Fazenda'] + COLUNAS_EXPORTACAO, usecols=COLUNAS_TALHOES,
+                           dtype=TIPOS_TEXTO)
+    # Exportação de uma fazenda: colunas por posição (os cabeçalhos antigos têm acentos e unidades)
+    return _da_exportacao(pd.read_csv(caminho, header=0, names=COLUNAS_EXPORTACAO))
+
+
+def _da_exportacao(dados: pd.DataFrame) -> pd.DataFrame:
+    dados = dados[COLUNAS_EXPORTACAO].astype({'Cultura': 'category', 'Insumo': 'category'})
+    dados.insert(0, 'Fazenda', pd.Categorical([FAZENDA_PADRAO] * len(dados)))
+    return dados[COLUNAS_TALHOES]
+
+
+def ler_exportacao_mais_recente(diretorio) -> pd.DataFrame:
+    """
+    Talhões da exportação mais recente de um diretório data/.
+
+    Cada exportação é um retrato completo da mesma fazenda, então somar
+    várias contaria os talhões mais de uma vez. A exportação é resolvida
+    pelo manifesto (inclusive se já foi consolidada em Parquet) ou, sem
+    manifesto, pelo nome do arquivo (data/hora).
+    """
+    diretorio = Path(diretorio)
+    manifesto = ManifestoExportacoes(diretorio)
+    if manifesto.mais_recente() is not None:
+        return _da_exportacao(manifesto.carregar_mais_recente())
+
+    arquivos = sorted(p for p in diretorio.glob('dados_agricolas_*.csv') if PADRAO_EXPORTACAO.match(p.name))
+    if not arquivos:
+        raise FileNotFoundError(f"Nenhuma exportação encontrada em {diretorio}")
+    return _ler_csv(arquivos[-1])
+
+
+def ler_talhoes(fontes, workers: int = 4) -> pd.DataFrame:
+    """
+    Lê um diretório de exportações (só a mais recente) ou um ou mais CSVs da
+    cooperativa (arquivos em paralelo).
+    """
+    fontes = [Path(f) for f in ([fontes] if isinstance(fontes, (str, Path)) else fontes)]
+    if len(fontes) == 1 and fontes[0].is_dir():
+        return ler_exportacao_mais_recente(fontes[0])
+    diretorios = [str(f) for f in fontes if f.is_dir()]
+    if diretorios:
+        raise ValueError(f"Um diretório de exportações deve ser a única fonte: {', '.join(diretorios)}")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        partes = list(executor.map(_ler_csv, fontes))
+    return pd.concat(partes, ignore_index=True)
+
+
+def carregar_cenarios(caminho: Optional[Path]) -> List[dict]:
+    cenarios = json.loads(Path(caminho).read_text(encoding='utf-8')) if caminho else []
+    if not isinstance(cenarios, list) or any('nome' not in c for c in cenarios):
+        raise ValueError("Cenários devem ser uma lista de objetos com 'nome' e 'fatores'")
+    return cenarios
+
+
+class PlanejadorInsumos:
+    """
+    Demanda de insumos agrupada por (fazenda, cultura, insumo).
+
+    Os grupos são montados uma vez; cada cenário é só um fator por
+    (cultura, insumo), então todos os cenários são avaliados com um produto
+    vetorizado (cenários × grupos) e agregados com np.bincount.
+    """
+
+    def __init__(self, talhoes: pd.DataFrame):
+        dados = talhoes.dropna(subset=['Insumo', 'Quantidade'])
+        # Insumos em branco são descartados pelas categorias (sem percorrer as linhas em Python)
+        codigo_insumo, insumos = pd.factorize(dados['Insumo'], sort=True)
+        validos = np.array([str(nome).strip() != '' for nome in insumos], dtype=bool)
+        if not validos.all():
+            dados = dados[validos[codigo_insumo]]
+            codigo_insumo, insumos = pd.factorize(dados['Insumo'], sort=True)
+        self.insumos = pd.Index(insumos).astype(str)
+
+        codigo_fazenda, fazendas = pd.factorize(dados['Fazenda'], sort=True)
+        self.fazendas = pd.Index(fazendas).astype(str)
+        codigo_cultura, culturas = pd.factorize(dados['Cultura'], sort=True)
+        self.culturas = pd.Index(culturas).astype(str)
+        self.n_talhoes_insumo = len(dados)
+
+        # Litros por linha: dose (L/m) × metros lineares de plantio (ruas × comprimento)
+        litros = (dados['Quantidade'].to_numpy(dtype=np.float64)
+                  * dados['Numero_Ruas'].to_numpy(dtype=np.float64)
+                  * dados['Comprimento_Rua'].to_numpy(dtype=np.float64))
+
+        n_c, n_i = len(self.culturas), len(self.insumos)
+        chave = (codigo_fazenda.astype(np.int64) * n_c + codigo_cultura) * n_i + codigo_insumo
+        grupos, inverso = np.unique(chave, return_inverse=True)
+        self.litros_base = np.bincount(inverso, weights=litros, minlength=len(grupos))
+        self.grupo_fazenda, resto = np.divmod(grupos, n_c * n_i)
+        self.grupo_cultura, self.grupo_insumo = np.divmod(resto, n_i)
+
+    def fatores(self, cenarios: Sequence[dict]) -> np.ndarray:
+        """
+        Fatores de dose (cenários, culturas, insumos); o primeiro cenário é o base.
+
+        Chaves de "fatores": "*" (todos), nome do insumo ou "Cultura/Insumo",
+        aplicadas nessa ordem (a mais específica prevalece). Culturas ou
+        insumos que não aparecem nos talhões geram ValueError (erro de
+        digitação no cenário não pode virar um fator ignorado).
+        """
+        matriz = np.ones((len(cenarios) + 1, len(self.culturas), len(self.insumos)))
+        insumos = {nome: j for j, nome in enumerate(self.insumos)}
+        culturas = {nome: k for k, nome in enumerate(self.culturas)}
+
+        for s, cenario in enumerate(cenarios, start=1):
+            fatores: Dict[str, float] = cenario.get('fatores', {})
+            especificidade = lambda chave: 0 if chave == '*' else (2 if '/' in chave else 1)
+            for chave in sorted(fatores, key=especificidade):
+                fator = float(fatores[chave])
+                if chave == '*':
+                    matriz[s] = fator
+                elif '/' in chave:
+                    cultura, insumo = chave.split('/', 1)
+                    if cultura not in culturas or insumo not in insumos:
+                        raise ValueError(f"Cenário '{cenario['nome']}': {chave} não existe nos talhões "
+                                         f"(culturas: {', '.join(self.culturas)}; insumos: {', '.join(self.insumos)})")
+                    matriz[s, culturas[cultura], insumos[insumo]] = fator
+                elif chave in insumos:
+                    matriz[s, :, insumos[chave]] = fator
+                else:
+                    raise ValueError(f"Cenário '{cenario['nome']}': insumo {chave} não existe nos talhões "
+                                     f"(insumos: {', '.join(self.insumos)})")
+        return matriz
+
+    def demanda(self, cenarios: Sequence[dict] = ()) -> np.ndarray:
+        """Litros por (cenário, grupo)"""
+        return self.fatores(cenarios)[:, self.grupo_cultura, self.grupo_insumo] * self.litros_base
+
+    def nomes_cenarios(self, cenarios: Sequence[dict]) -> List[str]:
+        return [CENARIO_BASE['nome']] + [c['nome'] for c in cenarios]
+
+    def _agregar(self, demanda: np.ndarray, codigo: np.ndarray, n_codigos: int) -> np.ndarray:
+        """Soma da demanda por código, para todos os cenários em um único bincount: (cenários, códigos)"""
+        n_cenarios = len(demanda)
+        indice = (np.arange(n_cenarios)[:, None] * n_codigos + codigo).ravel()
+        return np.bincount(indice, weights=demanda.ravel(), minlength=n_cenarios * n_codigos).reshape(n_cenarios, n_codigos)
+
+    def por_cultura_insumo(self, cenarios: Sequence[dict] = ()) -> pd.DataFrame:
+        """Litros da cooperativa por cultura e insumo, uma coluna por cenário"""
+        n_i = len(self.insumos)
+        totais = self._agregar(self.demanda(cenarios), self.grupo_cultura * n_i + self.grupo_insumo,
+                               len(self.culturas) * n_i)
+        indice = pd.MultiIndex.from_product([self.culturas, self.insumos], names=['Cultura', 'Insumo'])
+        tabela = pd.DataFrame(totais.T, index=indice, columns=self.nomes_cenarios(cenarios))
+        return tabela[tabela.any(axis=1)]
+
+    def litros_por_fazenda(self, cenarios: Sequence[dict] = ()) -> np.ndarray:
+        """Litros por (cenário, fazenda, insumo)"""
+        n_f, n_i = len(self.fazendas), len(self.insumos)
+        litros = self._agregar(self.demanda(cenarios), self.grupo_fazenda * n_i + self.grupo_insumo, n_f * n_i)
+        # Número de cenários explícito: sem talhões (n_f = n_i = 0) o -1 seria ambíguo
+        return litros.reshape(len(cenarios) + 1, n_f, n_i)
+
+    @staticmethod
+    def _embalagens(litros: np.ndarray, embalagem_litros: float) -> np.ndarray:
+        # Cada fazenda compra embalagens inteiras (tolerância para o erro de ponto flutuante)
+        return np.ceil(litros / embalagem_litros - 1e-9).astype(np.int64)
+
+    def compras(self, cenarios: Sequence[dict] = (), embalagem_litros: Optional[float] = None) -> pd.DataFrame:
+        """Litros (e embalagens) por fazenda e insumo, em formato longo (fazenda, cenário, insumo)"""
+        litros = self.litros_por_fazenda(cenarios)
+        cenario, fazenda, insumo = np.nonzero(litros)
+        tabela = pd.DataFrame({
+            'Fazenda': pd.Categorical.from_codes(fazenda, categories=self.fazendas),
+            'Cenario': pd.Categorical.from_codes(cenario, categories=self.nomes_cenarios(cenarios)),
+            'Insumo': pd.Categorical.from_codes(insumo, categories=self.insumos),
+            'Litros': litros[cenario, fazenda, insumo]
+        })
+        if embalagem_litros:
+            tabela['Embalagens'] = self._embalagens(tabela['Litros'].to_numpy(), embalagem_litros)
+        return tabela
+
+    def resumo_compras(self, cenarios: Sequence[dict] = (), embalagem_litros: Optional[float] = None) -> pd.DataFrame:
+        """Totais da cooperativa por cenário e insumo (litros, fazendas que compram e embalagens)"""
+        litros = self.litros_por_fazenda(cenarios)
+        indice = pd.MultiIndex.from_product([self.nomes_cenarios(cenarios), self.insumos], names=['Cenario', 'Insumo'])
+        tabela = pd.DataFrame({
+            'Litros': litros.sum(axis=1).ravel(),
+            'Fazendas': np.count_nonzero(litros, axis=1).ravel()
+        }, index=indice)
+        if embalagem_litros:
+            tabela['Embalagens'] = self._embalagens(litros, embalagem_litros).sum(axis=1).ravel()
+        return tabela[tabela['Fazendas'] > 0].reset_index()
+
+
+def gerar_cooperativa(caminho, fazendas: int, talhoes_max: int = 8, semente: int = 42) -> int:
+    """CSV sintético da cooperativa (coluna Fazenda + colunas da exportação); retorna o número de linhas"""
+    rng = np.random.default_rng(semente)
+    tabela = tabela_padrao()
+    culturas = {'Café': 'cafe', 'Soja': 'soja'}
+
+    talhoes_por_fazenda = rng.integers(1, talhoes_max + 1, fazendas)
+    n_talhoes = int(talhoes_por_fazenda.sum())
+    fazenda = np.repeat(np.arange(1, fazendas + 1), talhoes_por_fazenda)
+    cultura = rng.integers(0, len(culturas), n_talhoes)
+    ruas = rng.integers(5, 51, n_talhoes)
+    comprimento = np.round(rng.uniform(10, 100, n_talhoes), 2)
+
+    partes = []
+    for c, (nome, referencia) in enumerate(culturas.items()):
+        talhoes = np.flatnonzero(cultura == c)
+        for variavel in tabela.variaveis_da_cultura(referencia, 'dose_'):
+            dose_min, dose_max = tabela.faixa(referencia, variavel)
+            usados = talhoes[rng.random(len(talhoes)) < 0.75]   # Nem todo talhão usa todos os insumos
+            partes.append(pd.DataFrame({
+                'talhao': usados,
+                'Fazenda': np.char.add('fazenda_', fazenda[usados].astype(str)),
+                'Cultura': nome,
+                'Area': np.round(ruas[usados] * comprimento[usados] * 3.0, 2),   # Espaçamento de 3 m entre ruas
+                'Numero_Ruas': ruas[usados],
+                'Comprimento_Rua': comprimento[usados],
+                'Insumo': NOMES_INSUMOS[variavel],
+                'Quantidade': np.round(rng.uniform(dose_min, dose_max, len(usados)), 2)
+            }))
+
+    dados = pd.concat(partes).sort_values(['talhao', 'Insumo'], kind='stable').drop(columns='talhao')
+    dados.to_csv(caminho, index=False, encoding='utf-8')
+    return len(dados)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Planejamento da demanda de insumos')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    planejar_parser = subparsers.add_parser('planejar', help='Demanda de insumos e cenários')
+    planejar_parser.add_argument('fontes', type=Path, nargs='+',
+                                 help='CSVs da cooperativa ou um diretório de exportações (usa a mais recente)')
+    planejar_parser.add_argument('--cenarios', type=Path, default=None, help='JSON com os cenários')
+    planejar_parser.add_argument('--embalagem', type=float, default=None, help='Litros por embalagem')
+    planejar_parser.add_argument('--workers', type=int, default=4, help='Arquivos lidos em paralelo')
+    planejar_parser.add_argument('--saida', type=Path, default=None, help='CSV com as compras por fazenda')
+
+    gerar_parser = subparsers.add_parser('gerar', help='Gerar uma cooperativa sintética')
+    gerar_parser.add_argument('csv', type=Path)
+    gerar_parser.add_argument('--fazendas', type=int, default=5000)
+    gerar_parser.add_argument('--semente', type=int, default=42)
+
+    args = parser.parse_args()
+
+    if args.comando == 'gerar':
+        linhas = gerar_cooperativa(args.csv, args.fazendas, semente=args.semente)
+        print(f"Cooperativa sintética salva em: {args.csv} ({args.fazendas:,} fazendas, {linhas:,} linhas)")
+        return
+
+    inicio = time.perf_counter()
+    talhoes = ler_talhoes(args.fontes, args.workers)
+    leitura = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    cenarios = carregar_cenarios(args.cenarios)
+    planejador = PlanejadorInsumos(talhoes)
+    por_cultura = planejador.por_cultura_insumo(cenarios)
+    resumo = planejador.resumo_compras(cenarios, args.embalagem)
+    calculo = time.perf_counter() - inicio
+
+    print(f"{len(planejador.fazendas):,} fazenda(s), {planejador.n_talhoes_insumo:,} linhas talhão × insumo, "
+          f"{len(cenarios) + 1} cenário(s): leitura {leitura:.2f}s, cálculo {calculo:.2f}s")
+    print("\nDemanda por cultura e insumo (L):")
+    print(por_cultura.round(1).to_string())
+    print("\nCompra da cooperativa por cenário:")
+    print(resumo.round(1).to_string(index=False))
+
+    if args.saida:
+        planejador.compras(cenarios, args.embalagem).to_csv(args.saida, index=False)
+        print(f"\nCompras por fazenda salvas em: {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,28 +1,14 @@
 import json
 from datetime import datetime
 import os
+import sys
+from pathlib import Path
 
-# Dicionário com as faixas ideais para cada cultura
-FAIXAS_IDEAIS = {
-    'milho': {
-        'umidade': {'min': 20, 'max': 30},
-        'ph': {'min': 5.5, 'max': 6.5},
-        'fosforo': {'min': 10, 'max': 20},
-        'potassio': {'min': 20, 'max': 40}
-    },
-    'soja': {
-        'umidade': {'min': 25, 'max': 35},
-        'ph': {'min': 6.0, 'max': 7.0},
-        'fosforo': {'min': 15, 'max': 25},
-        'potassio': {'min': 25, 'max': 45}
-    },
-    'cana': {
-        'umidade': {'min': 30, 'max': 40},
-        'ph': {'min': 5.0, 'max': 6.0},
-        'fosforo': {'min': 20, 'max': 30},
-        'potassio': {'min': 30, 'max': 50}
-    }
-}
+# Faixas ideais por cultura: tabela compartilhada em comum/faixas_ideais.json
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from comum.faixas import ABAIXO, ACIMA, tabela_padrao
+
+VARIAVEIS_SOLO = ['umidade', 'ph', 'fosforo', 'potassio']
 
 def validar_dados(valor, tipo, min_valor, max_valor):
     """
@@ -43,11 +29,12 @@ def coletar_dados_solo():
     print("\n=== Coleta de Dados do Solo ===")
     
     # Coletar cultura
+    culturas = tabela_padrao().culturas_com(VARIAVEIS_SOLO)
     while True:
-        cultura = input("Digite a cultura (milho/soja/cana): ").lower()
-        if cultura in FAIXAS_IDEAIS:
+        cultura = input(f"Digite a cultura ({'/'.join(culturas)}): ").lower()
+        if cultura in culturas:
             break
-        print("Cultura inválida. Escolha entre milho, soja ou cana.")
+        print(f"Cultura inválida. Escolha entre {', '.join(culturas[:-1])} ou {culturas[-1]}.")
     
     # Coletar e validar umidade
     while True:
@@ -99,31 +86,34 @@ def analisar_dados(dados):
     Analisa os dados do solo e gera recomendações.
     """
     cultura = dados['cultura']
-    faixas = FAIXAS_IDEAIS[cultura]
+    tabela = tabela_padrao()  # Recarrega se o arquivo de faixas foi alterado
+    situacao = tabela.classificar_leitura(cultura, {v: dados[v] for v in VARIAVEIS_SOLO})
+    umidade_min, _ = tabela.faixa(cultura, 'umidade')
+    ph_min, ph_max = tabela.faixa(cultura, 'ph')
     recomendacoes = []
     
     # Análise de umidade
-    if dados['umidade'] < faixas['umidade']['min']:
-        recomendacoes.append(f"Aplicar {(faixas['umidade']['min'] - dados['umidade']) * 0.1:.1f} litros de água por m²")
-    elif dados['umidade'] > faixas['umidade']['max']:
+    if situacao['umidade'] == ABAIXO:
+        recomendacoes.append(f"Aplicar {(umidade_min - dados['umidade']) * 0.1:.1f} litros de água por m²")
+    elif situacao['umidade'] == ACIMA:
         recomendacoes.append("Reduzir irrigação - solo muito úmido")
     
     # Análise de pH
-    if dados['ph'] < faixas['ph']['min']:
-        recomendacoes.append(f"Adicionar calcário (pH ideal: {faixas['ph']['min']:.1f})")
-    elif dados['ph'] > faixas['ph']['max']:
-        recomendacoes.append(f"Adicionar enxofre (pH ideal: {faixas['ph']['max']:.1f})")
+    if situacao['ph'] == ABAIXO:
+        recomendacoes.append(f"Adicionar calcário (pH ideal: {ph_min:.1f})")
+    elif situacao['ph'] == ACIMA:
+        recomendacoes.append(f"Adicionar enxofre (pH ideal: {ph_max:.1f})")
     
     # Análise de fósforo
-    if dados['fosforo'] < faixas['fosforo']['min']:
+    if situacao['fosforo'] == ABAIXO:
         recomendacoes.append("Aplicar fertilizante com mais fósforo")
-    elif dados['fosforo'] > faixas['fosforo']['max']:
+    elif situacao['fosforo'] == ACIMA:
         recomendacoes.append("Reduzir aplicação de fósforo")
     
     # Análise de potássio
-    if dados['potassio'] < faixas['potassio']['min']:
+    if situacao['potassio'] == ABAIXO:
         recomendacoes.append("Aplicar fertilizante com mais potássio")
-    elif dados['potassio'] > faixas['potassio']['max']:
+    elif situacao['potassio'] == ACIMA:
         recomendacoes.append("Reduzir aplicação de potássio")
     
     if not recomendacoes:
@@ -0,0 +1,361 @@
+"""
+Classificação de propriedades e estatísticas regionais em escala de cadastro
+
+Versão em Python da análise de analise_agronegocio.r para arquivos com
+milhões de propriedades (Num_Bovinos, Area_ha, Regiao):
+
+- Classificacao derivada da área por binning vetorizado (np.searchsorted):
+  Pequeno < 1.000 ha <= Médio < 3.000 ha <= Grande, as faixas de
+  Dados_Agroneg_cio.csv
+- Estatísticas por região (contagem, média, desvio, CV, mínimo, máximo,
+  quartis e percentis 10/90) e distribuição das classes, acumuladas chunk a
+  chunk em agregados combináveis: a memória não depende do número de linhas
+- O arquivo é dividido em faixas de bytes processadas em paralelo; o
+  agregado de cada worker é combinado no final (combinar é associativo)
+
+Média e variância usam a combinação de Chan et al. Os quantis vêm de um
+histograma com buckets logarítmicos (mesmo layout em todos os agregados,
+então combinar é somar contagens), com erro relativo de no máximo
+ERRO_RELATIVO em relação ao quantil exato.
+
+Uso:
+    python agronegocio.py resumo Dados_Agroneg_cio.csv
+    python agronegocio.py gerar cadastro.csv --linhas 5000000
+    python agronegocio.py resumo cadastro.csv --workers 4 --saida resumo_regional.csv
+"""
+
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+CLASSES = ['Pequeno', 'Médio', 'Grande']
+LIMITES_AREA_HA = np.array([1000.0, 3000.0])   # Início de Médio e de Grande
+VARIAVEIS = ['Num_Bovinos', 'Area_ha']
+COLUNAS = ['Num_Bovinos', 'Area_ha', 'Regiao']
+REGIOES = ['Centro-Oeste', 'Nordeste', 'Norte', 'Sudeste', 'Sul']
+QUANTIS = [0.10, 0.25, 0.50, 0.75, 0.90]
+
+# Histograma logarítmico dos quantis: buckets de razão GAMMA entre VALOR_MINIMO e VALOR_MAXIMO
+ERRO_RELATIVO = 0.005
+GAMMA = (1 + ERRO_RELATIVO) / (1 - ERRO_RELATIVO)
+VALOR_MINIMO, VALOR_MAXIMO = 1e-2, 1e8
+_LOG_GAMMA = np.log(GAMMA)
+_PRIMEIRO_BUCKET = int(np.floor(np.log(VALOR_MINIMO) / _LOG_GAMMA))
+N_BUCKETS = int(np.ceil(np.log(VALOR_MAXIMO) / _LOG_GAMMA)) - _PRIMEIRO_BUCKET + 2  # + bucket do zero
+
+CHUNK_LINHAS = 1_000_000
+BYTES_POR_FAIXA = 64 * 1024 * 1024    # Cada worker lê no máximo isso por vez
+
+
+def classificar(area_ha) -> pd.Categorical:
+    """Classificacao das propriedades pela área (vetorizado)"""
+    codigos = np.searchsorted(LIMITES_AREA_HA, np.asarray(area_ha, dtype=np.float64), side='right')
+    return pd.Categorical.from_codes(codigos, categories=CLASSES)
+
+
+def _bucket(valores: np.ndarray) -> np.ndarray:
+    """Bucket do histograma: 0 para valores <= VALOR_MINIMO, depois um por fator GAMMA"""
+    positivos = np.maximum(valores, VALOR_MINIMO)
+    indice = np.ceil(np.log(positivos) / _LOG_GAMMA).astype(np.int64) - _PRIMEIRO_BUCKET
+    return np.where(valores > VALOR_MINIMO, np.clip(indice, 1, N_BUCKETS - 1), 0)
+
+
+def _valor_do_bucket(bucket: np.ndarray) -> np.ndarray:
+    """Valor representativo do bucket (erro relativo <= ERRO_RELATIVO para todo o intervalo)"""
+    return np.where(bucket > 0, 2 * GAMMA ** (bucket + _PRIMEIRO_BUCKET) / (GAMMA + 1), 0.0)
+
+
+class AgregadoRegional:
+    """
+    Estatísticas por região acumuladas por chunk e combináveis entre workers.
+
+    Todos os arrays têm uma linha por região (na ordem de self.regioes); a
+    variável é o segundo eixo (VARIAVEIS).
+    """
+
+    def __init__(self, regioes: Optional[List[str]] = None):
+        self.regioes = []
+        n_var = len(VARIAVEIS)
+        self.n = np.zeros(0, dtype=np.int64)
+        self.media = np.zeros((0, n_var))
+        self.m2 = np.zeros((0, n_var))
+        self.minimo = np.zeros((0, n_var))
+        self.maximo = np.zeros((0, n_var))
+        self.histograma = np.zeros((0, n_var, N_BUCKETS), dtype=np.int64)
+        self.classes = np.zeros((0, len(CLASSES)), dtype=np.int64)
+        self._incluir_regioes(regioes or REGIOES)
+
+    def _incluir_regioes(self, regioes: Iterable[str]) -> None:
+        novas = [r for r in dict.fromkeys(regioes) if r not in self.regioes]
+        if not novas:
+            return
+        k, n_var = len(novas), len(VARIAVEIS)
+        self.regioes += novas
+        self.n = np.concatenate([self.n, np.zeros(k, dtype=np.int64)])
+        self.media = np.vstack([self.media, np.zeros((k, n_var))])
+        self.m2 = np.vstack([self.m2, np.zeros((k, n_var))])
+        self.minimo = np.vstack([self.minimo, np.full((k, n_var), np.inf)])
+        self.maximo = np.vstack([self.maximo, np.full((k, n_var), -np.inf)])
+        self.histograma = np.concatenate([self.histograma, np.zeros((k, n_var, N_BUCKETS), dtype=np.int64)])
+        self.classes = np.vstack([self.classes, np.zeros((k, len(CLASSES)), dtype=np.int64)])
+
+    def _acumular(self, regioes: List[str], n, media, m2, minimo, maximo, histograma, classes) -> None:
+        """Combina estatísticas já agregadas (mesmo layout) nas regiões indicadas"""
+        self._incluir_regioes(regioes)
+        idx = np.array([self.regioes.index(r) for r in regioes], dtype=np.intp)
+
+        n_a, n_b = self.n[idx][:, None].astype(np.float64), np.asarray(n)[:, None].astype(np.float64)
+        total = n_a + n_b
+        peso_b = np.divide(n_b, total, out=np.zeros_like(total), where=total > 0)
+        delta = media - self.media[idx]
+        self.media[idx] = self.media[idx] + delta * peso_b
+        self.m2[idx] = self.m2[idx] + m2 + delta ** 2 * n_a * peso_b
+        self.n[idx] += np.asarray(n, dtype=np.int64)
+        self.minimo[idx] = np.minimum(self.minimo[idx], minimo)
+        self.maximo[idx] = np.maximum(self.maximo[idx], maximo)
+        self.histograma[idx] += histograma
+        self.classes[idx] += classes
+
+    def atualizar(self, chunk: pd.DataFrame) -> 'AgregadoRegional':
+        """Acumula um chunk de propriedades (Num_Bovinos, Area_ha, Regiao)"""
+        chunk = chunk.dropna(subset=COLUNAS)
+        if chunk.empty:
+            return self
+
+        codigos, regioes = pd.factorize(chunk['Regiao'])
+        k = len(regioes)
+        valores = chunk[VARIAVEIS].to_numpy(dtype=np.float64)
+
+        n = np.bincount(codigos, minlength=k)
+        soma = np.stack([np.bincount(codigos, weights=valores[:, j], minlength=k)
+                         for j in range(len(VARIAVEIS))], axis=1)
+        media = soma / n[:, None]
+        desvio = valores - media[codigos]
+        m2 = np.stack([np.bincount(codigos, weights=desvio[:, j] ** 2, minlength=k)
+                       for j in range(len(VARIAVEIS))], axis=1)
+
+        minimo = np.full((k, len(VARIAVEIS)), np.inf)
+        maximo = np.full((k, len(VARIAVEIS)), -np.inf)
+        np.minimum.at(minimo, codigos, valores)
+        np.maximum.at(maximo, codigos, valores)
+
+        # (região, variável, bucket) achatados em um único bincount
+        buckets = _bucket(valores)
+        chave = (codigos[:, None] * len(VARIAVEIS) + np.arange(len(VARIAVEIS))) * N_BUCKETS + buckets
+        histograma = np.bincount(chave.ravel(), minlength=k * len(VARIAVEIS) * N_BUCKETS)
+        histograma = histograma.reshape(k, len(VARIAVEIS), N_BUCKETS)
+
+        classe = classificar(valores[:, VARIAVEIS.index('Area_ha')]).codes
+        classes = np.bincount(codigos * len(CLASSES) + classe, minlength=k * len(CLASSES)).reshape(k, len(CLASSES))
+
+        self._acumular(list(regioes), n, media, m2, minimo, maximo, histograma, classes)
+        return self
+
+    def combinar(self, outro: 'AgregadoRegional') -> 'AgregadoRegional':
+        """Soma outro agregado a este (resultado igual ao de processar os dois conjuntos juntos)"""
+        self._acumular(outro.regioes, outro.n, outro.media, outro.m2, outro.minimo,
+                       outro.maximo, outro.histograma, outro.classes)
+        return self
+
+    def total(self) -> 'AgregadoRegional':
+        """Agregado nacional: todas as regiões combinadas em uma linha 'Brasil'"""
+        nacional = AgregadoRegional(regioes=['Brasil'])
+        for i in range(len(self.regioes)):
+            nacional._acumular(['Brasil'], self.n[i:i + 1], self.media[i:i + 1], self.m2[i:i + 1],
+                               self.minimo[i:i + 1], self.maximo[i:i + 1], self.histograma[i:i + 1],
+                               self.classes[i:i + 1])
+        return nacional
+
+    def quantis(self, probabilidades=QUANTIS) -> np.ndarray:
+        """Quantis aproximados (tipo 7 do R): array (região, variável, probabilidade)"""
+        resultado = np.full((len(self.regioes), len(VARIAVEIS), len(probabilidades)), np.nan)
+        # Só regiões com linhas: nas vazias mínimo/máximo são ±inf (sem valor a interpolar)
+        validas = self.n > 0
+        acumulado = np.cumsum(self.histograma[validas], axis=2)
+        minimo, maximo = self.minimo[validas], self.maximo[validas]
+
+        def estatistica_de_ordem(posicao: np.ndarray) -> np.ndarray:
+            bucket = (acumulado <= posicao[:, None, None]).sum(axis=2)
+            valor = _valor_do_bucket(np.minimum(bucket, N_BUCKETS - 1))
+            return np.clip(valor, minimo, maximo)
+
+        ultimo = self.n[validas] - 1
+        for p_idx, p in enumerate(probabilidades):
+            # Interpolação entre as estatísticas de ordem vizinhas, como quantile() no R
+            h = p * ultimo
+            abaixo = np.floor(h).astype(np.int64)
+            fracao = (h - abaixo)[:, None]
+            v_abaixo = estatistica_de_ordem(abaixo)
+            v_acima = estatistica_de_ordem(np.minimum(abaixo + 1, ultimo))
+            resultado[validas, :, p_idx] = v_abaixo + fracao * (v_acima - v_abaixo)
+        return resultado
+
+    def resumo(self) -> pd.DataFrame:
+        """Uma linha por região (mais a linha 'Brasil') com estatísticas e distribuição das classes"""
+        linhas = []
+        for agregado in (self, self.total()):
+            validas = agregado.n > 0
+            n = agregado.n.astype(np.float64)[:, None]
+            variancia = np.divide(agregado.m2, n - 1, out=np.full_like(agregado.m2, np.nan), where=n > 1)
+            quantis = agregado.quantis()
+            for i, regiao in enumerate(agregado.regioes):
+                if not validas[i]:
+                    continue
+                linha = {'Regiao': regiao, 'n': int(agregado.n[i])}
+                for j, variavel in enumerate(VARIAVEIS):
+                    desvio = np.sqrt(variancia[i, j])
+                    linha.update({
+                        f'{variavel}_media': agregado.media[i, j],
+                        f'{variavel}_desvio': desvio,
+                        f'{variavel}_cv_pct': desvio / agregado.media[i, j] * 100,
+                        f'{variavel}_min': agregado.minimo[i, j],
+                        **{f'{variavel}_p{int(p * 100):02d}': quantis[i, j, k] for k, p in enumerate(QUANTIS)},
+                        f'{variavel}_max': agregado.maximo[i, j]
+                    })
+                for c, classe in enumerate(CLASSES):
+                    linha[f'pct_{classe}'] = agregado.classes[i, c] / agregado.n[i] * 100
+                linhas.append(linha)
+        return pd.DataFrame(linhas)
+
+
+def faixas_de_bytes(caminho: Path, tamanho_faixa: int = BYTES_POR_FAIXA) -> List[tuple]:
+    """Divide o CSV (sem o cabeçalho) em faixas de bytes que terminam em quebra de linha"""
+    tamanho = caminho.stat().st_size
+    with open(caminho, 'rb') as f:
+        f.readline()
+        inicio = f.tell()
+        faixas = []
+        while inicio < tamanho:
+            f.seek(min(inicio + tamanho_faixa, tamanho))
+            f.readline()
+            fim = min(f.tell(), tamanho)
+            faixas.append((inicio, fim))
+            inicio = fim
+    return faixas
+
+
+def _cabecalho(caminho: Path) -> List[str]:
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return f.readline().strip().split(',')
+
+
+def agregar_faixa(caminho: str, inicio: int, fim: int, chunksize: int = CHUNK_LINHAS) -> AgregadoRegional:
+    """Agrega uma faixa de bytes do CSV (executado em um worker)"""
+    caminho = Path(caminho)
+    colunas = _cabecalho(caminho)
+    with open(caminho, 'rb') as f:
+        f.seek(inicio)
+        dados = io.BytesIO(f.read(fim - inicio))
+
+    agregado = AgregadoRegional()
+    leitor = pd.read_csv(dados, header=None, names=colunas, usecols=COLUNAS, chunksize=chunksize,
+                         dtype={'Num_Bovinos': np.float64, 'Area_ha': np.float64, 'Regiao': 'category'})
+    for chunk in leitor:
+        agregado.atualizar(chunk)
+    return agregado
+
+
+def agregar_csv(caminho, workers: Optional[int] = None, chunksize: int = CHUNK_LINHAS,
+                tamanho_faixa: int = BYTES_POR_FAIXA) -> AgregadoRegional:
+    """
+    Agrega um CSV de cadastro inteiro, com as faixas de bytes distribuídas entre workers.
+
+    Cada worker guarda apenas uma faixa (<= tamanho_faixa) e o próprio
+    agregado; com workers=1 tudo roda no processo atual.
+    """
+    caminho = Path(caminho)
+    faixas = faixas_de_bytes(caminho, tamanho_faixa)
+    workers = min(workers or os.cpu_count() or 1, max(1, len(faixas)))
+
+    agregado = AgregadoRegional()
+    if workers == 1:
+        for inicio, fim in faixas:
+            agregado.combinar(agregar_faixa(str(caminho), inicio, fim, chunksize))
+        return agregado
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = [executor.submit(agregar_faixa, str(caminho), inicio, fim, chunksize)
+                   for inicio, fim in faixas]
+        for futuro in futuros:
+            agregado.combinar(futuro.result())
+    return agregado
+
+
+def conferir_classificacao(caminho) -> tuple:
+    """(linhas, divergências) entre a Classificacao do arquivo e a derivada da área"""
+    df = pd.read_csv(caminho, usecols=['Area_ha', 'Classificacao'])
+    derivada = classificar(df['Area_ha']).astype(str)
+    return len(df), int((derivada != df['Classificacao'].astype(str)).sum())
+
+
+def gerar_cadastro(caminho, linhas: int, semente: int = 42, linhas_por_bloco: int = 1_000_000) -> None:
+    """Gera um cadastro sintético no formato de Dados_Agroneg_cio.csv, em blocos"""
+    rng = np.random.default_rng(semente)
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(COLUNAS + ['Classificacao']) + '\n')
+        for inicio in range(0, linhas, linhas_por_bloco):
+            n = min(linhas_por_bloco, linhas - inicio)
+            area = np.round(rng.uniform(100, 5000, n), 2)
+            bloco = pd.DataFrame({
+                'Num_Bovinos': rng.integers(50, 500, n),
+                'Area_ha': area,
+                'Regiao': np.asarray(REGIOES)[rng.integers(0, len(REGIOES), n)],
+                'Classificacao': classificar(area)
+            })
+            bloco.to_csv(f, header=False, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Classificação e estatísticas regionais do agronegócio')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    resumo_parser = subparsers.add_parser('resumo', help='Estatísticas por região de um CSV de cadastro')
+    resumo_parser.add_argument('csv', type=Path, help='CSV com Num_Bovinos, Area_ha e Regiao')
+    resumo_parser.add_argument('--workers', type=int, default=None,
+                               help='Processos paralelos (padrão: todos os núcleos)')
+    resumo_parser.add_argument('--chunksize', type=int, default=CHUNK_LINHAS,
+                               help='Linhas por chunk dentro de cada worker')
+    resumo_parser.add_argument('--saida', type=Path, default=None, help='CSV com o resumo regional')
+
+    gerar_parser = subparsers.add_parser('gerar', help='Gerar um cadastro sintético')
+    gerar_parser.add_argument('csv', type=Path, help='Arquivo de saída')
+    gerar_parser.add_argument('--linhas', type=int, default=1_000_000)
+    gerar_parser.add_argument('--semente', type=int, default=42)
+
+    args = parser.parse_args(argv)
+
+    if args.comando == 'gerar':
+        gerar_cadastro(args.csv, args.linhas, args.semente)
+        print(f"Cadastro sintético salvo em: {args.csv} ({args.linhas:,} propriedades)")
+        return
+
+    inicio = time.perf_counter()
+    agregado = agregar_csv(args.csv, workers=args.workers, chunksize=args.chunksize)
+    resumo = agregado.resumo()
+    duracao = time.perf_counter() - inicio
+
+    total = int(agregado.n.sum())
+    print(f"Propriedades processadas: {total:,} em {duracao:.2f}s ({total / max(duracao, 1e-9):,.0f} linhas/s)")
+    if 'Classificacao' in _cabecalho(args.csv) and args.csv.stat().st_size < BYTES_POR_FAIXA:
+        linhas, divergencias = conferir_classificacao(args.csv)
+        print(f"Classificacao conferida: {linhas - divergencias}/{linhas} iguais às faixas de área")
+
+    if resumo.empty:
+        print(f"Nenhuma propriedade em {args.csv}: resumo não gerado")
+    elif args.saida:
+        resumo.to_csv(args.saida, index=False)
+        print(f"Resumo salvo em: {args.saida}")
+    else:
+        with pd.option_context('display.width', 200, 'display.max_columns', None):
+            print(resumo.set_index('Regiao').T.round(2).to_string())
+
+
+if __name__ == '__main__':
+    main()
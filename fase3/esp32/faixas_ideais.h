@@ -0,0 +1,14 @@
+// Gerado por: python -m comum header (não editar manualmente)
+// Fonte: comum/faixas_ideais.json - cultura: milho
+#pragma once
+
+#define FAIXA_UMIDADE_AR_MIN 60.0f
+#define FAIXA_LDR_PH_MIN 1000.0f
+#define FAIXA_UMIDADE_MIN 20.0f
+#define FAIXA_UMIDADE_MAX 30.0f
+#define FAIXA_PH_MIN 5.5f
+#define FAIXA_PH_MAX 6.5f
+#define FAIXA_FOSFORO_MIN 10.0f
+#define FAIXA_FOSFORO_MAX 20.0f
+#define FAIXA_POTASSIO_MIN 20.0f
+#define FAIXA_POTASSIO_MAX 40.0f
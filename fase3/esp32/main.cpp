@@ -11,6 +11,7 @@
 
 #include <Arduino.h>
 #include <DHT.h>
+#include "faixas_ideais.h" // Gerado a partir de comum/faixas_ideais.json
 
 // Definições dos pinos (ajuste conforme o circuito)
 #define PIN_FOSFORO 12
@@ -21,7 +22,51 @@
 #define PIN_LED 2
 #define DHTTYPE DHT22
 
+// Formato de envio: 0 = texto legível no monitor serial, 1 = quadro binário de 16 bytes com CRC
+// (layout documentado em fase3/python/protocolo.py)
+#define FORMATO_BINARIO 0
+#define ID_DISPOSITIVO 1
+#define MARCADOR_QUADRO 0xA5
+#define UMIDADE_INVALIDA -32768
+
+struct __attribute__((packed)) QuadroLeitura {
+  uint8_t marcador;
+  uint8_t flags;        // bit0 fósforo, bit1 potássio, bit2 irrigação
+  uint16_t dispositivo;
+  uint16_t sequencia;
+  uint16_t ph;          // Leitura do LDR (0-4095)
+  int16_t umidade;      // Centésimos de %
+  uint32_t millis;
+  uint16_t crc;         // CRC-16/CCITT-FALSE dos bytes anteriores
+};
+static_assert(sizeof(QuadroLeitura) == 16, "Quadro deve ter 16 bytes");
+
 DHT dht(PIN_DHT, DHTTYPE);
+uint16_t sequencia = 0;
+
+uint16_t crc16(const uint8_t *dados, size_t tamanho) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < tamanho; i++) {
+    crc ^= (uint16_t)dados[i] << 8;
+    for (int bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+void enviarQuadro(bool fosforo, bool potassio, int ldrValue, float umidade, bool irrigar) {
+  QuadroLeitura quadro;
+  quadro.marcador = MARCADOR_QUADRO;
+  quadro.flags = (fosforo ? 0x01 : 0) | (potassio ? 0x02 : 0) | (irrigar ? 0x04 : 0);
+  quadro.dispositivo = ID_DISPOSITIVO;
+  quadro.sequencia = sequencia++;
+  quadro.ph = (uint16_t)ldrValue;
+  quadro.umidade = isnan(umidade) ? UMIDADE_INVALIDA : (int16_t)lroundf(umidade * 100);
+  quadro.millis = millis();
+  quadro.crc = crc16((const uint8_t *)&quadro, sizeof(quadro) - sizeof(quadro.crc));
+  Serial.write((const uint8_t *)&quadro, sizeof(quadro));
+}
 
 void setup() {
   Serial.begin(115200);
@@ -40,19 +85,24 @@ void loop() {
   int ldrValue = analogRead(PIN_LDR); // Simula pH
   float umidade = dht.readHumidity();
 
-  // Lógica de irrigação (exemplo: personalize conforme sua regra)
-  bool irrigar = (umidade < 60) && fosforo && potassio && (ldrValue > 1000);
+  // Lógica de irrigação: limites vêm da tabela compartilhada de faixas
+  // (regenerar o header com: python -m comum header --cultura milho --saida fase3/esp32/faixas_ideais.h)
+  bool irrigar = (umidade < FAIXA_UMIDADE_AR_MIN) && fosforo && potassio && (ldrValue > FAIXA_LDR_PH_MIN);
 
   // Controle do relé e LED
   digitalWrite(PIN_RELE, irrigar ? HIGH : LOW);
   digitalWrite(PIN_LED, irrigar ? HIGH : LOW);
 
   // Envio dos dados para o monitor serial
+#if FORMATO_BINARIO
+  enviarQuadro(fosforo, potassio, ldrValue, umidade, irrigar);
+#else
   Serial.print("Fosforo:"); Serial.print(fosforo);
   Serial.print(",Potassio:"); Serial.print(potassio);
   Serial.print(",pH:"); Serial.print(ldrValue);
   Serial.print(",Umidade:"); Serial.print(umidade);
   Serial.print(",Irrigacao:"); Serial.println(irrigar);
+#endif
 
   delay(2000); // Aguarda 2 segundos
 } 
\ No newline at end of file
@@ -1,36 +1,225 @@
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-# Conexão e criação da tabela
-conn = sqlite3.connect('sensores.db')
-c = conn.cursor()
-c.execute('''
+import pandas as pd
+
+# Particionamento: um arquivo SQLite por fazenda em DIRETORIO_PADRAO/<fazenda>.db
+# Dentro de cada fazenda, o índice (dispositivo, lido_em) atende as consultas
+# por dispositivo e período sem varrer a frota inteira.
+DIRETORIO_PADRAO = Path('fazendas')
+FAZENDA_PADRAO = 'fazenda_1'
+DISPOSITIVO_PADRAO = 'esp32_1'
+ZONA_PADRAO = 'zona_1'
+ARQUIVO_LEGADO = 'sensores.db'  # Banco da versão de um único ESP32
+
+SCHEMA = '''
 CREATE TABLE IF NOT EXISTS leituras (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dispositivo TEXT NOT NULL DEFAULT 'esp32_1',
+    zona TEXT NOT NULL DEFAULT 'zona_1',
+    lido_em TEXT DEFAULT CURRENT_TIMESTAMP,
     fosforo INTEGER,
     potassio INTEGER,
     ph INTEGER,
     umidade REAL,
     irrigacao INTEGER
-)
-''')
-conn.commit()
+);
+'''
 
-def inserir_leitura(fosforo, potassio, ph, umidade, irrigacao):
-    c.execute('INSERT INTO leituras (fosforo, potassio, ph, umidade, irrigacao) VALUES (?, ?, ?, ?, ?)',
-              (fosforo, potassio, ph, umidade, irrigacao))
-    conn.commit()
+INDICES = '''
+CREATE INDEX IF NOT EXISTS idx_leituras_dispositivo_tempo ON leituras(dispositivo, lido_em);
+CREATE INDEX IF NOT EXISTS idx_leituras_zona_tempo ON leituras(zona, lido_em);
+'''
+
+
+def _migrar(conn):
+    """Adiciona as colunas de identidade em bancos criados com o esquema antigo"""
+    colunas = {linha[1] for linha in conn.execute('PRAGMA table_info(leituras)')}
+    if 'dispositivo' not in colunas:
+        conn.execute(f"ALTER TABLE leituras ADD COLUMN dispositivo TEXT NOT NULL DEFAULT '{DISPOSITIVO_PADRAO}'")
+    if 'zona' not in colunas:
+        conn.execute(f"ALTER TABLE leituras ADD COLUMN zona TEXT NOT NULL DEFAULT '{ZONA_PADRAO}'")
+    if 'lido_em' not in colunas:
+        conn.execute('ALTER TABLE leituras ADD COLUMN lido_em TEXT')
+
+
+class ArmazenamentoLeituras:
+    """Leituras de vários dispositivos, particionadas em um SQLite por fazenda"""
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO):
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self._conexoes = {}
+
+    def caminho(self, fazenda):
+        return self.diretorio / f'{fazenda}.db'
+
+    def conexao(self, fazenda=FAZENDA_PADRAO):
+        """Conexão de escrita da fazenda (criada e migrada no primeiro uso)"""
+        if fazenda not in self._conexoes:
+            conn = sqlite3.connect(self.caminho(fazenda))
+            conn.execute('PRAGMA journal_mode=WAL')  # Leitores paralelos não bloqueiam a escrita
+            conn.executescript(SCHEMA)
+            _migrar(conn)
+            conn.executescript(INDICES)
+            conn.commit()
+            self._conexoes[fazenda] = conn
+        return self._conexoes[fazenda]
+
+    def fazendas(self):
+        return sorted(p.stem for p in self.diretorio.glob('*.db'))
+
+    def fechar(self):
+        for conn in self._conexoes.values():
+            conn.close()
+        self._conexoes = {}
+
+    def inserir_leitura(self, fosforo, potassio, ph, umidade, irrigacao,
+                        dispositivo=DISPOSITIVO_PADRAO, zona=ZONA_PADRAO, fazenda=FAZENDA_PADRAO):
+        conn = self.conexao(fazenda)
+        conn.execute('''INSERT INTO leituras (dispositivo, zona, fosforo, potassio, ph, umidade, irrigacao)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                     (dispositivo, zona, fosforo, potassio, ph, umidade, irrigacao))
+        conn.commit()
+
+    def inserir_lote(self, leituras: pd.DataFrame):
+        """Grava um lote (colunas de leituras + fazenda) com uma transação por fazenda"""
+        colunas = ['dispositivo', 'zona', 'lido_em', 'fosforo', 'potassio', 'ph', 'umidade', 'irrigacao']
+        for fazenda, grupo in leituras.groupby('fazenda'):
+            conn = self.conexao(fazenda)
+            presentes = [c for c in colunas if c in grupo.columns]
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO leituras ({', '.join(presentes)}) VALUES ({', '.join('?' * len(presentes))})",
+                    grupo[presentes].itertuples(index=False, name=None))
+
+    def dispositivos(self, fazenda):
+        """Dispositivos da fazenda (lidos do índice, sem varrer a tabela)"""
+        linhas = self.conexao(fazenda).execute('SELECT DISTINCT dispositivo FROM leituras ORDER BY dispositivo')
+        return [linha[0] for linha in linhas]
+
+    def consultar_dispositivo(self, fazenda, dispositivo, inicio=None, fim=None, limite=None):
+        """Leituras de um dispositivo em ordem cronológica (usa o índice dispositivo + tempo)"""
+        sql = 'SELECT * FROM leituras WHERE dispositivo = ?'
+        params = [dispositivo]
+        if inicio is not None:
+            sql += ' AND lido_em >= ?'
+            params.append(inicio)
+        if fim is not None:
+            sql += ' AND lido_em < ?'
+            params.append(fim)
+        if limite is not None:
+            # Últimas N leituras, devolvidas em ordem cronológica
+            sql = f'SELECT * FROM ({sql} ORDER BY lido_em DESC, id DESC LIMIT ?) ORDER BY lido_em, id'
+            params.append(limite)
+        else:
+            sql += ' ORDER BY lido_em, id'
+        return pd.read_sql_query(sql, self.conexao(fazenda), params=params)
 
-def consultar_leituras():
-    c.execute('SELECT * FROM leituras')
-    return c.fetchall()
+    def _consultar_particao(self, fazenda, sql, params):
+        # Conexão própria por thread, somente leitura
+        conn = sqlite3.connect(f'file:{self.caminho(fazenda)}?mode=ro', uri=True)
+        try:
+            resultado = pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+        resultado.insert(0, 'fazenda', fazenda)
+        return resultado
 
-def atualizar_leitura(id, fosforo, potassio, ph, umidade, irrigacao):
-    c.execute('''UPDATE leituras SET fosforo=?, potassio=?, ph=?, umidade=?, irrigacao=? WHERE id=?''',
-              (fosforo, potassio, ph, umidade, irrigacao, id))
+    def consultar_frota(self, sql, params=(), fazendas=None, max_workers=8):
+        """
+        Executa a mesma consulta em todas as fazendas em paralelo e junta os resultados.
+
+        Exemplo:
+            consultar_frota('SELECT dispositivo, AVG(umidade) AS umidade FROM leituras GROUP BY dispositivo')
+        """
+        fazendas = fazendas or self.fazendas()
+        for fazenda in fazendas:
+            self.conexao(fazenda)  # Garante esquema e índices antes das leituras paralelas
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            partes = list(executor.map(lambda f: self._consultar_particao(f, sql, params), fazendas))
+        return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+    def resumo_frota(self, desde=None):
+        """Última leitura, umidade média e % de irrigação por dispositivo de toda a frota"""
+        filtro, params = ('WHERE lido_em >= ?', (desde,)) if desde else ('', ())
+        return self.consultar_frota(f'''
+            SELECT dispositivo, zona, COUNT(*) AS leituras, MAX(lido_em) AS ultima_leitura,
+                   AVG(umidade) AS umidade_media, AVG(irrigacao) * 100 AS pct_irrigacao
+            FROM leituras {filtro}
+            GROUP BY dispositivo, zona
+        ''', params)
+
+    def importar_legado(self, caminho=ARQUIVO_LEGADO, fazenda=FAZENDA_PADRAO, intervalo=2.0):
+        """
+        Copia as leituras de um banco no formato antigo (um único ESP32) para a fazenda.
+
+        A ordem de `id` é mantida. O formato antigo não guarda o horário da leitura:
+        `lido_em` é copiado quando a origem tem a coluna e, nas leituras sem horário,
+        vira um horário sintético espaçado de `intervalo` segundos (ciclo do ESP32)
+        que termina na última modificação do arquivo de origem.
+        """
+        origem = sqlite3.connect(f'file:{caminho}?mode=ro', uri=True)  # Origem não é alterada
+        try:
+            colunas = {linha[1] for linha in origem.execute('PRAGMA table_info(leituras)')}
+            lido_em = 'lido_em' if 'lido_em' in colunas else 'NULL AS lido_em'
+            legado = pd.read_sql_query(
+                f'SELECT {lido_em}, fosforo, potassio, ph, umidade, irrigacao FROM leituras ORDER BY id', origem)
+        finally:
+            origem.close()
+
+        # Mesmo formato de CURRENT_TIMESTAMP (UTC), para comparar com as leituras novas
+        fim = pd.Timestamp(Path(caminho).stat().st_mtime, unit='s').floor('s')
+        passos = pd.to_timedelta((len(legado) - 1 - pd.RangeIndex(len(legado))) * intervalo, unit='s')
+        sintetico = (fim - passos).strftime('%Y-%m-%d %H:%M:%S')
+        legado['lido_em'] = legado['lido_em'].fillna(pd.Series(sintetico, index=legado.index))
+        legado['dispositivo'] = DISPOSITIVO_PADRAO
+        legado['zona'] = ZONA_PADRAO
+        legado['fazenda'] = fazenda
+        self.inserir_lote(legado)
+        return len(legado)
+
+    def importar_legado_se_vazia(self, caminho=ARQUIVO_LEGADO, fazenda=FAZENDA_PADRAO):
+        """
+        Migração automática: importa o banco antigo se ele existir e a fazenda
+        ainda não tiver leituras (só na primeira vez); retorna quantas leituras.
+        """
+        if not Path(caminho).exists():
+            return 0
+        if self.conexao(fazenda).execute('SELECT 1 FROM leituras LIMIT 1').fetchone():
+            return 0
+        return self.importar_legado(caminho, fazenda)
+
+
+# Operações CRUD da fazenda padrão (compatíveis com a versão de um único ESP32)
+_armazenamento = None
+
+
+def armazenamento():
+    global _armazenamento
+    if _armazenamento is None:
+        _armazenamento = ArmazenamentoLeituras()
+        _armazenamento.importar_legado_se_vazia()
+    return _armazenamento
+
+
+def inserir_leitura(fosforo, potassio, ph, umidade, irrigacao, dispositivo=DISPOSITIVO_PADRAO,
+                    zona=ZONA_PADRAO, fazenda=FAZENDA_PADRAO):
+    armazenamento().inserir_leitura(fosforo, potassio, ph, umidade, irrigacao, dispositivo, zona, fazenda)
+
+def consultar_leituras(fazenda=FAZENDA_PADRAO):
+    return armazenamento().conexao(fazenda).execute('SELECT * FROM leituras').fetchall()
+
+def atualizar_leitura(id, fosforo, potassio, ph, umidade, irrigacao, fazenda=FAZENDA_PADRAO):
+    conn = armazenamento().conexao(fazenda)
+    conn.execute('''UPDATE leituras SET fosforo=?, potassio=?, ph=?, umidade=?, irrigacao=? WHERE id=?''',
+                 (fosforo, potassio, ph, umidade, irrigacao, id))
     conn.commit()
 
-def remover_leitura(id):
-    c.execute('DELETE FROM leituras WHERE id=?', (id,))
+def remover_leitura(id, fazenda=FAZENDA_PADRAO):
+    conn = armazenamento().conexao(fazenda)
+    conn.execute('DELETE FROM leituras WHERE id=?', (id,))
     conn.commit()
 
 # Exemplo de uso
@@ -40,7 +229,8 @@ if __name__ == "__main__":
     atualizar_leitura(1, 0, 1, 1100, 65.0, 0)
     print(consultar_leituras())
     remover_leitura(1)
-    print(consultar_leituras()) 
+    print(consultar_leituras())
     inserir_leitura(1, 1, 1200, 55.0, 1)
-    inserir_leitura(0, 1, 1100, 65.0, 0)
-    inserir_leitura(1, 0, 1300, 45.0, 1)
\ No newline at end of file
+    inserir_leitura(0, 1, 1100, 65.0, 0, dispositivo='esp32_2', zona='zona_2')
+    inserir_leitura(1, 0, 1300, 45.0, 1, dispositivo='esp32_3', zona='zona_3', fazenda='fazenda_2')
+    print(armazenamento().resumo_frota())
@@ -0,0 +1,100 @@
+"""
+Benchmark: decodificação das leituras do ESP32 em texto vs quadros binários
+
+Gera N leituras aleatórias, codifica nos dois formatos e mede bytes por
+leitura e leituras/segundo na decodificação:
+- texto: split + conversão de cada campo (decodificar_texto)
+- binário: np.frombuffer em dtype estruturado + CRC vetorizado (decodificar_quadros)
+- binário + DataFrame: inclui a conversão para as colunas da tabela leituras
+
+Uso:
+    python benchmarks/bench_protocolo.py --rows 100000 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Permite executar como script a partir de fase3/python
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from protocolo import (FLAG_FOSFORO, FLAG_IRRIGACAO, FLAG_POTASSIO, MARCADOR, QUADRO_DTYPE,
+                       TAMANHO_QUADRO, _crc16_lote, decodificar_quadros, decodificar_texto,
+                       quadros_para_dataframe)
+
+
+def gerar_leituras(n: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'fosforo': rng.integers(0, 2, n), 'potassio': rng.integers(0, 2, n),
+        'ph': rng.integers(0, 4096, n), 'umidade': np.round(rng.uniform(20, 90, n), 2),
+        'irrigacao': rng.integers(0, 2, n)
+    })
+
+
+def codificar_texto(df: pd.DataFrame) -> list:
+    return [f"Fosforo:{f},Potassio:{k},pH:{p},Umidade:{u:.2f},Irrigacao:{i}"
+            for f, k, p, u, i in df.itertuples(index=False, name=None)]
+
+
+def codificar_binario(df: pd.DataFrame) -> bytes:
+    """Mesmo layout de codificar_quadro, montado de forma vetorizada para o benchmark"""
+    quadros = np.zeros(len(df), dtype=QUADRO_DTYPE)
+    quadros['marcador'] = MARCADOR
+    quadros['flags'] = (df['fosforo'] * FLAG_FOSFORO | df['potassio'] * FLAG_POTASSIO
+                        | df['irrigacao'] * FLAG_IRRIGACAO)
+    quadros['dispositivo'] = 1
+    quadros['sequencia'] = np.arange(len(df)) & 0xFFFF
+    quadros['ph'] = df['ph']
+    quadros['umidade'] = np.round(df['umidade'] * 100)
+    quadros['millis'] = np.arange(len(df)) * 2000
+    quadros['crc'] = _crc16_lote(quadros.view(np.uint8).reshape(-1, TAMANHO_QUADRO))
+    return quadros.tobytes()
+
+
+def cronometrar(fn, repeticoes: int = 3):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = fn()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return resultado, melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do protocolo texto vs binário')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    resultados = []
+    for n in args.rows:
+        df = gerar_leituras(n)
+        linhas = codificar_texto(df)
+        buffer = codificar_binario(df)
+
+        texto, t_texto = cronometrar(lambda: decodificar_texto(linhas))
+        (quadros, descartados), t_bin = cronometrar(lambda: decodificar_quadros(buffer))
+        tabela, t_tabela = cronometrar(lambda: quadros_para_dataframe(decodificar_quadros(buffer)[0]))
+
+        assert descartados == 0 and len(texto) == len(tabela) == n
+        assert np.allclose(texto['umidade'], tabela['umidade'])
+
+        bytes_texto = sum(len(linha) + 2 for linha in linhas) / n  # + \r\n do println
+        resultados += [
+            {'leituras': n, 'formato': 'texto', 'bytes/leitura': bytes_texto,
+             'segundos': t_texto, 'leituras/s': n / t_texto},
+            {'leituras': n, 'formato': 'binario', 'bytes/leitura': TAMANHO_QUADRO,
+             'segundos': t_bin, 'leituras/s': n / t_bin},
+            {'leituras': n, 'formato': 'binario + DataFrame', 'bytes/leitura': TAMANHO_QUADRO,
+             'segundos': t_tabela, 'leituras/s': n / t_tabela}
+        ]
+
+    print(pd.DataFrame(resultados).round(4).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
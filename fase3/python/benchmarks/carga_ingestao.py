@@ -0,0 +1,188 @@
+"""
+Gerador de carga do servidor de ingestão (servidor_ingestao.py)
+
+Abre N conexões keep-alive que enviam POST /leituras em sequência (cada
+conexão espera a resposta antes do próximo envio) durante um tempo fixo e
+mede requisições/s, leituras/s e as latências p50/p90/p99. Respostas 429
+(fila cheia) são contadas à parte e a conexão segue enviando.
+
+Com --embutido o servidor é iniciado em um subprocesso com um diretório
+temporário; ao final é encerrado (Ctrl+C, que grava a fila) e as linhas nos
+SQLite são conferidas com o total de leituras aceitas.
+
+Uso:
+    python benchmarks/carga_ingestao.py --embutido --conexoes 50 --duracao 10
+    python benchmarks/carga_ingestao.py --embutido --lote 100 --formato binario
+    python benchmarks/carga_ingestao.py --host 127.0.0.1 --porta 8080 --lote 10
+"""
+
+import argparse
+import asyncio
+import json
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+# Permite executar como script a partir de fase3/python
+PYTHON_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PYTHON_DIR))
+
+from protocolo import codificar_quadro
+
+CORPOS_DISTINTOS = 64    # Corpos pré-gerados (o custo de montar o JSON não entra na medida)
+
+
+def gerar_corpos(lote: int, formato: str, seed: int = 42) -> list:
+    """Pares (caminho, content-type, corpo) com leituras aleatórias de várias fazendas"""
+    rng = np.random.default_rng(seed)
+    corpos = []
+    for i in range(CORPOS_DISTINTOS):
+        fazenda, zona = f'fazenda_{i % 4 + 1}', f'zona_{i % 8 + 1}'
+        if formato == 'binario':
+            corpo = b''.join(codificar_quadro(int(rng.integers(1, 50)), j, rng.integers(0, 2), rng.integers(0, 2),
+                                              int(rng.integers(0, 4096)), float(np.round(rng.uniform(20, 90), 2)),
+                                              rng.integers(0, 2), j * 2000)
+                             for j in range(lote))
+            corpos.append((f'/leituras?fazenda={fazenda}&zona={zona}', 'application/octet-stream', corpo))
+            continue
+        leituras = [{'fazenda': fazenda, 'zona': zona, 'dispositivo': f'esp32_{int(rng.integers(1, 50))}',
+                     'fosforo': int(rng.integers(0, 2)), 'potassio': int(rng.integers(0, 2)),
+                     'ph': int(rng.integers(0, 4096)), 'umidade': float(np.round(rng.uniform(20, 90), 2)),
+                     'irrigacao': int(rng.integers(0, 2))} for _ in range(lote)]
+        corpo = json.dumps(leituras[0] if lote == 1 else leituras).encode('utf-8')
+        corpos.append(('/leituras', 'application/json', corpo))
+    return corpos
+
+
+def montar_requisicao(host: str, caminho: str, tipo: str, corpo: bytes) -> bytes:
+    return (f'POST {caminho} HTTP/1.1\r\nHost: {host}\r\nContent-Type: {tipo}\r\n'
+            f'Content-Length: {len(corpo)}\r\n\r\n').encode('latin-1') + corpo
+
+
+async def ler_resposta(reader: asyncio.StreamReader) -> int:
+    """Status da resposta (o corpo é lido e descartado)"""
+    cabecalho = await reader.readuntil(b'\r\n\r\n')
+    linhas = cabecalho.decode('latin-1').split('\r\n')
+    status = int(linhas[0].split(' ', 2)[1])
+    tamanho = next((int(l.split(':', 1)[1]) for l in linhas[1:] if l.lower().startswith('content-length:')), 0)
+    await reader.readexactly(tamanho)
+    return status
+
+
+async def cliente(host: str, porta: int, requisicoes: list, lote: int, fim: float,
+                  latencias: list, status: Counter, deslocamento: int) -> None:
+    reader, writer = await asyncio.open_connection(host, porta)
+    try:
+        i = deslocamento
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            writer.write(requisicoes[i % len(requisicoes)])
+            await writer.drain()
+            codigo = await ler_resposta(reader)
+            latencias.append(time.perf_counter() - inicio)
+            status[codigo] += 1
+            i += 1
+    finally:
+        writer.close()
+
+
+async def gerar_carga(host: str, porta: int, conexoes: int, duracao: float, lote: int, formato: str) -> dict:
+    requisicoes = [montar_requisicao(host, *corpo) for corpo in gerar_corpos(lote, formato)]
+    latencias, status = [], Counter()
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(host, porta, requisicoes, lote, inicio + duracao, latencias, status, c)
+                           for c in range(conexoes)))
+    decorrido = time.perf_counter() - inicio
+
+    ms = np.asarray(latencias) * 1000
+    return {
+        'requisicoes': len(latencias),
+        'req/s': len(latencias) / decorrido,
+        'leituras/s aceitas': status[202] * lote / decorrido,
+        'p50 ms': np.percentile(ms, 50),
+        'p90 ms': np.percentile(ms, 90),
+        'p99 ms': np.percentile(ms, 99),
+        'max ms': ms.max(),
+        'status': dict(sorted(status.items())),
+        'leituras aceitas': status[202] * lote
+    }
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def aguardar_porta(host: str, porta: int, limite: float = 10.0) -> None:
+    prazo = time.time() + limite
+    while time.time() < prazo:
+        try:
+            socket.create_connection((host, porta), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Servidor não respondeu em {host}:{porta}")
+
+
+def contar_gravadas(diretorio: Path) -> int:
+    total = 0
+    for banco in diretorio.glob('*.db'):
+        with sqlite3.connect(banco) as conn:
+            total += conn.execute('SELECT COUNT(*) FROM leituras').fetchone()[0]
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gerador de carga do servidor de ingestão')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8080)
+    parser.add_argument('--conexoes', type=int, default=50, help='Conexões keep-alive simultâneas')
+    parser.add_argument('--duracao', type=float, default=10.0, help='Segundos de carga')
+    parser.add_argument('--lote', type=int, default=1, help='Leituras por requisição')
+    parser.add_argument('--formato', choices=['json', 'binario'], default='json')
+    parser.add_argument('--embutido', action='store_true',
+                        help='Inicia o servidor em um subprocesso com um diretório temporário')
+    parser.add_argument('--capacidade', type=int, default=None, help='Capacidade da fila (--embutido)')
+    args = parser.parse_args()
+
+    servidor, temporario = None, None
+    if args.embutido:
+        temporario = tempfile.TemporaryDirectory()
+        args.porta = porta_livre()
+        comando = [sys.executable, str(PYTHON_DIR / 'servidor_ingestao.py'), '--host', args.host,
+                   '--porta', str(args.porta), '--diretorio', temporario.name]
+        if args.capacidade:
+            comando += ['--capacidade', str(args.capacidade)]
+        servidor = subprocess.Popen(comando, cwd=PYTHON_DIR)
+        aguardar_porta(args.host, args.porta)
+
+    try:
+        resultado = asyncio.run(gerar_carga(args.host, args.porta, args.conexoes, args.duracao,
+                                            args.lote, args.formato))
+    finally:
+        if servidor is not None:
+            servidor.send_signal(signal.SIGINT)
+            servidor.wait(timeout=60)
+
+    print(f"\n{args.conexoes} conexões, {args.lote} leitura(s)/requisição ({args.formato}), {args.duracao:.0f}s")
+    for chave, valor in resultado.items():
+        print(f"{chave:>20}: {valor:,.1f}" if isinstance(valor, float) else f"{chave:>20}: {valor}")
+
+    if temporario is not None:
+        gravadas = contar_gravadas(Path(temporario.name))
+        situacao = '✅' if gravadas == resultado['leituras aceitas'] else '❌'
+        print(f"{situacao} Leituras nos bancos: {gravadas:,} (aceitas: {resultado['leituras aceitas']:,})")
+        temporario.cleanup()
+
+
+if __name__ == '__main__':
+    main()
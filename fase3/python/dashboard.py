@@ -1,40 +1,59 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
 import altair as alt
 
-# Conectar ao banco de dados
-conn = sqlite3.connect('sensores.db')
-df = pd.read_sql_query('SELECT * FROM leituras', conn)
+from banco import ARQUIVO_LEGADO, FAZENDA_PADRAO, ArmazenamentoLeituras
+
+# Leituras particionadas por fazenda (um SQLite por fazenda)
+armazenamento = ArmazenamentoLeituras()
+importadas = armazenamento.importar_legado_se_vazia()
+if importadas:
+    st.info(f'{importadas} leituras de {ARQUIVO_LEGADO} importadas para a fazenda {FAZENDA_PADRAO}.')
 
 st.title('Dashboard do Sistema de Irrigação Inteligente')
 
-if df.empty:
-    st.warning('Nenhum dado encontrado no banco. Execute o script de coleta ou insira dados de exemplo.')
-else:
-    st.subheader('Tabela de Leituras')
-    st.dataframe(df)
-
-    st.subheader('Gráfico de Umidade do Solo')
-    chart_umidade = alt.Chart(df).mark_line(point=True).encode(
-        x='id',
-        y='umidade',
-        tooltip=['id', 'umidade']
-    ).properties(width=600)
-    st.altair_chart(chart_umidade, use_container_width=True)
-
-    st.subheader('Gráfico de pH (LDR)')
-    chart_ph = alt.Chart(df).mark_line(point=True, color='orange').encode(
-        x='id',
-        y='ph',
-        tooltip=['id', 'ph']
-    ).properties(width=600)
-    st.altair_chart(chart_ph, use_container_width=True)
-
-    st.subheader('Presença de Nutrientes (Fósforo e Potássio)')
-    st.bar_chart(df[['fosforo', 'potassio']])
-
-    st.subheader('Status da Bomba de Irrigação')
-    st.line_chart(df['irrigacao'])
-
-st.info('Atualize os dados rodando o script de coleta ou inserindo novos registros no banco.') 
\ No newline at end of file
+fazendas = armazenamento.fazendas()
+if not fazendas:
+    st.warning(f'Nenhum dado encontrado em {armazenamento.diretorio}/. Execute o script de coleta ou insira dados '
+               f'de exemplo ({ARQUIVO_LEGADO}, do formato antigo, é importado automaticamente se estiver nesta pasta).')
+    st.stop()
+
+fazenda = st.sidebar.selectbox('Fazenda', fazendas)
+dispositivos = armazenamento.dispositivos(fazenda)
+if not dispositivos:
+    st.warning('Nenhuma leitura registrada nesta fazenda.')
+    st.stop()
+dispositivo = st.sidebar.selectbox('Dispositivo', dispositivos)
+limite = st.sidebar.slider('Últimas leituras', min_value=50, max_value=5000, value=500, step=50)
+
+# Consulta de um único dispositivo: usa o índice (dispositivo, lido_em)
+df = armazenamento.consultar_dispositivo(fazenda, dispositivo, limite=limite)
+
+st.subheader(f'Tabela de Leituras - {dispositivo}')
+st.dataframe(df)
+
+st.subheader('Gráfico de Umidade do Solo')
+chart_umidade = alt.Chart(df).mark_line(point=True).encode(
+    x='id',
+    y='umidade',
+    tooltip=['id', 'lido_em', 'umidade']
+).properties(width=600)
+st.altair_chart(chart_umidade, use_container_width=True)
+
+st.subheader('Gráfico de pH (LDR)')
+chart_ph = alt.Chart(df).mark_line(point=True, color='orange').encode(
+    x='id',
+    y='ph',
+    tooltip=['id', 'lido_em', 'ph']
+).properties(width=600)
+st.altair_chart(chart_ph, use_container_width=True)
+
+st.subheader('Presença de Nutrientes (Fósforo e Potássio)')
+st.bar_chart(df[['fosforo', 'potassio']])
+
+st.subheader('Status da Bomba de Irrigação')
+st.line_chart(df['irrigacao'])
+
+with st.expander('Resumo da frota (todas as fazendas)'):
+    st.dataframe(armazenamento.resumo_frota())
+
+st.info('Atualize os dados rodando o script de coleta ou inserindo novos registros no banco.')
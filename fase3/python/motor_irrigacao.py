@@ -0,0 +1,290 @@
+"""
+Motor de decisão de irrigação no servidor
+
+Consome as leituras da tabela `leituras` à medida que chegam e decide o
+estado da bomba de cada zona com regras configuráveis:
+- Média móvel das últimas N leituras de umidade e pH (estado O(1) por sensor)
+- Histerese: liga abaixo de um limite e só desliga acima de outro
+- Debounce: a mudança precisa se confirmar em K leituras seguidas
+
+O modo replay reavalia todo o histórico em uma passada vetorizada (pandas),
+com o mesmo resultado do modo contínuo, para testar um conjunto de regras
+antes de levá-lo ao dispositivo.
+
+As leituras vêm do armazenamento por fazenda (banco.ArmazenamentoLeituras),
+uma série por dispositivo; --db lê um banco no formato antigo (um único ESP32).
+
+Uso:
+    python motor_irrigacao.py replay --fazenda fazenda_1 --dispositivo esp32_1 --regras regras.json
+    python motor_irrigacao.py seguir --fazenda fazenda_1 --dispositivo esp32_1
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from comum.faixas import tabela_padrao
+from banco import DIRETORIO_PADRAO, DISPOSITIVO_PADRAO, FAZENDA_PADRAO, ArmazenamentoLeituras
+
+ZONA_PADRAO = 'zona_1'  # Leituras sem zona (um único ESP32)
+
+
+@dataclass
+class RegraIrrigacao:
+    """Parâmetros da regra de irrigação"""
+    liga_abaixo: float = 60.0        # Umidade média abaixo da qual a bomba liga
+    desliga_acima: float = 65.0      # Umidade média acima da qual a bomba desliga
+    ph_minimo: float = 1000.0        # Leitura média do LDR (pH) exigida para irrigar
+    exige_fosforo: bool = True
+    exige_potassio: bool = True
+    janela: int = 3                  # Leituras na média móvel
+    debounce: int = 2                # Leituras seguidas para confirmar a mudança
+
+    def __post_init__(self):
+        if self.desliga_acima < self.liga_abaixo:
+            raise ValueError("desliga_acima deve ser maior ou igual a liga_abaixo (histerese)")
+        if self.janela < 1 or self.debounce < 1:
+            raise ValueError("janela e debounce devem ser >= 1")
+
+    @classmethod
+    def da_tabela(cls, cultura: str = 'milho', margem: float = 5.0, **kwargs) -> 'RegraIrrigacao':
+        """Regra com os limites do dispositivo vindos da tabela compartilhada de faixas"""
+        tabela = tabela_padrao()
+        umidade_min, _ = tabela.faixa(cultura, 'umidade_ar')
+        ldr_min, _ = tabela.faixa(cultura, 'ldr_ph')
+        return cls(liga_abaixo=umidade_min, desliga_acima=umidade_min + margem,
+                   ph_minimo=ldr_min, **kwargs)
+
+    @classmethod
+    def de_arquivo(cls, caminho) -> 'RegraIrrigacao':
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return cls(**json.load(f))
+
+
+class JanelaMovel:
+    """Média das últimas N leituras com atualização O(1)"""
+
+    def __init__(self, tamanho: int):
+        self.valores = deque(maxlen=tamanho)
+        self.soma = 0.0
+
+    def adicionar(self, valor: float) -> float:
+        if len(self.valores) == self.valores.maxlen:
+            self.soma -= self.valores[0]
+        self.valores.append(valor)
+        self.soma += valor
+        return self.soma / len(self.valores)
+
+
+@dataclass
+class EstadoZona:
+    umidade: JanelaMovel
+    ph: JanelaMovel
+    ligada: bool = False
+    pendentes: int = 0               # Leituras seguidas pedindo mudança
+
+
+@dataclass
+class ComandoBomba:
+    zona: str
+    leitura_id: int
+    ligar: bool
+    umidade_media: float
+
+
+class MotorIrrigacao:
+    """Avalia leituras de várias zonas e emite comandos de bomba quando o estado muda"""
+
+    def __init__(self, regra: RegraIrrigacao):
+        self.regra = regra
+        self.zonas: Dict[str, EstadoZona] = {}
+        self.ultimo_id = 0
+
+    def _estado(self, zona: str) -> EstadoZona:
+        if zona not in self.zonas:
+            self.zonas[zona] = EstadoZona(JanelaMovel(self.regra.janela), JanelaMovel(self.regra.janela))
+        return self.zonas[zona]
+
+    def avaliar(self, leitura: dict) -> Optional[ComandoBomba]:
+        """Processa uma leitura; retorna um comando se a bomba da zona mudar de estado"""
+        regra = self.regra
+        self.ultimo_id = max(self.ultimo_id, leitura['id'])
+        if leitura['umidade'] is None or np.isnan(leitura['umidade']):
+            return None  # Falha de leitura do DHT22: ignorada
+
+        estado = self._estado(leitura.get('zona') or ZONA_PADRAO)
+        umidade = estado.umidade.adicionar(leitura['umidade'])
+        ph = estado.ph.adicionar(leitura['ph'])
+        nutrientes = ((not regra.exige_fosforo or bool(leitura['fosforo']))
+                      and (not regra.exige_potassio or bool(leitura['potassio'])))
+
+        if estado.ligada:
+            deseja_ligada = not (umidade >= regra.desliga_acima or not nutrientes or ph <= regra.ph_minimo)
+        else:
+            deseja_ligada = umidade < regra.liga_abaixo and nutrientes and ph > regra.ph_minimo
+
+        if deseja_ligada == estado.ligada:
+            estado.pendentes = 0
+            return None
+
+        estado.pendentes += 1
+        if estado.pendentes < regra.debounce:
+            return None
+
+        estado.ligada = deseja_ligada
+        estado.pendentes = 0
+        return ComandoBomba(leitura.get('zona') or ZONA_PADRAO, leitura['id'], deseja_ligada, umidade)
+
+    def processar(self, leituras: Iterable[dict]) -> List[ComandoBomba]:
+        """Processa um lote de leituras (de qualquer zona) em ordem de chegada"""
+        comandos = []
+        for leitura in leituras:
+            comando = self.avaliar(leitura)
+            if comando is not None:
+                comandos.append(comando)
+        return comandos
+
+    def processar_novas(self, conn: sqlite3.Connection,
+                        dispositivo: Optional[str] = None) -> List[ComandoBomba]:
+        """Lê de `leituras` apenas os registros após o último id processado (de um dispositivo, se informado)"""
+        filtro, params = '', (self.ultimo_id,)
+        if dispositivo is not None:
+            filtro, params = 'AND dispositivo = ?', (self.ultimo_id, dispositivo)
+        conn.row_factory = sqlite3.Row
+        try:
+            linhas = conn.execute(f"""
+                SELECT id, {_coluna_zona(conn)} AS zona, fosforo, potassio, ph, umidade
+                FROM leituras WHERE id > ? {filtro} ORDER BY id
+            """, params).fetchall()
+        finally:
+            conn.row_factory = None
+        return self.processar(dict(linha) for linha in linhas)
+
+
+def _coluna_zona(conn: sqlite3.Connection) -> str:
+    colunas = {linha[1] for linha in conn.execute('PRAGMA table_info(leituras)')}
+    return 'zona' if 'zona' in colunas else f"'{ZONA_PADRAO}'"
+
+
+def _sequencia(condicao: pd.Series, zonas: pd.Series) -> pd.Series:
+    """Tamanho da sequência atual de valores True consecutivos, por zona"""
+    mudou = condicao != condicao.groupby(zonas).shift()
+    blocos = mudou.groupby(zonas).cumsum()
+    return condicao.groupby([zonas, blocos]).cumsum()
+
+
+def replay(leituras: pd.DataFrame, regra: RegraIrrigacao) -> pd.DataFrame:
+    """
+    Reavalia o histórico inteiro de uma vez (equivalente ao modo contínuo).
+
+    A histerese vira um forward-fill dos sinais de ligar/desligar e o
+    debounce exige sequências de K sinais consecutivos antes de valer.
+
+    Returns:
+        Leituras com umidade_media, ph_medio e bomba (estado decidido)
+    """
+    df = leituras.dropna(subset=['umidade']).sort_values('id').copy()
+    if 'zona' not in df.columns:
+        df['zona'] = ZONA_PADRAO
+    df['zona'] = df['zona'].fillna(ZONA_PADRAO)
+
+    por_zona = df.groupby('zona', sort=False)
+    df['umidade_media'] = por_zona['umidade'].transform(
+        lambda s: s.rolling(regra.janela, min_periods=1).mean())
+    df['ph_medio'] = por_zona['ph'].transform(
+        lambda s: s.rolling(regra.janela, min_periods=1).mean())
+
+    nutrientes = pd.Series(True, index=df.index)
+    if regra.exige_fosforo:
+        nutrientes &= df['fosforo'].astype(bool)
+    if regra.exige_potassio:
+        nutrientes &= df['potassio'].astype(bool)
+
+    ph_ok = df['ph_medio'] > regra.ph_minimo
+    ligar = (df['umidade_media'] < regra.liga_abaixo) & nutrientes & ph_ok
+    desligar = (df['umidade_media'] >= regra.desliga_acima) | ~nutrientes | ~ph_ok
+
+    ligar &= _sequencia(ligar, df['zona']) >= regra.debounce
+    desligar &= _sequencia(desligar, df['zona']) >= regra.debounce
+
+    sinal = pd.Series(np.select([ligar, desligar], [1.0, 0.0], default=np.nan), index=df.index)
+    df['bomba'] = sinal.groupby(df['zona']).ffill().fillna(0).astype(int)
+    return df
+
+
+def comandos_do_replay(resultado: pd.DataFrame) -> pd.DataFrame:
+    """Leituras em que o estado da bomba mudou (comandos que seriam enviados)"""
+    anterior = resultado.groupby('zona')['bomba'].shift(fill_value=0)
+    mudou = resultado['bomba'] != anterior
+    return resultado.loc[mudou, ['zona', 'id', 'bomba', 'umidade_media']]
+
+
+def carregar_leituras(conn: sqlite3.Connection) -> pd.DataFrame:
+    """Todas as leituras de um banco no formato antigo (um único ESP32)"""
+    return pd.read_sql_query(f"""
+        SELECT id, {_coluna_zona(conn)} AS zona, fosforo, potassio, ph, umidade, irrigacao
+        FROM leituras ORDER BY id
+    """, conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Motor de decisão de irrigação')
+    parser.add_argument('modo', choices=['replay', 'seguir'])
+    parser.add_argument('--diretorio', default=str(DIRETORIO_PADRAO), help='Diretório com um SQLite por fazenda')
+    parser.add_argument('--fazenda', default=FAZENDA_PADRAO)
+    parser.add_argument('--dispositivo', default=DISPOSITIVO_PADRAO)
+    parser.add_argument('--db', default=None, help='Banco no formato antigo (sensores.db) em vez das fazendas')
+    parser.add_argument('--regras', default=None, help='JSON com os parâmetros de RegraIrrigacao')
+    parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos entre consultas (seguir)')
+    args = parser.parse_args()
+
+    regra = RegraIrrigacao.de_arquivo(args.regras) if args.regras else RegraIrrigacao.da_tabela()
+    print(f"Regra: {asdict(regra)}")
+    if args.db:
+        conn, dispositivo = sqlite3.connect(args.db), None
+    else:
+        armazenamento = ArmazenamentoLeituras(args.diretorio)
+        conn, dispositivo = armazenamento.conexao(args.fazenda), args.dispositivo
+        print(f"Fazenda: {args.fazenda} | Dispositivo: {dispositivo}")
+
+    try:
+        if args.modo == 'replay':
+            if dispositivo is None:
+                leituras = carregar_leituras(conn)
+            else:
+                leituras = armazenamento.consultar_dispositivo(args.fazenda, dispositivo)
+            if leituras.empty:
+                print("Nenhuma leitura encontrada")
+                return
+            resultado = replay(leituras, regra)
+            comandos = comandos_do_replay(resultado)
+            concordancia = (resultado['bomba'] == resultado['irrigacao']).mean() * 100
+            print(f"Leituras avaliadas: {len(resultado):,} em {resultado['zona'].nunique()} zona(s)")
+            print(f"Comandos de bomba: {len(comandos):,}")
+            print(f"Concordância com a decisão do dispositivo: {concordancia:.1f}%")
+        else:
+            motor = MotorIrrigacao(regra)
+            while True:
+                for comando in motor.processar_novas(conn, dispositivo):
+                    acao = 'LIGAR' if comando.ligar else 'DESLIGAR'
+                    print(f"[{comando.zona}] leitura {comando.leitura_id}: {acao} bomba "
+                          f"(umidade média {comando.umidade_media:.1f}%)")
+                time.sleep(args.intervalo)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
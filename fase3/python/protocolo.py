@@ -0,0 +1,152 @@
+"""
+Protocolo de envio das leituras do ESP32 (texto e binário)
+
+Texto (padrão do firmware, ~60 bytes por leitura):
+    Fosforo:1,Potassio:0,pH:1234,Umidade:55.20,Irrigacao:1
+
+Binário (FORMATO_BINARIO no firmware): quadro fixo de 16 bytes, little-endian
+    offset  tipo    campo
+    0       uint8   marcador (0xA5)
+    1       uint8   flags: bit0 fósforo, bit1 potássio, bit2 irrigação
+    2       uint16  id do dispositivo
+    4       uint16  sequência (detecta perdas)
+    6       uint16  pH (leitura do LDR, 0-4095)
+    8       int16   umidade em centésimos de % (-32768 = falha do DHT22)
+    10      uint32  millis() do ESP32
+    14      uint16  CRC-16/CCITT-FALSE dos bytes 0-13
+
+Um buffer com muitos quadros é decodificado com np.frombuffer em um dtype
+estruturado: as colunas são views do próprio buffer (sem cópia) e o CRC é
+verificado de forma vetorizada para todos os quadros.
+"""
+
+import struct
+from typing import Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+MARCADOR = 0xA5
+UMIDADE_INVALIDA = -32768
+
+FORMATO = struct.Struct('<BBHHHhIH')
+QUADRO_DTYPE = np.dtype([
+    ('marcador', '<u1'), ('flags', '<u1'), ('dispositivo', '<u2'), ('sequencia', '<u2'),
+    ('ph', '<u2'), ('umidade', '<i2'), ('millis', '<u4'), ('crc', '<u2')
+])
+TAMANHO_QUADRO = QUADRO_DTYPE.itemsize  # 16 bytes
+
+FLAG_FOSFORO, FLAG_POTASSIO, FLAG_IRRIGACAO = 0x01, 0x02, 0x04
+
+
+def _tabela_crc16() -> np.ndarray:
+    tabela = np.zeros(256, dtype=np.uint16)
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        tabela[byte] = crc & 0xFFFF
+    return tabela
+
+
+TABELA_CRC16 = _tabela_crc16()
+
+
+def crc16(dados: bytes) -> int:
+    """CRC-16/CCITT-FALSE (polinômio 0x1021, valor inicial 0xFFFF), igual ao firmware"""
+    crc = 0xFFFF
+    for byte in dados:
+        crc = ((crc << 8) & 0xFFFF) ^ int(TABELA_CRC16[((crc >> 8) ^ byte) & 0xFF])
+    return crc
+
+
+def _crc16_lote(bytes_quadros: np.ndarray) -> np.ndarray:
+    """CRC de N quadros de uma vez: um passo vetorizado por byte do quadro"""
+    crc = np.full(len(bytes_quadros), 0xFFFF, dtype=np.uint16)
+    for coluna in range(TAMANHO_QUADRO - 2):
+        indice = ((crc >> 8) ^ bytes_quadros[:, coluna]) & 0xFF
+        crc = (crc << 8) ^ TABELA_CRC16[indice]
+    return crc
+
+
+def codificar_quadro(dispositivo: int, sequencia: int, fosforo: bool, potassio: bool, ph: int,
+                     umidade: float, irrigacao: bool, millis: int) -> bytes:
+    """Monta um quadro binário (mesmo layout do firmware)"""
+    flags = (FLAG_FOSFORO * bool(fosforo)) | (FLAG_POTASSIO * bool(potassio)) | (FLAG_IRRIGACAO * bool(irrigacao))
+    umidade_centesimos = UMIDADE_INVALIDA if np.isnan(umidade) else int(round(umidade * 100))
+    corpo = FORMATO.pack(MARCADOR, flags, dispositivo & 0xFFFF, sequencia & 0xFFFF, ph,
+                         umidade_centesimos, millis & 0xFFFFFFFF, 0)[:-2]
+    return corpo + struct.pack('<H', crc16(corpo))
+
+
+def _localizar_quadros(buffer: np.ndarray) -> np.ndarray:
+    """Offsets de quadros válidos em um buffer desalinhado (ruído, bytes perdidos)"""
+    candidatos = np.flatnonzero(buffer[:len(buffer) - TAMANHO_QUADRO + 1] == MARCADOR)
+    if len(candidatos) == 0:
+        return candidatos
+    janelas = buffer[candidatos[:, None] + np.arange(TAMANHO_QUADRO)]
+    crc_lido = janelas[:, -2].astype(np.uint16) | (janelas[:, -1].astype(np.uint16) << 8)
+    validos = candidatos[_crc16_lote(janelas) == crc_lido]
+
+    # Quadros não se sobrepõem: descarta marcadores falsos dentro de um quadro aceito
+    offsets, proximo = [], 0
+    for offset in validos.tolist():
+        if offset >= proximo:
+            offsets.append(offset)
+            proximo = offset + TAMANHO_QUADRO
+    return np.asarray(offsets, dtype=np.intp)
+
+
+def decodificar_quadros(buffer) -> Tuple[np.ndarray, int]:
+    """
+    Decodifica um buffer com quadros binários consecutivos.
+
+    Caminho rápido: buffer alinhado e íntegro vira um array estruturado que
+    aponta para a memória do próprio buffer (zero cópia). Se houver quadros
+    corrompidos ou desalinhados, os válidos são localizados pelo marcador + CRC.
+
+    Returns:
+        (array estruturado com QUADRO_DTYPE, bytes descartados). Quadros
+        perdidos aparecem como lacunas no campo sequencia.
+    """
+    dados = np.frombuffer(buffer, dtype=np.uint8)
+    n_quadros = len(dados) // TAMANHO_QUADRO
+
+    if len(dados) % TAMANHO_QUADRO == 0:
+        bytes_quadros = dados.reshape(n_quadros, TAMANHO_QUADRO)
+        quadros = dados.view(QUADRO_DTYPE)
+        if np.all(quadros['marcador'] == MARCADOR) and np.array_equal(_crc16_lote(bytes_quadros), quadros['crc']):
+            return quadros, 0
+
+    offsets = _localizar_quadros(dados)
+    quadros = dados[offsets[:, None] + np.arange(TAMANHO_QUADRO)].reshape(-1).view(QUADRO_DTYPE)
+    return quadros, len(dados) - len(quadros) * TAMANHO_QUADRO
+
+
+def decodificar_texto(linhas: Iterable[str]) -> pd.DataFrame:
+    """Decodifica linhas no formato texto do monitor serial (linhas inválidas são ignoradas)"""
+    registros = []
+    for linha in linhas:
+        try:
+            campos = dict(par.split(':', 1) for par in linha.strip().split(','))
+            registros.append((int(campos['Fosforo']), int(campos['Potassio']), int(campos['pH']),
+                              float(campos['Umidade']), int(campos['Irrigacao'])))
+        except (KeyError, ValueError):
+            continue
+    return pd.DataFrame(registros, columns=['fosforo', 'potassio', 'ph', 'umidade', 'irrigacao'])
+
+
+def quadros_para_dataframe(quadros: np.ndarray) -> pd.DataFrame:
+    """Converte quadros decodificados para as colunas da tabela leituras"""
+    flags = quadros['flags']
+    umidade = quadros['umidade']
+    return pd.DataFrame({
+        'dispositivo': np.char.add('esp32_', quadros['dispositivo'].astype(str)),
+        'sequencia': quadros['sequencia'],
+        'fosforo': (flags & FLAG_FOSFORO).astype(bool).astype(int),
+        'potassio': (flags & FLAG_POTASSIO).astype(bool).astype(int),
+        'ph': quadros['ph'],
+        'umidade': np.where(umidade == UMIDADE_INVALIDA, np.nan, umidade / 100.0),
+        'irrigacao': (flags & FLAG_IRRIGACAO).astype(bool).astype(int),
+        'millis': quadros['millis']
+    })
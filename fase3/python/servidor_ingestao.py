@@ -0,0 +1,427 @@
+"""
+Servidor HTTP de ingestão das leituras dos controladores de irrigação
+
+Os controladores com Wi-Fi enviam leituras por POST; o servidor valida,
+enfileira e grava em lotes na tabela leituras (banco.ArmazenamentoLeituras):
+
+- POST /leituras
+    application/json: uma leitura (objeto) ou um lote (lista de objetos)
+        {"dispositivo": "esp32_7", "zona": "zona_2", "fazenda": "fazenda_1",
+         "fosforo": 1, "potassio": 0, "ph": 1234, "umidade": 55.2, "irrigacao": 1}
+    application/octet-stream: quadros binários de protocolo.py
+        (fazenda e zona na query string: /leituras?fazenda=fazenda_1&zona=zona_2)
+- GET /saude: ocupação da fila e contadores
+
+Respostas: 202 (aceito na fila), 400 (leitura inválida), 413 (corpo grande
+demais), 429 com Retry-After (fila cheia: o controlador guarda a leitura e
+tenta de novo depois) e 503 (servidor encerrando).
+
+A fila é limitada em número de leituras e esvaziada por um único escritor:
+cada transação grava tudo o que chegou enquanto a anterior era gravada
+(group commit). A gravação roda em uma thread dedicada, sem bloquear o
+event loop e sempre com a mesma conexão SQLite. 202 significa "na fila":
+ao encerrar (Ctrl+C) a fila é gravada antes de o banco ser fechado.
+
+Uso:
+    python servidor_ingestao.py --porta 8080 --diretorio fazendas
+    python benchmarks/carga_ingestao.py --embutido --conexoes 50 --duracao 10
+"""
+
+import argparse
+import asyncio
+import json
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from banco import DIRETORIO_PADRAO, DISPOSITIVO_PADRAO, FAZENDA_PADRAO, ZONA_PADRAO, ArmazenamentoLeituras
+from protocolo import decodificar_quadros, quadros_para_dataframe
+
+COLUNAS = ['fazenda', 'dispositivo', 'zona', 'lido_em', 'fosforo', 'potassio', 'ph', 'umidade', 'irrigacao']
+NOME_VALIDO = re.compile(r'^[A-Za-z0-9_-]{1,64}$')   # fazenda vira nome de arquivo (fazendas/<fazenda>.db)
+FORMATO_LIDO_EM = '%Y-%m-%d %H:%M:%S'                # Mesmo formato do CURRENT_TIMESTAMP do SQLite
+PH_MAXIMO = 4095                                     # Leitura do ADC de 12 bits (LDR)
+
+CAPACIDADE_FILA = 50_000          # Leituras aguardando gravação
+LOTE_MAXIMO = 5_000               # Leituras por transação
+LEITURAS_POR_REQUISICAO = 5_000
+CORPO_MAXIMO = 1024 * 1024        # Bytes
+TEMPO_OCIOSO = 30.0               # Segundos até fechar uma conexão keep-alive parada
+DESCARTE_MAXIMO = 16 * CORPO_MAXIMO  # Corpo recusado lido e descartado para o cliente receber o 413
+
+
+class LeituraInvalida(ValueError):
+    pass
+
+
+class ErroHttp(Exception):
+    """Erro de protocolo: a resposta é enviada e a conexão é fechada"""
+
+    def __init__(self, status: int, mensagem: str, descartar: int = 0):
+        super().__init__(mensagem)
+        self.status = status
+        self.descartar = descartar   # Bytes do corpo ainda não lidos
+
+
+def _agora() -> str:
+    return datetime.now(timezone.utc).strftime(FORMATO_LIDO_EM)
+
+
+def _nome(valor, campo: str) -> str:
+    if not isinstance(valor, str) or not NOME_VALIDO.match(valor):
+        raise LeituraInvalida(f"{campo} inválido: {valor!r}")
+    return valor
+
+
+def _lido_em(valor) -> str:
+    """Data/hora ISO 8601 normalizada para UTC no formato da tabela"""
+    if not isinstance(valor, str):
+        raise LeituraInvalida(f"lido_em inválido: {valor!r}")
+    try:
+        instante = datetime.fromisoformat(valor)
+    except ValueError:
+        raise LeituraInvalida(f"lido_em inválido: {valor!r}")
+    if instante.tzinfo is not None:
+        instante = instante.astimezone(timezone.utc)
+    return instante.strftime(FORMATO_LIDO_EM)
+
+
+def validar_leitura(leitura, recebido_em: str) -> tuple:
+    """Confere tipos e faixas de uma leitura JSON; devolve a linha na ordem de COLUNAS"""
+    if not isinstance(leitura, dict):
+        raise LeituraInvalida("cada leitura deve ser um objeto JSON")
+    try:
+        fosforo, potassio, irrigacao = leitura['fosforo'], leitura['potassio'], leitura['irrigacao']
+        ph, umidade = leitura['ph'], leitura['umidade']
+    except KeyError as e:
+        raise LeituraInvalida(f"campo obrigatório ausente: {e.args[0]}")
+
+    for campo, valor in (('fosforo', fosforo), ('potassio', potassio), ('irrigacao', irrigacao)):
+        if valor not in (0, 1):
+            raise LeituraInvalida(f"{campo} deve ser 0 ou 1: {valor!r}")
+    if type(ph) is not int or not 0 <= ph <= PH_MAXIMO:
+        raise LeituraInvalida(f"ph deve ser inteiro entre 0 e {PH_MAXIMO}: {ph!r}")
+    # umidade nula = falha do DHT22 (como UMIDADE_INVALIDA no quadro binário)
+    if umidade is not None and (type(umidade) not in (int, float) or not 0 <= umidade <= 100):
+        raise LeituraInvalida(f"umidade deve estar entre 0 e 100: {umidade!r}")
+
+    return (
+        _nome(leitura.get('fazenda', FAZENDA_PADRAO), 'fazenda'),
+        _nome(leitura.get('dispositivo', DISPOSITIVO_PADRAO), 'dispositivo'),
+        _nome(leitura.get('zona', ZONA_PADRAO), 'zona'),
+        _lido_em(leitura['lido_em']) if 'lido_em' in leitura else recebido_em,
+        int(fosforo), int(potassio), ph, umidade, int(irrigacao)
+    )
+
+
+def leituras_json(corpo: bytes) -> list:
+    """Linhas de um corpo JSON (objeto ou lista); o lote inteiro é recusado se uma leitura for inválida"""
+    try:
+        dados = json.loads(corpo)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise LeituraInvalida(f"JSON inválido: {e}")
+    if isinstance(dados, dict):
+        dados = [dados]
+    if not isinstance(dados, list) or not dados:
+        raise LeituraInvalida("esperado um objeto ou uma lista não vazia de leituras")
+    if len(dados) > LEITURAS_POR_REQUISICAO:
+        raise ErroHttp(413, f"no máximo {LEITURAS_POR_REQUISICAO} leituras por requisição")
+
+    recebido_em = _agora()
+    linhas = []
+    for i, leitura in enumerate(dados):
+        try:
+            linhas.append(validar_leitura(leitura, recebido_em))
+        except LeituraInvalida as e:
+            raise LeituraInvalida(f"leitura {i}: {e}")
+    return linhas
+
+
+def leituras_binarias(corpo: bytes, parametros: dict) -> tuple:
+    """(linhas, bytes descartados) de um corpo com quadros binários do protocolo"""
+    quadros, descartados = decodificar_quadros(corpo)
+    if len(quadros) == 0:
+        raise LeituraInvalida("nenhum quadro binário válido no corpo")
+    if len(quadros) > LEITURAS_POR_REQUISICAO:
+        raise ErroHttp(413, f"no máximo {LEITURAS_POR_REQUISICAO} leituras por requisição")
+
+    fazenda = _nome(parametros.get('fazenda', [FAZENDA_PADRAO])[0], 'fazenda')
+    zona = _nome(parametros.get('zona', [ZONA_PADRAO])[0], 'zona')
+    tabela = quadros_para_dataframe(quadros)
+    umidade = tabela['umidade'].astype(object).where(tabela['umidade'].notna(), None)
+    n = len(tabela)
+    linhas = list(zip([fazenda] * n, tabela['dispositivo'].tolist(), [zona] * n, [_agora()] * n,
+                      tabela['fosforo'].tolist(), tabela['potassio'].tolist(), tabela['ph'].tolist(),
+                      umidade.tolist(), tabela['irrigacao'].tolist()))
+    return linhas, descartados
+
+
+class FilaLeituras:
+    """Fila limitada em número de leituras; o lote de uma requisição entra inteiro ou é recusado"""
+
+    def __init__(self, capacidade: int = CAPACIDADE_FILA):
+        self.capacidade = capacidade
+        self.pendentes = 0
+        self._lotes = deque()
+        self._disponivel = asyncio.Event()
+        self._fechada = False
+
+    def oferecer(self, linhas: list) -> bool:
+        if self._fechada or self.pendentes + len(linhas) > self.capacidade:
+            return False
+        self._lotes.append(linhas)
+        self.pendentes += len(linhas)
+        self._disponivel.set()
+        return True
+
+    def fechar(self) -> None:
+        """Não aceita mais lotes; retirar() devolve [] quando a fila esvaziar"""
+        self._fechada = True
+        self._disponivel.set()
+
+    async def retirar(self, maximo: int = LOTE_MAXIMO) -> list:
+        """Tudo o que estiver na fila (até maximo leituras), esperando se estiver vazia"""
+        while not self._lotes:
+            if self._fechada:
+                return []
+            self._disponivel.clear()
+            await self._disponivel.wait()
+
+        linhas = []
+        while self._lotes and (not linhas or len(linhas) + len(self._lotes[0]) <= maximo):
+            lote = self._lotes.popleft()
+            linhas.extend(lote)
+            self.pendentes -= len(lote)
+        return linhas
+
+
+def _resposta_http(status: int, conteudo: dict, manter_conexao: bool, extras: dict = None) -> bytes:
+    corpo = json.dumps(conteudo, ensure_ascii=False).encode('utf-8')
+    cabecalhos = [
+        f'HTTP/1.1 {status} {HTTPStatus(status).phrase}',
+        'Content-Type: application/json; charset=utf-8',
+        f'Content-Length: {len(corpo)}',
+        f"Connection: {'keep-alive' if manter_conexao else 'close'}"
+    ] + [f'{nome}: {valor}' for nome, valor in (extras or {}).items()]
+    return ('\r\n'.join(cabecalhos) + '\r\n\r\n').encode('latin-1') + corpo
+
+
+class ServidorIngestao:
+    """Servidor HTTP/1.1 (keep-alive) com fila limitada e escritor em lotes"""
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO, capacidade: int = CAPACIDADE_FILA,
+                 lote_maximo: int = LOTE_MAXIMO, corpo_maximo: int = CORPO_MAXIMO,
+                 tempo_ocioso: float = TEMPO_OCIOSO):
+        self.armazenamento = ArmazenamentoLeituras(diretorio)
+        self.capacidade = capacidade
+        self.lote_maximo = lote_maximo
+        self.corpo_maximo = corpo_maximo
+        self.tempo_ocioso = tempo_ocioso
+        self.contadores = dict.fromkeys(['aceitas', 'gravadas', 'transacoes', 'recusadas_fila_cheia',
+                                         'invalidas', 'conexoes_abertas'], 0)
+        self.fila = None
+        self._servidor = None
+        self._escritor = None
+        self._encerrando = False
+        # Uma thread só: a conexão SQLite de cada fazenda é criada e usada sempre nela
+        self._thread_escrita = ThreadPoolExecutor(max_workers=1, thread_name_prefix='escritor')
+
+    async def iniciar(self, host: str = '0.0.0.0', porta: int = 8080) -> None:
+        self.fila = FilaLeituras(self.capacidade)
+        self._escritor = asyncio.create_task(self._escrever())
+        self._servidor = await asyncio.start_server(self._atender, host, porta)
+
+    async def servir(self) -> None:
+        await self._servidor.serve_forever()
+
+    async def encerrar(self) -> None:
+        """Para de aceitar conexões, grava o que está na fila e fecha o banco"""
+        self._encerrando = True
+        self._servidor.close()
+        self.fila.fechar()
+        await self._escritor
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._thread_escrita, self.armazenamento.fechar)
+        self._thread_escrita.shutdown()
+
+    def estado(self) -> dict:
+        return {'fila': self.fila.pendentes, 'capacidade': self.fila.capacidade, **self.contadores}
+
+    def _gravar(self, linhas: list) -> None:
+        self.armazenamento.inserir_lote(pd.DataFrame(linhas, columns=COLUNAS))
+
+    async def _escrever(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            linhas = await self.fila.retirar(self.lote_maximo)
+            if not linhas:
+                return
+            try:
+                await loop.run_in_executor(self._thread_escrita, self._gravar, linhas)
+            except Exception as e:
+                # Falha do banco não derruba o servidor; o lote é descartado e registrado
+                print(f"❌ Falha ao gravar {len(linhas)} leituras: {e}")
+                continue
+            self.contadores['gravadas'] += len(linhas)
+            self.contadores['transacoes'] += 1
+
+    async def _ler_requisicao(self, reader: asyncio.StreamReader):
+        """(método, alvo, cabeçalhos, corpo, manter conexão) ou None se o cliente fechou"""
+        try:
+            linha = await reader.readline()
+            if not linha:
+                return None
+            partes = linha.decode('latin-1').rstrip('\r\n').split(' ')
+            if len(partes) != 3 or not partes[2].startswith('HTTP/1.'):
+                raise ErroHttp(400, "linha de requisição inválida")
+            metodo, alvo, versao = partes
+
+            cabecalhos = {}
+            while True:
+                linha = await reader.readline()
+                if linha in (b'\r\n', b'\n', b''):
+                    break
+                nome, _, valor = linha.decode('latin-1').partition(':')
+                cabecalhos[nome.strip().lower()] = valor.strip()
+                if len(cabecalhos) > 100:
+                    raise ErroHttp(431, "cabeçalhos demais")
+        except ValueError:
+            # Linha maior que o limite do StreamReader
+            raise ErroHttp(431, "linha de cabeçalho grande demais")
+
+        if 'chunked' in cabecalhos.get('transfer-encoding', '').lower():
+            raise ErroHttp(411, "envie o corpo com Content-Length")
+        try:
+            tamanho = int(cabecalhos.get('content-length', '0'))
+        except ValueError:
+            raise ErroHttp(400, "Content-Length inválido")
+        if tamanho < 0:
+            raise ErroHttp(400, "Content-Length inválido")
+        if tamanho > self.corpo_maximo:
+            raise ErroHttp(413, f"corpo maior que {self.corpo_maximo} bytes", descartar=tamanho)
+        corpo = await reader.readexactly(tamanho) if tamanho else b''
+
+        conexao = cabecalhos.get('connection', '').lower()
+        manter = conexao == 'keep-alive' if versao == 'HTTP/1.0' else conexao != 'close'
+        return metodo, alvo, cabecalhos, corpo, manter
+
+    def _rotear(self, metodo: str, alvo: str, cabecalhos: dict, corpo: bytes) -> tuple:
+        """(status, conteúdo, cabeçalhos extras) da resposta"""
+        url = urlsplit(alvo)
+        if url.path == '/saude':
+            if metodo != 'GET':
+                return 405, {'erro': 'use GET'}, {'Allow': 'GET'}
+            return 200, self.estado(), None
+        if url.path != '/leituras':
+            return 404, {'erro': f'rota desconhecida: {url.path}'}, None
+        if metodo != 'POST':
+            return 405, {'erro': 'use POST'}, {'Allow': 'POST'}
+        if self._encerrando:
+            return 503, {'erro': 'servidor encerrando'}, {'Retry-After': '5'}
+
+        tipo = cabecalhos.get('content-type', 'application/json').split(';')[0].strip().lower()
+        descartados = 0
+        try:
+            if tipo == 'application/json':
+                linhas = leituras_json(corpo)
+            elif tipo == 'application/octet-stream':
+                linhas, descartados = leituras_binarias(corpo, parse_qs(url.query))
+            else:
+                return 415, {'erro': 'use application/json ou application/octet-stream'}, None
+        except LeituraInvalida as e:
+            self.contadores['invalidas'] += 1
+            return 400, {'erro': str(e)}, None
+
+        if len(linhas) > self.fila.capacidade:
+            return 413, {'erro': f'lote maior que a fila ({self.fila.capacidade} leituras)'}, None
+        if not self.fila.oferecer(linhas):
+            self.contadores['recusadas_fila_cheia'] += len(linhas)
+            return 429, {'erro': 'fila cheia', 'fila': self.fila.pendentes}, {'Retry-After': '1'}
+
+        self.contadores['aceitas'] += len(linhas)
+        resposta = {'aceitas': len(linhas)}
+        if descartados:
+            resposta['bytes_descartados'] = descartados
+        return 202, resposta, None
+
+    @staticmethod
+    async def _descartar(reader: asyncio.StreamReader, tamanho: int) -> None:
+        while tamanho > 0:
+            bloco = await reader.read(min(tamanho, 64 * 1024))
+            if not bloco:
+                return
+            tamanho -= len(bloco)
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.contadores['conexoes_abertas'] += 1
+        try:
+            while True:
+                try:
+                    requisicao = await asyncio.wait_for(self._ler_requisicao(reader), self.tempo_ocioso)
+                except ErroHttp as e:
+                    # Depois de um erro de protocolo não dá para achar o início da próxima requisição
+                    writer.write(_resposta_http(e.status, {'erro': str(e)}, manter_conexao=False))
+                    await writer.drain()
+                    if 0 < e.descartar <= DESCARTE_MAXIMO:
+                        # Fechar com dados não lidos gera RST e o cliente perderia a resposta
+                        await asyncio.wait_for(self._descartar(reader, e.descartar), self.tempo_ocioso)
+                    break
+                if requisicao is None:
+                    break
+
+                metodo, alvo, cabecalhos, corpo, manter = requisicao
+                try:
+                    status, conteudo, extras = self._rotear(metodo, alvo, cabecalhos, corpo)
+                except ErroHttp as e:
+                    status, conteudo, extras = e.status, {'erro': str(e)}, None
+                writer.write(_resposta_http(status, conteudo, manter, extras))
+                await writer.drain()
+                if not manter:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.contadores['conexoes_abertas'] -= 1
+            writer.close()
+
+
+async def executar(host: str, porta: int, diretorio: Path, capacidade: int, lote_maximo: int) -> None:
+    servidor = ServidorIngestao(diretorio, capacidade, lote_maximo)
+    await servidor.iniciar(host, porta)
+    print(f"🌱 Ingestão em http://{host}:{porta}/leituras (fila de {capacidade:,} leituras, banco em {diretorio})")
+    try:
+        await servidor.servir()
+    finally:
+        await servidor.encerrar()
+        estado = servidor.estado()
+        print(f"Encerrado: {estado['aceitas']:,} leituras aceitas, {estado['gravadas']:,} gravadas em "
+              f"{estado['transacoes']:,} transações, {estado['recusadas_fila_cheia']:,} recusadas (fila cheia), "
+              f"{estado['invalidas']:,} requisições inválidas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor HTTP de ingestão das leituras')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--porta', type=int, default=8080)
+    parser.add_argument('--diretorio', type=Path, default=DIRETORIO_PADRAO,
+                        help='Diretório com um SQLite por fazenda')
+    parser.add_argument('--capacidade', type=int, default=CAPACIDADE_FILA,
+                        help='Leituras na fila antes de responder 429')
+    parser.add_argument('--lote-maximo', type=int, default=LOTE_MAXIMO,
+                        help='Leituras por transação de gravação')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(executar(args.host, args.porta, args.diretorio, args.capacidade, args.lote_maximo))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: K-Means completo (notebook) vs clusterização em streaming
+
+Gera dados sintéticos com a distribuição de crop_yield.csv e compara tempo,
+pico de memória e qualidade (inércia na mesma escala e concordância de
+rótulos via Adjusted Rand Index) entre:
+- full-batch: StandardScaler.fit_transform + KMeans(n_init=10), como no notebook
+- streaming: RunningScaler + MiniBatchKMeans sobre chunks
+
+Uso:
+    python benchmarks/bench_streaming_clustering.py --rows 100000 1000000
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.metrics import adjusted_rand_score
+from sklearn.preprocessing import StandardScaler
+
+# Permite executar como script a partir de fase5/FarmTech
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from farmtech.data import CLIMATE_FEATURES, load_dataset, synthetic_like
+from farmtech.streaming import StreamingClimateClusterer
+
+
+def measure(fn):
+    """Executa fn medindo tempo e pico de memória alocada pelo Python/NumPy"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024**2
+
+
+def run(n_rows: int, k: int, chunksize: int, seed_df: pd.DataFrame) -> list:
+    X = synthetic_like(seed_df, n_rows)[CLIMATE_FEATURES].to_numpy()
+    X_ref = StandardScaler().fit_transform(X)  # Escala comum para comparar inércias
+
+    def full_batch():
+        X_scaled = StandardScaler().fit_transform(X)
+        return KMeans(n_clusters=k, random_state=42, n_init=10).fit_predict(X_scaled)
+
+    def streaming():
+        clusterer = StreamingClimateClusterer(n_clusters=k)
+        chunks = (X[i:i + chunksize] for i in range(0, n_rows, chunksize))
+        clusterer.fit_stream(chunks, warmup=X[:min(chunksize, 10_000)])
+        return clusterer.predict(X)
+
+    full_labels, full_time, full_mem = measure(full_batch)
+    stream_labels, stream_time, stream_mem = measure(streaming)
+
+    def inertia(labels):
+        centers = np.vstack([X_ref[labels == c].mean(axis=0) for c in np.unique(labels)])
+        return float(((X_ref - centers[np.searchsorted(np.unique(labels), labels)]) ** 2).sum())
+
+    return [
+        {'rows': n_rows, 'mode': 'full-batch', 'seconds': full_time, 'peak_mb': full_mem,
+         'inertia': inertia(full_labels), 'ari_vs_full': 1.0},
+        {'rows': n_rows, 'mode': 'streaming', 'seconds': stream_time, 'peak_mb': stream_mem,
+         'inertia': inertia(stream_labels), 'ari_vs_full': adjusted_rand_score(full_labels, stream_labels)}
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de clusterização em streaming')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--k', type=int, default=4)
+    parser.add_argument('--chunksize', type=int, default=50_000)
+    parser.add_argument('--seed-csv', type=Path,
+                        default=Path(__file__).resolve().parents[1] / 'crop_yield.csv')
+    args = parser.parse_args()
+
+    seed_df = load_dataset(args.seed_csv)
+    rows = []
+    for n_rows in args.rows:
+        rows += run(n_rows, args.k, args.chunksize, seed_df)
+
+    results = pd.DataFrame(rows)
+    print(results.round(3).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
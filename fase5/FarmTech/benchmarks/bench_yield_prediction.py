@@ -0,0 +1,83 @@
+"""
+Benchmark: throughput da previsão de rendimento por cultura
+
+Treina o conjunto por cultura em crop_yield.csv e mede linhas/segundo em
+dados sintéticos com a mesma distribuição, comparando:
+- per-row: despacho linha a linha para o modelo da cultura (amostra, extrapolado)
+- batch: CropYieldEnsemble.predict (agrupamento por cultura, 1 chamada por grupo)
+- batch-cold: mesma chamada com o LRU vazio (inclui a carga dos modelos)
+
+Uso:
+    python benchmarks/bench_yield_prediction.py --rows 100000 1000000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Permite executar como script a partir de fase5/FarmTech
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from farmtech.data import CLIMATE_FEATURES, CROP, load_dataset, synthetic_like
+from farmtech.yield_models import CropYieldEnsemble, train_crop_models
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def per_row(ensemble: CropYieldEnsemble, df: pd.DataFrame) -> np.ndarray:
+    """Abordagem ingênua: um predict por linha"""
+    X = df[CLIMATE_FEATURES].to_numpy()
+    return np.array([ensemble.model(crop).predict(X[i:i + 1])[0]
+                     for i, crop in enumerate(df[CROP])])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de previsão de rendimento por cultura')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--per-row-sample', type=int, default=500,
+                        help='Linhas usadas para estimar o despacho linha a linha')
+    parser.add_argument('--seed-csv', type=Path,
+                        default=Path(__file__).resolve().parents[1] / 'crop_yield.csv')
+    args = parser.parse_args()
+
+    seed_df = load_dataset(args.seed_csv)
+    results = []
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        train_crop_models(seed_df, model_dir)
+        ensemble = CropYieldEnsemble(model_dir)
+
+        sample = synthetic_like(seed_df, args.per_row_sample, seed=7)
+        ensemble.predict(sample)  # Aquece o LRU
+        row_preds, row_time = timed(lambda: per_row(ensemble, sample))
+        assert np.allclose(row_preds, ensemble.predict(sample))
+        row_throughput = len(sample) / row_time
+
+        for n_rows in args.rows:
+            df = synthetic_like(seed_df, n_rows)
+
+            cold = CropYieldEnsemble(model_dir)
+            _, cold_time = timed(lambda: cold.predict(df))
+            _, warm_time = timed(lambda: cold.predict(df))
+
+            results += [
+                {'rows': n_rows, 'mode': 'per-row (extrapolado)',
+                 'seconds': n_rows / row_throughput, 'rows_per_s': row_throughput},
+                {'rows': n_rows, 'mode': 'batch-cold', 'seconds': cold_time, 'rows_per_s': n_rows / cold_time},
+                {'rows': n_rows, 'mode': 'batch', 'seconds': warm_time, 'rows_per_s': n_rows / warm_time}
+            ]
+
+    print(pd.DataFrame(results).round(3).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+"""
+FarmTech Solutions - análise de rendimento de safras
+
+Estágios do notebook farmtech_ml_analysis.ipynb como funções importáveis,
+executáveis sem Jupyter (python -m farmtech) e em lote sobre muitos arquivos.
+"""
+
+from farmtech.data import CLIMATE_FEATURES, TARGET, dataset_hash, load_dataset
+from farmtech.clustering import cluster_climate_profiles, elbow_sweep
+from farmtech.outliers import detect_outliers
+from farmtech.regression import compare_regressors
+from farmtech.pipeline import run_analysis, run_batch
+from farmtech.yield_models import CropYieldEnsemble, train_crop_models
+
+__all__ = [
+    'CLIMATE_FEATURES', 'TARGET', 'dataset_hash', 'load_dataset',
+    'cluster_climate_profiles', 'elbow_sweep', 'detect_outliers',
+    'compare_regressors', 'run_analysis', 'run_batch',
+    'CropYieldEnsemble', 'train_crop_models'
+]
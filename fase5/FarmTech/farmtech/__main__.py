@@ -0,0 +1,119 @@
+"""
+Linha de comando da análise de rendimento de safras
+
+Exemplos:
+    python -m farmtech analyze crop_yield.csv
+    python -m farmtech batch "dados/regioes/*.csv" --output resumo.csv
+    python -m farmtech stream-cluster clima_diario.csv --output clusterizador.joblib
+    python -m farmtech train-yield crop_yield.csv --model-dir modelos_rendimento
+    python -m farmtech predict-yield talhoes_safra.csv --model-dir modelos_rendimento --output previsoes.csv
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from farmtech.data import CLIMATE_FEATURES
+from farmtech.pipeline import run_analysis, run_batch, summarize
+
+DEFAULT_CACHE = Path('.farmtech_cache')
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(prog='farmtech', description='Análise de rendimento de safras')
+    parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE,
+                        help='Diretório do cache de resultados por dataset')
+    parser.add_argument('--no-cache', action='store_true', help='Não usar cache')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Processos paralelos (padrão: todos os núcleos)')
+    parser.add_argument('--k', type=int, default=4, help='Número de clusters final')
+    parser.add_argument('--contamination', type=float, default=0.1,
+                        help='Proporção esperada de outliers')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    analyze_parser = subparsers.add_parser('analyze', help='Analisar um dataset')
+    analyze_parser.add_argument('csv', help='Arquivo no formato de crop_yield.csv')
+
+    batch_parser = subparsers.add_parser('batch', help='Analisar vários datasets em paralelo')
+    batch_parser.add_argument('inputs', nargs='+', help='Arquivos, diretórios ou padrões glob')
+    batch_parser.add_argument('--output', type=Path, default=None, help='CSV de resumo do lote')
+
+    stream_parser = subparsers.add_parser('stream-cluster',
+                                          help='Clusterizar um CSV grande em chunks (memória fixa)')
+    stream_parser.add_argument('csv', help='CSV com as variáveis climáticas')
+    stream_parser.add_argument('--chunksize', type=int, default=100_000)
+    stream_parser.add_argument('--output', type=Path, default=None,
+                               help='Arquivo .joblib para salvar o clusterizador')
+
+    train_parser = subparsers.add_parser('train-yield', help='Treinar um modelo de rendimento por cultura')
+    train_parser.add_argument('csv', help='Arquivo no formato de crop_yield.csv')
+    train_parser.add_argument('--model-dir', type=Path, required=True,
+                              help='Diretório onde o conjunto de modelos é gravado')
+
+    predict_parser = subparsers.add_parser('predict-yield', help='Prever rendimento em lote')
+    predict_parser.add_argument('csv', help='CSV com cultura e variáveis climáticas')
+    predict_parser.add_argument('--model-dir', type=Path, required=True,
+                                help='Diretório gerado por train-yield')
+    predict_parser.add_argument('--output', type=Path, required=True, help='CSV com as previsões')
+
+    args = parser.parse_args(argv)
+    cache_dir = None if args.no_cache else args.cache_dir
+
+    if args.command == 'analyze':
+        result = run_analysis(args.csv, k=args.k, contamination=args.contamination,
+                              n_jobs=args.jobs or os.cpu_count(), cache_dir=cache_dir)
+        print("\n📉 Inércia por k:")
+        for k, inertia in result['inertias'].items():
+            print(f"  k={k}: {inertia:.2f}")
+        print(f"\n🔍 Clusters (k={args.k}): {result['clusters']['sizes']}")
+        print(f"🚨 Outliers: {result['outliers']['count']} ({result['outliers']['pct']:.1f}%)")
+        print("\n📊 Comparação dos Modelos:")
+        print(result['regression']['metrics'].round(3).to_string())
+        print(f"\n🏆 Melhor modelo: {summarize(result)['best_model']}")
+    elif args.command == 'stream-cluster':
+        import joblib
+        from farmtech.streaming import StreamingClimateClusterer, iter_csv_chunks
+
+        clusterer = StreamingClimateClusterer(n_clusters=args.k)
+        clusterer.fit_stream(iter_csv_chunks(args.csv, args.chunksize))
+        print(f"🔍 Registros processados: {clusterer.scaler.n:,}")
+        print("📍 Centróides (escala original):")
+        print(pd.DataFrame(clusterer.cluster_centers_, columns=CLIMATE_FEATURES).round(3).to_string())
+        if args.output:
+            joblib.dump(clusterer, args.output)
+            print(f"Clusterizador salvo em: {args.output}")
+    elif args.command == 'train-yield':
+        from farmtech.data import load_dataset
+        from farmtech.yield_models import train_crop_models
+
+        manifest = train_crop_models(load_dataset(args.csv), args.model_dir,
+                                     n_jobs=args.jobs or os.cpu_count())
+        print("\n🌾 Modelos por cultura:")
+        print(pd.DataFrame(manifest['crops']).T.infer_objects().round(3).to_string())
+    elif args.command == 'predict-yield':
+        from farmtech.yield_models import CropYieldEnsemble
+
+        df = pd.read_csv(args.csv)
+        df['Yield_Predicted'] = CropYieldEnsemble(args.model_dir).predict(df)
+        df.to_csv(args.output, index=False)
+        print(f"Previsões salvas em: {args.output} ({len(df):,} linhas)")
+    else:
+        summary = run_batch(args.inputs, n_jobs=args.jobs, cache_dir=cache_dir,
+                            k=args.k, contamination=args.contamination)
+        if args.output:
+            summary.to_csv(args.output, index=False)
+            print(f"Resumo salvo em: {args.output}")
+        else:
+            print(summary.to_string(index=False))
+        if 'error' in summary.columns and summary['error'].notna().any():
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
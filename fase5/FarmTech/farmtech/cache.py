@@ -0,0 +1,36 @@
+"""Cache de resultados por hash do dataset e parâmetros do estágio"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import joblib
+
+
+class ResultCache:
+    """Guarda o resultado de cada estágio em <cache_dir>/<hash do dataset>/"""
+
+    def __init__(self, cache_dir: Optional[Path]):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+
+    def _path(self, data_hash: str, stage: str, params: dict) -> Path:
+        params_hash = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:12]
+        return self.cache_dir / data_hash[:16] / f'{stage}_{params_hash}.joblib'
+
+    def get_or_compute(self, data_hash: str, stage: str, params: dict,
+                       compute: Callable[[], Any]) -> Any:
+        """Retorna o resultado em cache ou calcula e grava"""
+        if self.cache_dir is None:
+            return compute()
+
+        path = self._path(data_hash, stage, params)
+        if path.exists():
+            return joblib.load(path)
+
+        result = compute()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        joblib.dump(result, tmp_path)
+        tmp_path.replace(path)
+        return result
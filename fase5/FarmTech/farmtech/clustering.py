@@ -0,0 +1,51 @@
+"""Clusterização K-Means dos perfis climáticos"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+from farmtech.data import CLIMATE_FEATURES, CROP
+
+
+def scale_climate(df: pd.DataFrame) -> np.ndarray:
+    """Padroniza as variáveis climáticas (StandardScaler, como no notebook)"""
+    return StandardScaler().fit_transform(df[CLIMATE_FEATURES])
+
+
+def _fit_inertia(X_scaled: np.ndarray, k: int, random_state: int) -> float:
+    return float(KMeans(n_clusters=k, random_state=random_state, n_init=10).fit(X_scaled).inertia_)
+
+
+def elbow_sweep(X_scaled: np.ndarray, k_range: Iterable[int] = range(2, 11),
+                n_jobs: int = 1, random_state: int = 42) -> Dict[int, float]:
+    """
+    Inércia do K-Means para cada k (método do cotovelo).
+
+    Com n_jobs > 1 cada k é ajustado em um processo separado.
+    """
+    k_values = list(k_range)
+
+    if n_jobs == 1:
+        inertias = [_fit_inertia(X_scaled, k, random_state) for k in k_values]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(k_values))) as executor:
+            inertias = list(executor.map(_fit_inertia, [X_scaled] * len(k_values),
+                                         k_values, [random_state] * len(k_values)))
+
+    return dict(zip(k_values, inertias))
+
+
+def cluster_climate_profiles(df: pd.DataFrame, X_scaled: np.ndarray, k: int = 4,
+                             random_state: int = 42) -> dict:
+    """Ajusta o K-Means final e resume a distribuição de culturas por cluster"""
+    labels = KMeans(n_clusters=k, random_state=random_state, n_init=10).fit_predict(X_scaled)
+
+    return {
+        'labels': labels,
+        'sizes': pd.Series(labels).value_counts().sort_index().to_dict(),
+        'crop_distribution': pd.crosstab(pd.Series(labels, name='Cluster'), df[CROP].reset_index(drop=True))
+    }
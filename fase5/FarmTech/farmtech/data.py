@@ -0,0 +1,61 @@
+"""Leitura do dataset de rendimento, identificação por hash e dados sintéticos"""
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CROP = 'Crop'
+TARGET = 'Yield'
+
+# Variáveis climáticas usadas na clusterização, outliers e regressão
+CLIMATE_FEATURES = [
+    'Precipitation (mm day-1)',
+    'Specific Humidity at 2 Meters (g/kg)',
+    'Relative Humidity at 2 Meters (%)',
+    'Temperature at 2 Meters (C)'
+]
+
+
+def load_dataset(path) -> pd.DataFrame:
+    """Carrega um CSV no formato de crop_yield.csv e valida as colunas"""
+    df = pd.read_csv(path)
+
+    missing = [c for c in [CROP, TARGET] + CLIMATE_FEATURES if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes em {path}: {missing}")
+
+    return df
+
+
+def dataset_hash(path) -> str:
+    """SHA-256 do conteúdo do arquivo (chave do cache de resultados)"""
+    digest = hashlib.sha256()
+    with open(Path(path), 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def synthetic_like(df: pd.DataFrame, n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Gera dados sintéticos com o mesmo formato e distribuição de df.
+
+    Para cada cultura amostra uma normal multivariada com a média e a
+    covariância (clima + rendimento) observadas, mantendo a proporção de culturas.
+    """
+    rng = np.random.default_rng(seed)
+    columns = CLIMATE_FEATURES + [TARGET]
+    crops = df[CROP].value_counts(normalize=True)
+    counts = rng.multinomial(n_rows, crops.values)
+
+    parts = []
+    for crop, count in zip(crops.index, counts):
+        group = df.loc[df[CROP] == crop, columns]
+        values = rng.multivariate_normal(group.mean().values, group.cov().values, size=count)
+        part = pd.DataFrame(values, columns=columns)
+        part.insert(0, CROP, crop)
+        parts.append(part)
+
+    return pd.concat(parts, ignore_index=True).sample(frac=1, random_state=seed).reset_index(drop=True)
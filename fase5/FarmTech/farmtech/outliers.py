@@ -0,0 +1,23 @@
+"""Detecção de cenários climáticos discrepantes (Isolation Forest)"""
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from farmtech.data import CROP
+
+
+def detect_outliers(df: pd.DataFrame, X_scaled: np.ndarray, contamination: float = 0.1,
+                    random_state: int = 42) -> dict:
+    """Marca outliers e conta por cultura"""
+    is_outlier = IsolationForest(contamination=contamination, random_state=random_state) \
+        .fit_predict(X_scaled) == -1
+
+    by_crop = pd.Series(is_outlier, index=df.index).groupby(df[CROP]).agg(['sum', 'count'])
+
+    return {
+        'is_outlier': is_outlier,
+        'count': int(is_outlier.sum()),
+        'pct': float(is_outlier.mean() * 100),
+        'by_crop': by_crop.rename(columns={'sum': 'outliers', 'count': 'total'})
+    }
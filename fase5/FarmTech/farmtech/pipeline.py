@@ -0,0 +1,127 @@
+"""Execução dos estágios de análise para um arquivo ou para um lote"""
+
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from farmtech.cache import ResultCache
+from farmtech.clustering import cluster_climate_profiles, elbow_sweep, scale_climate
+from farmtech.data import dataset_hash, load_dataset
+from farmtech.outliers import detect_outliers
+from farmtech.regression import compare_regressors
+
+logger = logging.getLogger(__name__)
+
+# Colunas do relatório do lote (summarize + erro dos arquivos que falharam)
+SUMMARY_COLUMNS = ['dataset', 'n_rows', 'n_clusters', 'outliers', 'outliers_pct',
+                   'best_model', 'best_r2', 'best_rmse', 'error']
+
+
+def run_analysis(csv_path, k: int = 4, k_range: Iterable[int] = range(2, 11),
+                 contamination: float = 0.1, n_jobs: int = 1,
+                 cache_dir: Optional[Path] = None) -> dict:
+    """
+    Executa clusterização, outliers e comparação de regressores de um dataset.
+
+    Cada estágio é guardado em cache pelo hash do arquivo: rodar de novo sobre
+    o mesmo conteúdo não refaz nenhum ajuste.
+    """
+    cache = ResultCache(cache_dir)
+    data_hash = dataset_hash(csv_path)
+    df = load_dataset(csv_path)
+    X_scaled = scale_climate(df)
+    k_range = list(k_range)
+
+    inertias = cache.get_or_compute(
+        data_hash, 'elbow', {'k_range': k_range},
+        lambda: elbow_sweep(X_scaled, k_range, n_jobs=n_jobs)
+    )
+    clusters = cache.get_or_compute(
+        data_hash, 'clusters', {'k': k},
+        lambda: cluster_climate_profiles(df, X_scaled, k=k)
+    )
+    outliers = cache.get_or_compute(
+        data_hash, 'outliers', {'contamination': contamination},
+        lambda: detect_outliers(df, X_scaled, contamination=contamination)
+    )
+    regression = cache.get_or_compute(
+        data_hash, 'regression', {},
+        lambda: compare_regressors(df, n_jobs=n_jobs)
+    )
+
+    return {
+        'dataset': str(csv_path),
+        'dataset_hash': data_hash,
+        'n_rows': len(df),
+        'inertias': inertias,
+        'clusters': clusters,
+        'outliers': outliers,
+        'regression': regression
+    }
+
+
+def summarize(result: dict) -> dict:
+    """Linha de resumo de uma análise (usada no relatório do lote)"""
+    metrics = result['regression']['metrics']
+    best = result['regression']['best_model']
+    return {
+        'dataset': result['dataset'],
+        'n_rows': result['n_rows'],
+        'n_clusters': len(result['clusters']['sizes']),
+        'outliers': result['outliers']['count'],
+        'outliers_pct': round(result['outliers']['pct'], 2),
+        'best_model': best,
+        'best_r2': round(metrics.loc[best, 'R²'], 4),
+        'best_rmse': round(metrics.loc[best, 'RMSE'], 2)
+    }
+
+
+def _analyze_for_batch(csv_path: str, kwargs: dict) -> dict:
+    return summarize(run_analysis(csv_path, n_jobs=1, **kwargs))
+
+
+def expand_inputs(inputs: Iterable[str]) -> List[str]:
+    """Expande diretórios e padrões glob em uma lista ordenada de CSVs"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths += glob.glob(os.path.join(item, '*.csv'))
+        else:
+            paths += glob.glob(item) or [item]
+    return sorted(set(paths))
+
+
+def run_batch(inputs: Iterable[str], n_jobs: Optional[int] = None,
+              cache_dir: Optional[Path] = None, **kwargs) -> pd.DataFrame:
+    """
+    Analisa muitos arquivos (ex.: um por região) em processos paralelos.
+
+    O paralelismo é entre arquivos; dentro de cada arquivo os estágios rodam
+    em série para não multiplicar processos. Falhas são registradas na coluna
+    'error' sem interromper o lote. Sem arquivos, retorna o resumo vazio.
+    """
+    paths = expand_inputs(inputs)
+    if not paths:
+        logger.warning("Nenhum arquivo para analisar")
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    n_jobs = n_jobs or os.cpu_count()
+    kwargs['cache_dir'] = cache_dir
+    rows = []
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        futures = {executor.submit(_analyze_for_batch, path, kwargs): path for path in paths}
+        for i, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                rows.append(future.result())
+            except Exception as e:
+                logger.error(f"Falha ao analisar {path}: {e}")
+                rows.append({'dataset': path, 'error': str(e)})
+            logger.info(f"[{i}/{len(paths)}] {path}")
+
+    return pd.DataFrame(rows).sort_values('dataset').reset_index(drop=True)
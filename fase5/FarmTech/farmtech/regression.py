@@ -0,0 +1,102 @@
+"""Comparação de regressores de rendimento"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.svm import SVR
+
+from farmtech.data import CLIMATE_FEATURES, CROP, TARGET
+
+# Modelos sensíveis à escala recebem features padronizadas
+SCALED_MODELS = {'Support Vector Regression', 'Neural Network'}
+
+
+def build_regressors() -> dict:
+    """Regressores comparados no notebook (mesmos hiperparâmetros)"""
+    return {
+        'Linear Regression': LinearRegression(),
+        'Random Forest': RandomForestRegressor(n_estimators=100, random_state=42),
+        'Support Vector Regression': SVR(kernel='rbf'),
+        'Gradient Boosting': GradientBoostingRegressor(n_estimators=100, random_state=42),
+        'Neural Network': MLPRegressor(hidden_layer_sizes=(100, 50), max_iter=1000, random_state=42)
+    }
+
+
+def prepare_regression_data(df: pd.DataFrame, test_size: float = 0.2, random_state: int = 42) -> dict:
+    """Codifica a cultura, separa treino/teste e padroniza"""
+    label_encoder = LabelEncoder()
+    X = df[CLIMATE_FEATURES].copy()
+    X['Crop_Encoded'] = label_encoder.fit_transform(df[CROP])
+    y = df[TARGET]
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+    scaler = StandardScaler()
+    return {
+        'X_train': X_train.values, 'X_test': X_test.values,
+        'X_train_scaled': scaler.fit_transform(X_train), 'X_test_scaled': scaler.transform(X_test),
+        'y_train': y_train.values, 'y_test': y_test.values,
+        'feature_names': list(X.columns), 'label_encoder': label_encoder
+    }
+
+
+def _evaluate_regressor(name: str, model, data: dict, cv: int) -> dict:
+    """Treina, avalia no teste e faz validação cruzada de um regressor"""
+    if name in SCALED_MODELS:
+        X_train, X_test = data['X_train_scaled'], data['X_test_scaled']
+    else:
+        X_train, X_test = data['X_train'], data['X_test']
+
+    model.fit(X_train, data['y_train'])
+    y_pred = model.predict(X_test)
+    cv_scores = cross_val_score(model, X_train, data['y_train'], cv=cv, scoring='r2')
+
+    mse = mean_squared_error(data['y_test'], y_pred)
+    return {
+        'MAE': mean_absolute_error(data['y_test'], y_pred),
+        'MSE': mse,
+        'RMSE': float(np.sqrt(mse)),
+        'R²': r2_score(data['y_test'], y_pred),
+        'CV_R²_Mean': cv_scores.mean(),
+        'CV_R²_Std': cv_scores.std(),
+        'Predictions': y_pred
+    }
+
+
+def compare_regressors(df: pd.DataFrame, n_jobs: int = 1, cv: int = 5) -> dict:
+    """
+    Treina e compara todos os regressores.
+
+    Com n_jobs > 1 cada regressor é avaliado em um processo separado.
+
+    Returns:
+        Dicionário com a tabela de métricas, o melhor modelo e as predições
+    """
+    data = prepare_regression_data(df)
+    models = build_regressors()
+
+    if n_jobs == 1:
+        results = {name: _evaluate_regressor(name, model, data, cv) for name, model in models.items()}
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(models))) as executor:
+            futures = {name: executor.submit(_evaluate_regressor, name, model, data, cv)
+                       for name, model in models.items()}
+            results = {name: future.result() for name, future in futures.items()}
+
+    metrics = pd.DataFrame({
+        name: {k: v for k, v in res.items() if k != 'Predictions'} for name, res in results.items()
+    }).T.astype(float)
+
+    return {
+        'metrics': metrics,
+        'best_model': metrics['R²'].idxmax(),
+        'predictions': {name: res['Predictions'] for name, res in results.items()},
+        'y_test': data['y_test']
+    }
@@ -0,0 +1,112 @@
+"""
+Clusterização em streaming dos perfis climáticos
+
+Para registros climáticos diários de muitos municípios, que não cabem em
+memória de uma vez: padronização com estatísticas acumuladas e K-Means em
+mini-batch sobre chunks, com memória fixa (um chunk + centróides).
+"""
+
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+
+from farmtech.data import CLIMATE_FEATURES
+
+
+class RunningScaler:
+    """Média e variância acumuladas por chunk (combinação de Chan et al.)"""
+
+    def __init__(self):
+        self.n = 0
+        self.mean_ = None
+        self.m2_ = None
+
+    def partial_fit(self, X: np.ndarray) -> 'RunningScaler':
+        n_b = X.shape[0]
+        if n_b == 0:
+            return self
+        mean_b = X.mean(axis=0)
+        m2_b = ((X - mean_b) ** 2).sum(axis=0)
+
+        if self.n == 0:
+            self.n, self.mean_, self.m2_ = n_b, mean_b, m2_b
+        else:
+            n = self.n + n_b
+            delta = mean_b - self.mean_
+            self.mean_ = self.mean_ + delta * n_b / n
+            self.m2_ = self.m2_ + m2_b + delta ** 2 * self.n * n_b / n
+            self.n = n
+        return self
+
+    @property
+    def scale_(self) -> np.ndarray:
+        std = np.sqrt(self.m2_ / self.n)
+        return np.where(std > 0, std, 1.0)
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.mean_) / self.scale_
+
+
+def iter_csv_chunks(path, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    """Lê apenas as colunas climáticas de um CSV em chunks"""
+    yield from pd.read_csv(path, usecols=CLIMATE_FEATURES, chunksize=chunksize)
+
+
+class StreamingClimateClusterer:
+    """K-Means mini-batch sobre chunks com padronização acumulada"""
+
+    def __init__(self, n_clusters: int = 4, batch_size: int = 1024, random_state: int = 42):
+        self.scaler = RunningScaler()
+        self.model = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size,
+                                     random_state=random_state, n_init=3)
+        self.n_clusters = n_clusters
+
+    @staticmethod
+    def _values(chunk) -> np.ndarray:
+        if isinstance(chunk, pd.DataFrame):
+            chunk = chunk[CLIMATE_FEATURES].to_numpy()
+        return np.asarray(chunk, dtype=np.float64)
+
+    def partial_fit(self, chunk) -> 'StreamingClimateClusterer':
+        """
+        Atualiza estatísticas e centróides com um chunk.
+
+        Blocos menores que n_clusters só atualizam as estatísticas.
+        """
+        X = self._values(chunk)
+        self.scaler.partial_fit(X)
+        X_scaled = self.scaler.transform(X)
+
+        # Um passo do mini-batch por bloco de batch_size linhas do chunk
+        batch_size = self.model.batch_size
+        for start in range(0, X_scaled.shape[0], batch_size):
+            batch = X_scaled[start:start + batch_size]
+            if batch.shape[0] >= self.n_clusters:
+                self.model.partial_fit(batch)
+        return self
+
+    def fit_stream(self, chunks: Iterable, warmup: Optional[np.ndarray] = None) -> 'StreamingClimateClusterer':
+        """
+        Ajusta sobre um iterável de chunks em uma única passada.
+
+        Args:
+            chunks: DataFrames ou arrays com as variáveis climáticas
+            warmup: Amostra opcional para inicializar a padronização antes do
+                primeiro partial_fit (evita centróides iniciais em outra escala)
+        """
+        if warmup is not None:
+            self.scaler.partial_fit(self._values(warmup))
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self
+
+    def predict(self, records) -> np.ndarray:
+        """Atribui registros novos ao cluster mais próximo (online)"""
+        return self.model.predict(self.scaler.transform(self._values(records)))
+
+    @property
+    def cluster_centers_(self) -> np.ndarray:
+        """Centróides na escala original das variáveis"""
+        return self.model.cluster_centers_ * self.scaler.scale_ + self.scaler.mean_
@@ -0,0 +1,155 @@
+"""
+Ensemble de modelos de rendimento por cultura
+
+Em vez de um único regressor com a cultura codificada (LabelEncoder), treina
+um Random Forest por cultura sobre as variáveis climáticas e persiste o
+conjunto em disco para previsões de safra em larga escala.
+
+- predict agrupa as linhas por cultura e faz uma única chamada vetorizada
+  por grupo (sem loop por linha)
+- Modelos carregados sob demanda e mantidos em um cache LRU
+"""
+
+import json
+import logging
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+
+from farmtech.data import CLIMATE_FEATURES, CROP, TARGET
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = 'manifest.json'
+
+
+def _model_filename(crop: str) -> str:
+    """Nome de arquivo seguro para a cultura (ex.: 'Rice, paddy' -> rice_paddy.joblib)"""
+    return re.sub(r'[^a-z0-9]+', '_', crop.lower()).strip('_') + '.joblib'
+
+
+def _fit_crop_model(crop: str, X: np.ndarray, y: np.ndarray,
+                    test_size: float, random_state: int) -> dict:
+    """Treina o modelo de uma cultura e mede R² em um holdout"""
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=random_state)
+    holdout = RandomForestRegressor(n_estimators=100, random_state=random_state)
+    holdout.fit(X_train, y_train)
+
+    # Modelo final usa todas as linhas da cultura
+    model = RandomForestRegressor(n_estimators=100, random_state=random_state)
+    model.fit(X, y)
+    return {
+        'model': model,
+        'metrics': {'n_rows': int(len(y)), 'holdout_r2': float(r2_score(y_test, holdout.predict(X_test)))}
+    }
+
+
+def train_crop_models(df: pd.DataFrame, output_dir, n_jobs: int = 1,
+                      test_size: float = 0.2, random_state: int = 42) -> dict:
+    """
+    Treina um modelo por cultura e grava em output_dir.
+
+    Args:
+        df: Dataset no formato de crop_yield.csv
+        output_dir: Diretório do conjunto (um .joblib por cultura + manifest.json)
+        n_jobs: Culturas treinadas em paralelo (um processo por cultura)
+
+    Returns:
+        Manifesto gravado (culturas, arquivos, features e métricas)
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    groups = {crop: (group[CLIMATE_FEATURES].to_numpy(), group[TARGET].to_numpy())
+              for crop, group in df.groupby(CROP)}
+
+    if n_jobs == 1:
+        fitted = {crop: _fit_crop_model(crop, X, y, test_size, random_state)
+                  for crop, (X, y) in groups.items()}
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(groups))) as executor:
+            futures = {crop: executor.submit(_fit_crop_model, crop, X, y, test_size, random_state)
+                       for crop, (X, y) in groups.items()}
+            fitted = {crop: future.result() for crop, future in futures.items()}
+
+    manifest = {'features': CLIMATE_FEATURES, 'crops': {}}
+    for crop, result in fitted.items():
+        filename = _model_filename(crop)
+        # Sem compressão: carga mais rápida no predict
+        joblib.dump(result['model'], output_dir / filename)
+        manifest['crops'][crop] = {'file': filename, **result['metrics']}
+        logger.info(f"Modelo de {crop}: R² holdout = {result['metrics']['holdout_r2']:.3f}")
+
+    with open(output_dir / MANIFEST_FILENAME, 'w') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    return manifest
+
+
+class CropYieldEnsemble:
+    """Conjunto persistido de modelos por cultura com predição em lote"""
+
+    def __init__(self, model_dir, max_loaded: int = 8):
+        """
+        Args:
+            model_dir: Diretório gerado por train_crop_models
+            max_loaded: Máximo de modelos mantidos em memória (LRU)
+        """
+        self.model_dir = Path(model_dir)
+        with open(self.model_dir / MANIFEST_FILENAME, 'r') as f:
+            self.manifest = json.load(f)
+
+        self.features = self.manifest['features']
+        self.crops = list(self.manifest['crops'])
+        self._load_model = lru_cache(maxsize=max_loaded)(self._load_from_disk)
+
+    def _load_from_disk(self, crop: str):
+        logger.debug(f"Carregando modelo de {crop}")
+        return joblib.load(self.model_dir / self.manifest['crops'][crop]['file'])
+
+    def model(self, crop: str):
+        """Modelo da cultura (carregado do disco apenas se não estiver no LRU)"""
+        if crop not in self.manifest['crops']:
+            raise KeyError(f"Cultura sem modelo treinado: {crop}")
+        return self._load_model(crop)
+
+    def cache_info(self):
+        """Acertos/faltas do cache de modelos carregados"""
+        return self._load_model.cache_info()
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Prevê o rendimento de cada linha com o modelo da sua cultura.
+
+        As linhas são ordenadas por cultura uma única vez (argsort estável) e
+        cada fatia contígua vai para o modelo em uma chamada vetorizada.
+        Linhas de culturas sem modelo recebem NaN.
+        """
+        X = df[self.features].to_numpy(dtype=np.float64)
+        codes, crops = pd.factorize(df[CROP])
+        predictions = np.full(len(df), np.nan)
+
+        order = np.argsort(codes, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0], minlength=len(crops)))])
+        offset = np.count_nonzero(codes < 0)  # Culturas ausentes (NaN) ficam no início
+
+        unknown = [crop for crop in crops if crop not in self.manifest['crops']]
+        if unknown:
+            logger.warning(f"Culturas sem modelo (previsão NaN): {unknown}")
+
+        for code, crop in enumerate(crops):
+            if crop in unknown:
+                continue
+            rows = order[offset + bounds[code]:offset + bounds[code + 1]]
+            predictions[rows] = self.model(crop).predict(X[rows])
+
+        return predictions
@@ -0,0 +1,69 @@
+"""
+Benchmark: tempo de inicialização da CLI por subcomando
+
+Mede, em processos novos, o tempo até `hermes <subcomando> --help` terminar
+(import do módulo do subcomando + argparse) e compara com a execução direta
+dos scripts legados. Também mede o import isolado das bibliotecas pesadas
+para mostrar de onde vem o custo.
+
+Uso:
+    python benchmarks/bench_cli_startup.py --repeat 5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_ROOT = PROJECT_ROOT / 'src'
+
+sys.path.insert(0, str(SRC_ROOT))
+from hermes.cli import COMMANDS
+
+LIBRARIES = ['pandas', 'duckdb', 'joblib', 'sklearn.ensemble', 'matplotlib.pyplot']
+
+
+def tempo_processo(comando: list, repeat: int) -> float:
+    """Menor tempo de parede entre `repeat` execuções (reduz ruído do sistema)"""
+    env = {**os.environ, 'PYTHONPATH': str(SRC_ROOT)}
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        subprocess.run(comando, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo de inicialização da CLI hermes')
+    parser.add_argument('--repeat', type=int, default=5, help='Execuções por medida')
+    args = parser.parse_args()
+
+    python = sys.executable
+    print(f"{'comando':<40} {'tempo':>8}")
+    print('-' * 49)
+
+    base = tempo_processo([python, '-c', 'pass'], args.repeat)
+    print(f"{'python -c pass':<40} {base:>7.3f}s")
+    for lib in LIBRARIES:
+        t = tempo_processo([python, '-c', f'import {lib}'], args.repeat)
+        print(f"{'import ' + lib:<40} {t:>7.3f}s")
+
+    print()
+    t = tempo_processo([python, '-m', 'hermes', '--help'], args.repeat)
+    print(f"{'hermes --help':<40} {t:>7.3f}s")
+    for command, (module, _) in COMMANDS.items():
+        t = tempo_processo([python, '-m', 'hermes', command, '--help'], args.repeat)
+        print(f"{'hermes ' + command + ' --help':<40} {t:>7.3f}s")
+
+    print()
+    for script in ('src/etl/load_to_duckdb.py', 'src/ml/model_trainer.py', 'src/ml/model_registry.py'):
+        t = tempo_processo([python, str(PROJECT_ROOT / script), '--help'], args.repeat)
+        print(f"{'python ' + script + ' --help':<40} {t:>7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
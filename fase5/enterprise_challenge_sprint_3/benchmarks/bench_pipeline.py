@@ -0,0 +1,302 @@
+"""
+Benchmark ponta a ponta do pipeline de dados e ML
+
+Para cada tamanho de dataset:
+1. Gera um CSV sintético no formato de factory_sensor_simulator_2040.csv
+2. Executa SensorDataETL.run_etl_pipeline
+3. Executa IndustrialFailurePrediction.run_training_pipeline
+
+Os métodos de cada estágio são instrumentados na própria instância (o
+pipeline real é executado, sem reimplementar a ordem dos passos) e cada
+estágio registra tempo, pico de memória (RSS) e throughput em linhas/s.
+Cada tamanho roda em um processo novo, para que o pico de memória de um
+tamanho não contamine o seguinte. Processos filhos (folds da validação
+cruzada, renderização das figuras) não entram na memória medida.
+
+Uso:
+    python benchmarks/bench_pipeline.py --rows 10000 100000 --save-baseline benchmarks/results/baseline.json
+    python benchmarks/bench_pipeline.py --rows 10000 100000 --baseline benchmarks/results/baseline.json
+
+Com --baseline, estágios mais lentos (ou com mais memória) que a tolerância
+são marcados como REGRESSÃO e o comando sai com código 1.
+"""
+
+import argparse
+import functools
+import json
+import logging
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_ROOT = PROJECT_ROOT / 'src'
+SCHEMA_PATH = PROJECT_ROOT / 'db/init_schema.sql'
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000, 10_000_000]
+CHUNK_ROWS = 500_000
+MIN_SECONDS = 0.05    # Diferenças abaixo disso são ruído, não regressão
+
+ETL_STAGES = ['connect_database', 'load_csv_data', 'transform_data',
+              'load_to_database', 'validate_loaded_data']
+TRAINING_STAGES = ['load_data', 'prepare_features', 'train_models', 'cross_validate_models',
+                   'select_best_model', 'create_visualizations', 'save_model_and_results',
+                   'permutation_importance']
+
+MACHINE_TYPES = [
+    'Mixer', 'Industrial_Chiller', 'Pick_and_Place', 'Vision_System', 'Shuttle_System',
+    'Labeler', 'Automated_Screwdriver', 'Shrink_Wrapper', 'Laser_Cutter', 'Hydraulic_Press',
+    'CNC_Mill', 'Conveyor_Belt', 'Boiler', 'Compressor', 'Palletizer'
+]
+
+
+# ============================================================================
+# Dados sintéticos
+# ============================================================================
+
+def _synthetic_chunk(start: int, n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Bloco de linhas com as colunas e faixas do simulador original"""
+    machine_type = rng.choice(MACHINE_TYPES, n)
+    temperature = rng.normal(60, 10, n)
+    vibration = np.abs(rng.normal(10, 3, n))
+    oil = rng.uniform(0, 100, n)
+    failure_history = rng.integers(0, 10, n)
+
+    # Probabilidade de falha ligada aos sensores, como no dataset real
+    logit = (temperature - 75) / 4 + (vibration - 15) / 2 + (30 - oil) / 20 + failure_history / 5 - 1
+    failure = rng.random(n) < 1 / (1 + np.exp(-logit))
+
+    def only(types, values):
+        return np.where(np.isin(machine_type, types), values, np.nan).round(2)
+
+    return pd.DataFrame({
+        'Machine_ID': np.char.add('MC_', np.char.zfill((start + np.arange(n)).astype(str), 6)),
+        'Machine_Type': machine_type,
+        'Installation_Year': rng.integers(2000, 2040, n),
+        'Operational_Hours': rng.integers(0, 100_000, n),
+        'Temperature_C': temperature.round(2),
+        'Vibration_mms': vibration.round(2),
+        'Sound_dB': rng.normal(80, 5, n).round(2),
+        'Oil_Level_pct': oil.round(2),
+        'Coolant_Level_pct': rng.uniform(0, 100, n).round(2),
+        'Power_Consumption_kW': rng.uniform(1, 300, n).round(2),
+        'Last_Maintenance_Days_Ago': rng.integers(0, 365, n),
+        'Maintenance_History_Count': rng.integers(0, 20, n),
+        'Failure_History_Count': failure_history,
+        'AI_Supervision': rng.random(n) < 0.5,
+        'Error_Codes_Last_30_Days': rng.integers(0, 15, n),
+        'Remaining_Useful_Life_days': np.where(failure, rng.uniform(0, 7, n), rng.uniform(7, 500, n)).round(1),
+        'Failure_Within_7_Days': failure,
+        'Laser_Intensity': only(['Laser_Cutter'], rng.normal(80, 5, n)),
+        'Hydraulic_Pressure_bar': only(['Hydraulic_Press'], rng.normal(120, 10, n)),
+        'Coolant_Flow_L_min': only(['Industrial_Chiller'], rng.normal(40, 5, n)),
+        'Heat_Index': only(['Industrial_Chiller', 'Boiler'], rng.normal(400, 20, n)),
+        'AI_Override_Events': rng.integers(0, 10, n)
+    })
+
+
+def generate_factory_csv(rows: int, path: Path, seed: int = 42) -> Path:
+    """Escreve o CSV sintético em blocos (memória constante, mesmo com 10M linhas)"""
+    rng = np.random.default_rng(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for start in range(0, rows, CHUNK_ROWS):
+        chunk = _synthetic_chunk(start, min(CHUNK_ROWS, rows - start), rng)
+        chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    return path
+
+
+# ============================================================================
+# Instrumentação
+# ============================================================================
+
+def _reset_peak_rss() -> bool:
+    """Zera o pico de RSS do processo (Linux); False se não suportado"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Sem /proc: pico do processo inteiro (não é zerado entre estágios)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageRecorder:
+    """Envolve métodos de uma instância e registra tempo e memória de cada chamada"""
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.records = []
+        self._open_peaks = []    # Pico acumulado dos estágios em andamento (aninhados)
+
+    def instrument(self, obj, pipeline: str, stages: list, label=None) -> None:
+        for stage in stages:
+            method = getattr(obj, stage)
+            setattr(obj, stage, self._wrap(method, pipeline, label or stage))
+
+    def record(self, pipeline: str, stage: str, seconds: float, peak_rss_mb: float) -> None:
+        # Estágio chamado mais de uma vez (ex.: create_visualizations): soma o tempo, mantém o maior pico
+        for record in self.records:
+            if record['pipeline'] == pipeline and record['stage'] == stage:
+                record['seconds'] += seconds
+                record['peak_rss_mb'] = max(record['peak_rss_mb'], peak_rss_mb)
+                record['rows_per_s'] = self.rows / record['seconds'] if record['seconds'] > 0 else float('inf')
+                return
+        self.records.append({
+            'rows': self.rows,
+            'pipeline': pipeline,
+            'stage': stage,
+            'seconds': seconds,
+            'peak_rss_mb': peak_rss_mb,
+            'rows_per_s': self.rows / seconds if seconds > 0 else float('inf')
+        })
+
+    def _wrap(self, method, pipeline: str, stage: str):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            # O pico é zerado a cada estágio; estágios externos (total) acumulam o dos internos
+            self._open_peaks.append(0.0)
+            _reset_peak_rss()
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                peak = max(self._open_peaks.pop(), _peak_rss_mb())
+                if self._open_peaks:
+                    self._open_peaks[-1] = max(self._open_peaks[-1], peak)
+                self.record(pipeline, stage, seconds, peak)
+        return timed
+
+
+def run_single(rows: int, workdir: Path, cv_folds: int, skip_training: bool, seed: int) -> list:
+    """Gera os dados e executa ETL + treino de um tamanho, no processo atual"""
+    sys.path.insert(0, str(SRC_ROOT))
+    from etl.load_to_duckdb import SensorDataETL
+    from ml.model_trainer import IndustrialFailurePrediction
+
+    recorder = StageRecorder(rows)
+    csv_path = workdir / 'data/raw/factory_sensor_simulator_2040.csv'
+    db_path = workdir / 'db/hermes_reply.duckdb'
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    generate_factory_csv(rows, csv_path, seed)
+    recorder.record('setup', 'generate_csv', time.perf_counter() - start, _peak_rss_mb())
+
+    etl = SensorDataETL(str(csv_path), str(db_path), str(SCHEMA_PATH))
+    recorder.instrument(etl, 'etl', ETL_STAGES)
+    recorder.instrument(etl, 'etl', ['run_etl_pipeline'], label='total')
+    etl.run_etl_pipeline()
+
+    if not skip_training:
+        trainer = IndustrialFailurePrediction(workdir, preview_figures=True, cv_folds=cv_folds)
+        recorder.instrument(trainer, 'train', TRAINING_STAGES)
+        recorder.instrument(trainer.report_renderer, 'train', ['wait'], label='render_wait')
+        recorder.instrument(trainer, 'train', ['run_training_pipeline'], label='total')
+        trainer.run_training_pipeline()
+
+    return recorder.records
+
+
+# ============================================================================
+# Baseline
+# ============================================================================
+
+def compare_with_baseline(results: pd.DataFrame, baseline: pd.DataFrame, tolerance: float) -> pd.DataFrame:
+    """Junta os resultados ao baseline e marca regressões de tempo ou memória"""
+    keys = ['rows', 'pipeline', 'stage']
+    merged = results.merge(baseline[keys + ['seconds', 'peak_rss_mb']], on=keys,
+                           how='left', suffixes=('', '_baseline'))
+    merged['time_ratio'] = merged['seconds'] / merged['seconds_baseline']
+    merged['rss_ratio'] = merged['peak_rss_mb'] / merged['peak_rss_mb_baseline']
+
+    slower = ((merged['time_ratio'] > 1 + tolerance)
+              & (merged['seconds'] - merged['seconds_baseline'] > MIN_SECONDS))
+    heavier = merged['rss_ratio'] > 1 + tolerance
+    merged['status'] = np.select([merged['seconds_baseline'].isna(), slower | heavier],
+                                 ['sem baseline', 'REGRESSÃO'], default='ok')
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ponta a ponta: ETL + treinamento')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS,
+                        help='Tamanhos de dataset (linhas)')
+    parser.add_argument('--cv-folds', type=int, default=5,
+                        help='Folds da validação cruzada no treino (0 desativa)')
+    parser.add_argument('--skip-training', action='store_true', help='Mede apenas o ETL')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workdir', type=str, default=None,
+                        help='Diretório de trabalho (padrão: temporário, removido ao final)')
+    parser.add_argument('--output', type=str, default=None, help='CSV com a tabela de resultados')
+    parser.add_argument('--baseline', type=str, default=None, help='JSON de baseline para comparar')
+    parser.add_argument('--save-baseline', type=str, default=None, help='Salva os resultados como baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Aumento relativo tolerado antes de acusar regressão')
+    parser.add_argument('--single', type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        # Processo filho: um tamanho, resultados em JSON no stdout
+        logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+        records = run_single(args.single, Path(args.workdir), args.cv_folds, args.skip_training, args.seed)
+        print(json.dumps(records))
+        return
+
+    records = []
+    with tempfile.TemporaryDirectory(prefix='hermes_bench_') as tmp:
+        for rows in args.rows:
+            workdir = Path(args.workdir or tmp) / f'rows_{rows}'
+            workdir.mkdir(parents=True, exist_ok=True)
+            print(f"Executando {rows:,} linhas...", flush=True)
+            command = [sys.executable, __file__, '--single', str(rows), '--workdir', str(workdir),
+                       '--cv-folds', str(args.cv_folds), '--seed', str(args.seed)]
+            if args.skip_training:
+                command.append('--skip-training')
+            output = subprocess.run(command, stdout=subprocess.PIPE, check=True, text=True).stdout
+            records += json.loads(output.strip().splitlines()[-1])
+
+    results = pd.DataFrame(records)
+    columns = ['rows', 'pipeline', 'stage', 'seconds', 'peak_rss_mb', 'rows_per_s']
+
+    status = 0
+    if args.baseline:
+        results = compare_with_baseline(results, pd.read_json(args.baseline), args.tolerance)
+        columns += ['time_ratio', 'rss_ratio', 'status']
+        status = int((results['status'] == 'REGRESSÃO').any())
+
+    with pd.option_context('display.width', 160, 'display.max_rows', None,
+                           'display.float_format', '{:,.3f}'.format):
+        print(results[columns].to_string(index=False))
+
+    if args.output:
+        results[columns].to_csv(args.output, index=False)
+        print(f"\nResultados salvos em: {args.output}")
+    if args.save_baseline:
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        results[columns[:6]].to_json(args.save_baseline, orient='records', indent=2)
+        print(f"Baseline salvo em: {args.save_baseline}")
+    if status:
+        print(f"\nREGRESSÃO: estágios acima de {args.tolerance:.0%} do baseline")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
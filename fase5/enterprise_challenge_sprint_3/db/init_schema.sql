@@ -19,7 +19,8 @@ DROP VIEW IF EXISTS vw_failure_timeline;
 DROP VIEW IF EXISTS vw_machine_status;
 DROP VIEW IF EXISTS vw_ml_dataset;
 
--- Remover tabelas (ordem inversa para respeitar foreign keys)
+-- Remover tabelas de histórico (ordem inversa para respeitar foreign keys);
+-- machine_current_state não é removida: o ETL a refaz na transação da carga
 DROP TABLE IF EXISTS failure_predictions;
 DROP TABLE IF EXISTS machine_specific_sensors;
 DROP TABLE IF EXISTS ai_monitoring;
@@ -150,6 +151,51 @@ CREATE TABLE failure_predictions (
         FOREIGN KEY (machine_id) REFERENCES machines(machine_id)
 );
 
+-- ============================================================================
+-- 7. ESTADO ATUAL DE CADA MÁQUINA
+-- ============================================================================
+-- Uma linha por máquina com a leitura mais recente de cada tabela.
+-- Refeita pelo ETL a partir de cada carga (última linha de cada máquina no
+-- lote), na mesma transação que recarrega o histórico: nunca fica com
+-- máquinas ou valores de uma carga anterior.
+CREATE TABLE IF NOT EXISTS machine_current_state (
+    machine_id VARCHAR(50) PRIMARY KEY,                    -- Uma linha por máquina
+    machine_type VARCHAR(50) NOT NULL,                     -- Tipo da máquina
+    installation_year INTEGER NOT NULL,                    -- Ano de instalação
+    operational_hours DOUBLE,                              -- Última leitura dos sensores
+    temperature_c DOUBLE,
+    vibration_mms DOUBLE,
+    sound_db DOUBLE,
+    oil_level_pct DOUBLE,
+    coolant_level_pct DOUBLE,
+    power_consumption_kw DOUBLE,
+    last_maintenance_days_ago INTEGER,                     -- Último registro de manutenção
+    failure_history_count INTEGER,
+    ai_supervision BOOLEAN,                                -- Último monitoramento por IA
+    error_codes_last_30_days INTEGER,
+    remaining_useful_life_days DOUBLE,                     -- Último label de falha
+    failure_within_7_days BOOLEAN,
+    last_reading TIMESTAMP NOT NULL,                       -- Timestamp da leitura mais recente
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP         -- Última atualização pelo ETL
+    
+    -- Sem chave estrangeira: machines é recarregada na mesma transação
+);
+
+-- ============================================================================
+-- 8. CARGAS DO ETL
+-- ============================================================================
+-- Uma linha por execução do ETL, preservada entre as cargas. Cada carga
+-- recria o histórico com IDs a partir de 1; quem processa sensor_readings
+-- de forma incremental (features, drift) guarda o load_id junto com o
+-- watermark e recomeça quando a carga muda.
+CREATE TABLE IF NOT EXISTS etl_loads (
+    load_id BIGINT PRIMARY KEY,                            -- Sequencial por carga
+    source VARCHAR NOT NULL,                               -- CSV, diretório ou glob de origem
+    files_loaded INTEGER NOT NULL,                         -- Arquivos carregados no lote
+    readings BIGINT NOT NULL,                              -- Linhas em sensor_readings
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP          -- Fim da carga
+);
+
 -- ============================================================================
 -- CRIAÇÃO DE ÍNDICES PARA PERFORMANCE
 -- ============================================================================
@@ -213,7 +259,8 @@ SELECT
     ai.error_codes_last_30_days,
     fp.remaining_useful_life_days,
     fp.failure_within_7_days,
-    sr.reading_timestamp
+    sr.reading_timestamp,
+    sr.reading_id
 FROM machines m
 JOIN sensor_readings sr ON m.machine_id = sr.machine_id
 JOIN maintenance_records mr ON m.machine_id = mr.machine_id
@@ -221,24 +268,21 @@ JOIN ai_monitoring ai ON m.machine_id = ai.machine_id
 JOIN failure_predictions fp ON m.machine_id = fp.machine_id;
 
 -- View para análise de status atual das máquinas
+-- (uma linha por máquina, lida de machine_current_state sem varrer o histórico)
 CREATE VIEW vw_machine_status AS
 SELECT 
-    m.machine_id,
-    m.machine_type,
-    m.installation_year,
-    sr.operational_hours,
-    sr.temperature_c,
-    sr.vibration_mms,
-    sr.power_consumption_kw,
-    mr.last_maintenance_days_ago,
-    ai.ai_supervision,
-    fp.failure_within_7_days,
-    sr.reading_timestamp as last_reading
-FROM machines m
-LEFT JOIN sensor_readings sr ON m.machine_id = sr.machine_id
-LEFT JOIN maintenance_records mr ON m.machine_id = mr.machine_id  
-LEFT JOIN ai_monitoring ai ON m.machine_id = ai.machine_id
-LEFT JOIN failure_predictions fp ON m.machine_id = fp.machine_id;
+    machine_id,
+    machine_type,
+    installation_year,
+    operational_hours,
+    temperature_c,
+    vibration_mms,
+    power_consumption_kw,
+    last_maintenance_days_ago,
+    ai_supervision,
+    failure_within_7_days,
+    last_reading
+FROM machine_current_state;
 
 -- View para análise temporal de falhas
 CREATE VIEW vw_failure_timeline AS
@@ -266,6 +310,8 @@ Tabelas Criadas:
 3. machines (1) -> ai_monitoring (N)
 4. machines (1) -> machine_specific_sensors (N)
 5. machines (1) -> failure_predictions (N)
+6. machine_current_state (1 por máquina, mantida pelo ETL)
+7. etl_loads (1 por execução do ETL)
 
 Features:
 - Normalização 3FN
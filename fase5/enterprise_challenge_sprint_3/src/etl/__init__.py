@@ -0,0 +1 @@
+"""Pipeline ETL: CSV de sensores para o DuckDB normalizado"""
@@ -6,50 +6,112 @@ Este script carrega os dados do CSV simulado para o banco DuckDB
 seguindo o modelo normalizado criado.
 
 Funcionalidades:
-- Leitura e validação do CSV de origem
+- Leitura e validação do CSV de origem (arquivo, diretório ou glob; vários
+  arquivos lidos em paralelo e carregados por um único escritor)
 - Transformação e limpeza dos dados
 - Carregamento para tabelas normalizadas
 - Geração de IDs únicos sequenciais
 - Logs detalhados do processo
 """
 
+import argparse
+import glob
+import os
 import pandas as pd
 import duckdb
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import logging
-from typing import Dict
+from typing import Dict, List, Optional
 from datetime import datetime
 import sys
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('etl_process.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Permite executar como script (python src/etl/load_to_duckdb.py) importando os pacotes de src/
+SRC_ROOT = Path(__file__).resolve().parents[1]
+if str(SRC_ROOT) not in sys.path:
+    sys.path.insert(0, str(SRC_ROOT))
+
+from etl.schema_types import csv_dtypes, downcast_integers, memory_mb
+
 logger = logging.getLogger(__name__)
 
+def configure_logging(log_file: str = 'etl_process.log') -> None:
+    """Configura o log do ETL (console + arquivo); chamado apenas ao executar o pipeline"""
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+
+def resolve_csv_files(source) -> List[Path]:
+    """
+    Arquivos CSV de uma origem: arquivo único, diretório (todos os *.csv) ou
+    padrão glob (ex.: data/raw/linha_*_2024-*.csv).
+    
+    Os arquivos saem ordenados pelo nome; com um arquivo por linha e hora
+    (nome com a data/hora), é a ordem cronológica em que as leituras chegam.
+    """
+    path = Path(source)
+    if path.is_dir():
+        files = path.glob('*.csv')
+    elif glob.has_magic(str(source)):
+        files = (Path(f) for f in glob.glob(str(source)))
+    else:
+        files = [path]
+    return sorted(f for f in files if f.is_file())
+
+def build_reading_timeline(machine_ids: pd.Series, start: datetime, end: datetime,
+                           seed: int = 42) -> pd.Series:
+    """
+    Gera timestamps crescentes por máquina, no ritmo de amostragem de cada uma.
+    
+    A k-ésima leitura de uma máquina (ordem de chegada no CSV) recebe
+    início + fase da máquina + k * intervalo, com intervalo = período / nº de
+    leituras da máquina. A fase aleatória (fixa por máquina) espalha as
+    máquinas pelo período sem quebrar a ordem temporal de cada uma.
+    Totalmente vetorizado (cumcount + aritmética), sem loop por máquina.
+    
+    Returns:
+        Série de timestamps (resolução de microssegundos) alinhada a machine_ids
+    """
+    codes, _ = pd.factorize(machine_ids)
+    sequence = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+    readings_per_machine = np.bincount(codes)
+    
+    span_us = int((end - start) / pd.Timedelta(microseconds=1))
+    interval_us = span_us // readings_per_machine
+    phase_us = np.random.default_rng(seed).integers(0, np.maximum(interval_us, 1))
+    
+    offsets_us = phase_us[codes] + sequence * interval_us[codes]
+    timestamps = pd.Timestamp(start) + pd.to_timedelta(offsets_us, unit='us')
+    return pd.Series(timestamps, index=machine_ids.index)
+
 class SensorDataETL:
     """Classe para gerenciar o processo ETL dos dados de sensores"""
     
-    def __init__(self, csv_path: str, db_path: str, schema_path: str):
+    def __init__(self, csv_path: str, db_path: str, schema_path: str,
+                 max_workers: Optional[int] = None):
         """
         Inicializa o processo ETL
         
         Args:
-            csv_path: Caminho para o arquivo CSV de origem
+            csv_path: Arquivo CSV, diretório com CSVs ou padrão glob de origem
             db_path: Caminho para o banco DuckDB
             schema_path: Caminho para o script de schema SQL
+            max_workers: Arquivos lidos em paralelo (padrão: até 4, limitado aos CPUs)
         """
         self.csv_path = Path(csv_path)
+        self.csv_files = resolve_csv_files(csv_path)
         self.db_path = Path(db_path)
         self.schema_path = Path(schema_path)
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
         self.connection = None
         self.df_raw = None
+        self.failed_files = []  # (arquivo, erro) dos arquivos descartados no lote
         
     def connect_database(self) -> None:
         """Conecta ao banco DuckDB e cria o schema"""
@@ -71,24 +133,82 @@ class SensorDataETL:
             raise
     
     def load_csv_data(self) -> None:
-        """Carrega e valida os dados do CSV"""
+        """
+        Carrega e valida os CSVs de origem.
+        
+        Os arquivos são lidos e validados em paralelo (pool limitado a
+        max_workers threads; o parser C do pandas libera o GIL) e juntados na
+        ordem dos arquivos, que define a ordem das leituras de cada máquina.
+        Um arquivo ilegível ou inválido é registrado em failed_files e
+        descartado sem abortar o lote; sem nenhum arquivo válido, o ETL falha.
+        """
+        if not self.csv_files:
+            raise FileNotFoundError(f"Nenhum arquivo CSV encontrado em: {self.csv_path}")
+        
+        total = len(self.csv_files)
+        logger.info(f"Carregando {total} arquivo(s) CSV de {self.csv_path} ({self.max_workers} em paralelo)")
+        
+        frames = [None] * total
+        self.failed_files = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._read_and_validate, path): index
+                       for index, path in enumerate(self.csv_files)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                path = self.csv_files[index]
+                try:
+                    frames[index] = future.result()
+                    logger.info(f"[{done}/{total}] {path.name}: {len(frames[index]):,} registros")
+                except Exception as e:
+                    self.failed_files.append((path, e))
+                    logger.error(f"[{done}/{total}] {path.name}: falha na leitura ({e})")
+        
+        frames = [df for df in frames if df is not None]
+        if not frames:
+            raise ValueError(f"Nenhum dos {total} arquivo(s) CSV pôde ser carregado")
+        
+        self.df_raw = self._concat_frames(frames)
+        logger.info(f"Dados carregados: {self.df_raw.shape[0]:,} registros, {self.df_raw.shape[1]} colunas "
+                    f"({len(frames)} de {total} arquivo(s))")
+        logger.info(f"Memória utilizada: {memory_mb(self.df_raw):.2f} MB")
+        if self.failed_files:
+            logger.warning(f"{len(self.failed_files)} arquivo(s) descartado(s): "
+                           f"{', '.join(path.name for path, _ in self.failed_files)}")
+    
+    def _read_and_validate(self, path: Path) -> pd.DataFrame:
+        df = self._read_csv_typed(path)
+        self._validate_data(df, path.name)
+        return df
+    
+    @staticmethod
+    def _concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """Junta os arquivos na ordem; categorias diferentes entre arquivos viram a união"""
+        if len(frames) == 1:
+            return frames[0]
+        categorical = [col for col in frames[0].columns
+                       if isinstance(frames[0][col].dtype, pd.CategoricalDtype)]
+        df = pd.concat(frames, ignore_index=True)
+        for col in categorical:
+            df[col] = df[col].astype('category')
+        return df
+    
+    def _read_csv_typed(self, path: Path) -> pd.DataFrame:
+        """Lê um CSV já com os tipos compactos derivados do schema (floats exatos para o banco)"""
+        if not self.schema_path.exists():
+            return pd.read_csv(path)
+        
         try:
-            logger.info(f"Carregando dados do CSV: {self.csv_path}")
-            self.df_raw = pd.read_csv(self.csv_path)
-            
-            logger.info(f"Dados carregados: {self.df_raw.shape[0]:,} registros, {self.df_raw.shape[1]} colunas")
-            logger.info(f"Memória utilizada: {self.df_raw.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
-            
-            # Validações básicas
-            self._validate_data()
-            
-        except Exception as e:
-            logger.error(f"Erro ao carregar CSV: {e}")
-            raise
+            df = pd.read_csv(path, dtype=csv_dtypes(self.schema_path, compact_floats=False))
+        except (ValueError, TypeError) as e:
+            # Valores ausentes em colunas NOT NULL: int/bool do NumPy não aceitam nulos
+            logger.warning(f"{path.name}: valores fora do schema ({e}); usando tipos anuláveis")
+            df = pd.read_csv(path, dtype=csv_dtypes(self.schema_path, nullable=True,
+                                                     compact_floats=False))
+        return downcast_integers(df)
     
-    def _validate_data(self) -> None:
-        """Valida a qualidade dos dados carregados"""
-        logger.info("Validando qualidade dos dados...")
+    def _validate_data(self, df: pd.DataFrame, source: str) -> None:
+        """Valida a qualidade dos dados de um arquivo (colunas ausentes invalidam o arquivo)"""
+        logger.info(f"Validando qualidade dos dados de {source}...")
         
         # Verificar colunas obrigatórias
         required_columns = [
@@ -97,21 +217,21 @@ class SensorDataETL:
             'Failure_Within_7_Days', 'Remaining_Useful_Life_days'
         ]
         
-        missing_columns = [col for col in required_columns if col not in self.df_raw.columns]
+        missing_columns = [col for col in required_columns if col not in df.columns]
         if missing_columns:
             raise ValueError(f"Colunas obrigatórias ausentes: {missing_columns}")
         
         # Verificar valores ausentes em colunas críticas
-        critical_nulls = self.df_raw[required_columns].isnull().sum()
+        critical_nulls = df[required_columns].isnull().sum()
         if critical_nulls.sum() > 0:
-            logger.warning(f"Valores ausentes encontrados: \\n{critical_nulls[critical_nulls > 0]}")
+            logger.warning(f"{source}: valores ausentes encontrados: \\n{critical_nulls[critical_nulls > 0]}")
         
         # Verificar duplicatas
-        duplicates = self.df_raw.duplicated().sum()
+        duplicates = df.duplicated().sum()
         if duplicates > 0:
-            logger.warning(f"Encontradas {duplicates:,} linhas duplicadas")
+            logger.warning(f"{source}: encontradas {duplicates:,} linhas duplicadas")
             
-        logger.info("Validação concluída")
+        logger.info(f"Validação de {source} concluída")
     
     def transform_data(self) -> Dict[str, pd.DataFrame]:
         """Transforma os dados para o modelo normalizado"""
@@ -124,11 +244,16 @@ class SensorDataETL:
         df['AI_Supervision'] = df['AI_Supervision'].astype(bool)
         df['Failure_Within_7_Days'] = df['Failure_Within_7_Days'].astype(bool)
         
-        # Gerar timestamps simulados (distribuídos ao longo do ano)
+        # Gerar timestamps simulados: crescentes por máquina, distribuídos ao longo do ano
         start_date = datetime(2024, 1, 1)
         end_date = datetime(2024, 12, 31)
-        date_range = pd.date_range(start_date, end_date, periods=len(df))
-        np.random.shuffle(date_range.values)  # Embaralhar para simular dados reais
+        timeline = build_reading_timeline(df['Machine_ID'], start_date, end_date)
+        
+        # Linhas em ordem cronológica: IDs sequenciais seguem o tempo e as tabelas
+        # ficam fisicamente agrupadas por timestamp (zonemaps do DuckDB podam varreduras por período)
+        order = np.argsort(timeline.to_numpy(), kind='stable')
+        df = df.iloc[order].reset_index(drop=True)
+        date_range = timeline.to_numpy()[order]
         
         # 1. Tabela machines
         machines_df = df[['Machine_ID', 'Machine_Type', 'Installation_Year']].drop_duplicates()
@@ -222,13 +347,24 @@ class SensorDataETL:
             'failure_within_7_days', 'predicted_at'
         ]]
         
+        # 7. Estado atual: última linha de cada máquina no lote (linhas já em ordem cronológica)
+        current_state_df = df[[
+            'Machine_ID', 'Machine_Type', 'Installation_Year', 'Operational_Hours',
+            'Temperature_C', 'Vibration_mms', 'Sound_dB', 'Oil_Level_pct',
+            'Coolant_Level_pct', 'Power_Consumption_kW', 'Last_Maintenance_Days_Ago',
+            'Failure_History_Count', 'AI_Supervision', 'Error_Codes_Last_30_Days',
+            'Remaining_Useful_Life_days', 'Failure_Within_7_Days'
+        ]].assign(last_reading=date_range).drop_duplicates('Machine_ID', keep='last')
+        current_state_df.columns = current_state_df.columns.str.lower()
+        
         transformed_tables = {
             'machines': machines_df,
             'sensor_readings': sensor_readings_df,
             'maintenance_records': maintenance_df,
             'ai_monitoring': ai_monitoring_df,
             'machine_specific_sensors': specific_sensors_df,
-            'failure_predictions': failure_predictions_df
+            'failure_predictions': failure_predictions_df,
+            'machine_current_state': current_state_df
         }
         
         # Log da transformação
@@ -238,7 +374,18 @@ class SensorDataETL:
         return transformed_tables
     
     def load_to_database(self, tables: Dict[str, pd.DataFrame]) -> None:
-        """Carrega os dados transformados para o banco"""
+        """
+        Carrega os dados transformados para o banco.
+        
+        Único escritor do lote: todos os arquivos entram pela mesma conexão,
+        já juntados na ordem dos arquivos (o DuckDB aceita um escritor por vez).
+        
+        As tabelas de histórico são recarregadas por inteiro a cada execução e
+        machine_current_state é refeita a partir do mesmo lote (os timestamps
+        são gerados de novo a cada carga, então não servem para decidir qual
+        estado é mais novo). Tudo entra em uma transação, que termina registrando a carga em
+        etl_loads (load_id novo = IDs de sensor_readings reiniciados).
+        """
         logger.info("Carregando dados para o banco DuckDB...")
         
         # Ordem de inserção (respeitando dependências FK)
@@ -248,11 +395,12 @@ class SensorDataETL:
         ]
         
         try:
+            self.connection.execute("BEGIN TRANSACTION")
             for table_name in load_order:
                 if table_name in tables:
                     df = tables[table_name]
                     
-                    # Inserir dados usando DuckDB
+                    # Inserir dados usando DuckDB (histórico recarregado por inteiro)
                     self.connection.execute(f"DELETE FROM {table_name}")  # Limpar tabela
                     self.connection.register(f'{table_name}_temp', df)
                     
@@ -270,11 +418,50 @@ class SensorDataETL:
                     # Verificar inserção
                     count = self.connection.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
                     logger.info(f"✓ {table_name}: {count:,} registros inseridos")
+            
+            if 'machine_current_state' in tables:
+                self.replace_current_state(tables['machine_current_state'])
+            
+            load_id = self.record_load(len(tables.get('sensor_readings', ())))
+            self.connection.execute("COMMIT")
+            logger.info(f"✓ Carga {load_id} registrada em etl_loads")
                 
         except Exception as e:
+            self.connection.execute("ROLLBACK")
             logger.error(f"Erro ao carregar dados: {e}")
             raise
     
+    def record_load(self, readings: int) -> int:
+        """Registra a carga em etl_loads e retorna o load_id novo"""
+        files_loaded = len(self.csv_files) - len(self.failed_files)
+        return self.connection.execute("""
+            INSERT INTO etl_loads (load_id, source, files_loaded, readings)
+            SELECT COALESCE(MAX(load_id), 0) + 1, ?, ?, ? FROM etl_loads
+            RETURNING load_id
+        """, [str(self.csv_path), files_loaded, readings]).fetchone()[0]
+    
+    def replace_current_state(self, state_df: pd.DataFrame) -> None:
+        """
+        Refaz machine_current_state com o lote (uma linha por máquina).
+        
+        Chamada dentro da transação da carga: o estado corresponde sempre ao
+        histórico recarregado (mesmas máquinas de machines), e quem lê
+        vw_machine_status nunca vê a tabela vazia.
+        """
+        columns = ', '.join(state_df.columns)
+        
+        self.connection.execute("DELETE FROM machine_current_state")
+        self.connection.register('machine_current_state_batch', state_df)
+        try:
+            self.connection.execute(f"""
+                INSERT INTO machine_current_state ({columns}, updated_at)
+                SELECT {columns}, now() FROM machine_current_state_batch
+            """)
+        finally:
+            self.connection.unregister('machine_current_state_batch')
+        
+        logger.info(f"✓ machine_current_state: {len(state_df):,} máquinas")
+    
     def validate_loaded_data(self) -> None:
         """Valida os dados carregados no banco"""
         logger.info("Validando dados carregados...")
@@ -355,6 +542,8 @@ class SensorDataETL:
             logger.info("=== PIPELINE ETL CONCLUÍDO ===")
             logger.info(f"Tempo total: {duration}")
             logger.info(f"Banco DuckDB criado: {self.db_path}")
+            for path, error in self.failed_files:
+                logger.warning(f"Arquivo não carregado: {path} ({error})")
             
         except Exception as e:
             logger.error(f"Falha no pipeline ETL: {e}")
@@ -362,19 +551,37 @@ class SensorDataETL:
         finally:
             self.close_connection()
 
-def main():
+def main(argv=None, prog=None):
     """Função principal para executar o ETL"""
     
-    # Caminhos dos arquivos
-    project_root = Path(__file__).parent.parent.parent
-    csv_path = project_root / "data/raw/factory_sensor_simulator_2040.csv"
+    # Caminhos padrão dos arquivos
+    default_root = Path(__file__).resolve().parent.parent.parent
+    
+    parser = argparse.ArgumentParser(prog=prog, description='Carregar o CSV de sensores no DuckDB')
+    parser.add_argument('--project-root', type=str, default=str(default_root),
+                        help='Caminho raiz do projeto')
+    parser.add_argument('--csv', type=str, default=None,
+                        help='CSV, diretório com CSVs ou glob entre aspas '
+                             '(padrão: data/raw/factory_sensor_simulator_2040.csv)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Arquivos lidos em paralelo (padrão: até 4)')
+    parser.add_argument('--log-file', type=str, default='etl_process.log',
+                        help='Arquivo de log ("" desativa)')
+    args = parser.parse_args(argv)
+    
+    configure_logging(args.log_file)
+    
+    project_root = Path(args.project_root)
+    csv_path = args.csv if args.csv else project_root / "data/raw/factory_sensor_simulator_2040.csv"
     db_path = project_root / "db/hermes_reply.duckdb"
     schema_path = project_root / "db/init_schema.sql"
+    if not schema_path.exists():
+        schema_path = default_root / "db/init_schema.sql"
     
-    # Verificar se o arquivo CSV existe
-    if not csv_path.exists():
+    # Verificar se há arquivos CSV na origem
+    if not resolve_csv_files(csv_path):
         logger.error(f"Arquivo CSV não encontrado: {csv_path}")
-        return
+        sys.exit(1)
     
     # Criar diretório do banco se não existir
     db_path.parent.mkdir(exist_ok=True)
@@ -383,10 +590,15 @@ def main():
     etl = SensorDataETL(
         csv_path=str(csv_path),
         db_path=str(db_path),
-        schema_path=str(schema_path)
+        schema_path=str(schema_path),
+        max_workers=args.workers
     )
     
     etl.run_etl_pipeline()
+    
+    # Lote carregado com arquivos descartados: código 2 para o agendador alertar
+    if etl.failed_files:
+        sys.exit(2)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
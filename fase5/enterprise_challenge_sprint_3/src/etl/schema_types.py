@@ -0,0 +1,194 @@
+"""
+Tipos compactos derivados do schema DuckDB
+Hermes Reply Challenge - Fase 5
+
+Lê db/init_schema.sql e converte o tipo SQL de cada coluna em um dtype
+pandas compacto, usado na leitura do CSV (ETL) e nos DataFrames do treino:
+
+- VARCHAR                -> category (tipos e IDs que se repetem); chaves
+                            primárias VARCHAR (um valor por linha) ficam string
+- INTEGER / BIGINT       -> int32 / int64; com CHECK (col BETWEEN a AND b), o
+                            menor inteiro que comporta a faixa; depois da
+                            leitura, inteiros são reduzidos pelos valores reais
+- DOUBLE NOT NULL        -> float32 nos frames do treino; float64 no ETL, para
+                            o banco receber exatamente os valores do CSV
+- DOUBLE anulável        -> Float32/Float64 nullable (sensores específicos,
+                            vazios na maioria das máquinas: NULL explícito)
+- BOOLEAN                -> bool
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SCHEMA_PATH = Path(__file__).resolve().parents[2] / 'db/init_schema.sql'
+
+# Coluna do CSV -> (tabela, coluna) no schema normalizado
+CSV_COLUMNS = {
+    'Machine_ID': ('machines', 'machine_id'),
+    'Machine_Type': ('machines', 'machine_type'),
+    'Installation_Year': ('machines', 'installation_year'),
+    'Operational_Hours': ('sensor_readings', 'operational_hours'),
+    'Temperature_C': ('sensor_readings', 'temperature_c'),
+    'Vibration_mms': ('sensor_readings', 'vibration_mms'),
+    'Sound_dB': ('sensor_readings', 'sound_db'),
+    'Oil_Level_pct': ('sensor_readings', 'oil_level_pct'),
+    'Coolant_Level_pct': ('sensor_readings', 'coolant_level_pct'),
+    'Power_Consumption_kW': ('sensor_readings', 'power_consumption_kw'),
+    'Last_Maintenance_Days_Ago': ('maintenance_records', 'last_maintenance_days_ago'),
+    'Maintenance_History_Count': ('maintenance_records', 'maintenance_history_count'),
+    'Failure_History_Count': ('maintenance_records', 'failure_history_count'),
+    'AI_Supervision': ('ai_monitoring', 'ai_supervision'),
+    'AI_Override_Events': ('ai_monitoring', 'ai_override_events'),
+    'Error_Codes_Last_30_Days': ('ai_monitoring', 'error_codes_last_30_days'),
+    'Laser_Intensity': ('machine_specific_sensors', 'laser_intensity'),
+    'Hydraulic_Pressure_bar': ('machine_specific_sensors', 'hydraulic_pressure_bar'),
+    'Coolant_Flow_L_min': ('machine_specific_sensors', 'coolant_flow_l_min'),
+    'Heat_Index': ('machine_specific_sensors', 'heat_index'),
+    'Remaining_Useful_Life_days': ('failure_predictions', 'remaining_useful_life_days'),
+    'Failure_Within_7_Days': ('failure_predictions', 'failure_within_7_days')
+}
+
+# Horas acumuladas passam de 10^5 com casas decimais: além da precisão do float32
+FLOAT64_COLUMNS = {'operational_hours'}
+
+_INT_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+class ColumnType(NamedTuple):
+    sql_type: str
+    not_null: bool
+    primary_key: bool = False
+    lower: Optional[float] = None    # Limites de CHECK, quando existirem
+    upper: Optional[float] = None
+
+
+def parse_schema(schema_path=DEFAULT_SCHEMA_PATH) -> Dict[str, Dict[str, ColumnType]]:
+    """Tipos das colunas de cada CREATE TABLE do schema: {tabela: {coluna: ColumnType}}"""
+    sql = Path(schema_path).read_text(encoding='utf-8')
+    sql = re.sub(r'--[^\n]*', '', sql)
+
+    tables = {}
+    for table, body in re.findall(r'CREATE TABLE\s+(?:IF NOT EXISTS\s+)?(\w+)\s*\((.*?)\n\);', sql, re.S):
+        bounds = {}
+        for column, lower, upper in re.findall(r'CHECK\s*\((\w+)\s+BETWEEN\s+(-?[\d.]+)\s+AND\s+(-?[\d.]+)\)', body):
+            bounds[column] = (float(lower), float(upper))
+        for column, lower in re.findall(r'CHECK\s*\((\w+)\s*>=\s*(-?[\d.]+)\)', body):
+            bounds.setdefault(column, (float(lower), None))
+
+        columns = {}
+        for line in body.split('\n'):
+            match = re.match(r'\s*(\w+)\s+([A-Z]+)', line)
+            if not match or match.group(1).upper() in ('CONSTRAINT', 'CHECK', 'FOREIGN', 'PRIMARY', 'UNIQUE'):
+                continue
+            name, sql_type = match.groups()
+            primary_key = 'PRIMARY KEY' in line
+            not_null = 'NOT NULL' in line or primary_key
+            columns[name] = ColumnType(sql_type, not_null, primary_key, *bounds.get(name, (None, None)))
+        tables[table] = columns
+    return tables
+
+
+def _smallest_int(lower: float, upper: float, default) -> type:
+    for dtype in _INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lower and upper <= info.max:
+            return dtype
+    return default
+
+
+def pandas_dtype(column: str, column_type: ColumnType, nullable: bool = False,
+                 compact_floats: bool = True):
+    """
+    dtype pandas compacto para uma coluna do schema (None = manter o padrão).
+
+    Args:
+        nullable: Força o tipo anulável mesmo em colunas NOT NULL
+        compact_floats: float32 para DOUBLE (False mantém float64)
+    """
+    sql_type = column_type.sql_type
+    optional = nullable or not column_type.not_null
+
+    if sql_type == 'VARCHAR':
+        return None if column_type.primary_key else 'category'
+    if sql_type in ('INTEGER', 'BIGINT'):
+        width = np.int32 if sql_type == 'INTEGER' else np.int64
+        if column_type.lower is not None and column_type.upper is not None:
+            width = _smallest_int(column_type.lower, column_type.upper, width)
+        return pd.api.types.pandas_dtype(width.__name__.capitalize()) if optional else width
+    if sql_type == 'DOUBLE':
+        if column in FLOAT64_COLUMNS or not compact_floats:
+            return 'Float64' if optional else np.float64
+        return 'Float32' if optional else np.float32
+    if sql_type == 'BOOLEAN':
+        return 'boolean' if optional else bool
+    return None
+
+
+def _column_types(schema_path) -> Dict[str, ColumnType]:
+    """
+    Tipos por nome de coluna, só das tabelas de histórico (as do CSV_COLUMNS).
+
+    Tabelas derivadas (ex.: machine_current_state) repetem colunas como
+    anuláveis e não podem sobrescrever a definição NOT NULL do histórico.
+    """
+    schema = parse_schema(schema_path)
+    return {column: column_type
+            for table in dict.fromkeys(table for table, _ in CSV_COLUMNS.values())
+            for column, column_type in schema[table].items()}
+
+
+def csv_dtypes(schema_path=DEFAULT_SCHEMA_PATH, nullable: bool = False,
+               compact_floats: bool = True) -> dict:
+    """
+    Mapa dtype para pd.read_csv do CSV do simulador.
+
+    Args:
+        nullable: Usa tipos anuláveis também nas colunas NOT NULL (para CSVs
+                  com valores ausentes, que o int/bool do NumPy não aceitam)
+        compact_floats: float32 para DOUBLE; o ETL usa False (valores exatos no banco)
+    """
+    schema = parse_schema(schema_path)
+    dtypes = {}
+    for csv_column, (table, column) in CSV_COLUMNS.items():
+        dtype = pandas_dtype(column, schema[table][column], nullable, compact_floats)
+        if dtype is not None:
+            dtypes[csv_column] = dtype
+    return dtypes
+
+
+def frame_dtypes(schema_path=DEFAULT_SCHEMA_PATH) -> dict:
+    """Mapa dtype pelos nomes das colunas do banco (frames lidos do DuckDB)"""
+    return {column: dtype for column, column_type in _column_types(schema_path).items()
+            if (dtype := pandas_dtype(column, column_type)) is not None}
+
+
+def downcast_integers(df: pd.DataFrame) -> pd.DataFrame:
+    """Reduz colunas inteiras ao menor tipo que comporta os valores lidos"""
+    for column in df.select_dtypes(include=['integer']).columns:
+        if isinstance(df[column].dtype, np.dtype):
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+    return df
+
+
+def _accepts_missing(dtype) -> bool:
+    return not (dtype is bool or (isinstance(dtype, type) and issubclass(dtype, np.integer)))
+
+
+def compact_frame(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """Aplica o mapa de dtypes às colunas presentes e reduz os inteiros"""
+    for column, dtype in dtypes.items():
+        if column not in df.columns:
+            continue
+        # Colunas NOT NULL vindas de LEFT JOIN podem ter nulos: mantém o tipo original
+        if not _accepts_missing(dtype) and df[column].isna().any():
+            continue
+        df[column] = df[column].astype(dtype)
+    return downcast_integers(df)
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 1024**2
@@ -0,0 +1 @@
+"""CLI unificada do projeto (hermes etl | train | score | report | ...)"""
@@ -0,0 +1,58 @@
+"""
+CLI unificada do projeto
+Hermes Reply Challenge - Fase 5
+
+Ponto de entrada único (console script `hermes`, definido no pyproject.toml):
+
+    hermes etl --project-root .
+    hermes train --project-root . --cv-folds 5
+    hermes score --project-root . --output scores.csv
+    hermes report --project-root . --preview
+
+Cada subcomando vive no seu próprio módulo, importado apenas quando é
+chamado: `hermes --help` não importa pandas, DuckDB nem scikit-learn, e
+`hermes score` não paga o import de matplotlib usado só nos relatórios.
+"""
+
+import argparse
+import importlib
+import sys
+from pathlib import Path
+
+# Permite `python src/hermes/cli.py` sem instalar o pacote
+SRC_ROOT = Path(__file__).resolve().parents[1]
+if str(SRC_ROOT) not in sys.path:
+    sys.path.insert(0, str(SRC_ROOT))
+
+# subcomando -> (módulo com main(argv, prog), descrição)
+COMMANDS = {
+    'etl': ('etl.load_to_duckdb', 'Carregar o CSV de sensores no DuckDB'),
+    'train': ('ml.model_trainer', 'Treinar e registrar o modelo de predição de falhas'),
+    'score': ('ml.scoring', 'Pontuar leituras com o modelo em produção'),
+    'report': ('ml.reporting', 'Renderizar as figuras do último treinamento'),
+    'features': ('ml.feature_engine', 'Materializar features temporais dos sensores'),
+    'drift': ('ml.drift_monitor', 'Calcular drift das leituras novas'),
+    'registry': ('ml.model_registry', 'Gerenciar o registro de modelos'),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='hermes',
+        description='Hermes Reply - pipeline de dados e ML de manutenção preditiva',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='subcomandos:\n' + '\n'.join(f'  {name:<10} {description}'
+                                            for name, (_, description) in COMMANDS.items())
+    )
+    parser.add_argument('command', choices=COMMANDS, metavar='subcomando')
+    parser.add_argument('args', nargs=argparse.REMAINDER,
+                        help='argumentos do subcomando (hermes <subcomando> --help)')
+    args = parser.parse_args(argv)
+
+    module_name, _ = COMMANDS[args.command]
+    module = importlib.import_module(module_name)
+    module.main(args.args, prog=f'hermes {args.command}')
+
+
+if __name__ == "__main__":
+    main()
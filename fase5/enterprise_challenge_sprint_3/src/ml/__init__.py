@@ -0,0 +1 @@
+"""Treinamento, avaliação e relatórios dos modelos de predição de falhas"""
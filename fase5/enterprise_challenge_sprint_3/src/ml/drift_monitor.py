@@ -0,0 +1,316 @@
+"""
+Monitoramento de drift dos sensores
+Hermes Reply Challenge - Fase 5
+
+Compara a distribuição das leituras novas de sensor_readings com a
+distribuição vista no treinamento do modelo em produção.
+
+Funcionalidades:
+- Perfil compacto por feature no treino (bins por quantis + proporções)
+- PSI e KS calculados dentro do DuckDB, em janelas de leituras novas
+- Watermark por versão do modelo: cada leitura é processada uma única vez
+  por carga do ETL (etl_loads); uma carga nova recomeça do início
+- Tabela drift_scores com flag de drift, consultada para disparar retreino
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Sensores monitorados (colunas de sensor_readings que também são features do modelo)
+SENSOR_FEATURES = [
+    'temperature_c', 'vibration_mms', 'sound_db',
+    'oil_level_pct', 'coolant_level_pct', 'power_consumption_kw'
+]
+
+# Limiares usuais: PSI >= 0.2 indica mudança significativa de distribuição
+PSI_THRESHOLD = 0.2
+KS_THRESHOLD = 0.1
+
+DRIFT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drift_reference (
+    model_version VARCHAR NOT NULL,
+    feature VARCHAR NOT NULL,
+    bin_index INTEGER NOT NULL,
+    lower_bound DOUBLE NOT NULL,          -- -inf no primeiro bin
+    upper_bound DOUBLE NOT NULL,          -- +inf no último bin
+    expected_pct DOUBLE NOT NULL,         -- Proporção do treino no bin
+    PRIMARY KEY (model_version, feature, bin_index)
+);
+
+CREATE TABLE IF NOT EXISTS drift_watermark (
+    model_version VARCHAR PRIMARY KEY,
+    last_reading_id BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS drift_scores (
+    model_version VARCHAR NOT NULL,
+    feature VARCHAR NOT NULL,
+    first_reading_id BIGINT NOT NULL,
+    last_reading_id BIGINT NOT NULL,
+    window_start TIMESTAMP,
+    window_end TIMESTAMP,
+    n_readings BIGINT NOT NULL,
+    psi DOUBLE NOT NULL,
+    ks DOUBLE NOT NULL,
+    drift_detected BOOLEAN NOT NULL,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Bancos criados antes do controle de cargas
+ALTER TABLE drift_watermark ADD COLUMN IF NOT EXISTS load_id BIGINT;
+ALTER TABLE drift_scores ADD COLUMN IF NOT EXISTS load_id BIGINT;
+"""
+
+
+def build_training_profile(X: pd.DataFrame, n_bins: int = 20) -> dict:
+    """
+    Gera o perfil de distribuição (sketch) das features de sensor no treino.
+
+    Os limites dos bins são quantis do treino, então cada bin tem ~1/n_bins
+    das amostras; as proporções reais são guardadas para lidar com empates.
+    """
+    profile = {'n_bins': n_bins, 'n_samples': int(len(X)), 'features': {}}
+
+    for feature in SENSOR_FEATURES:
+        if feature not in X.columns:
+            continue
+
+        values = X[feature].dropna().to_numpy(dtype=np.float64)
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1))[1:-1])
+        counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+
+        profile['features'][feature] = {
+            'edges': [float(e) for e in edges],
+            'expected_pct': [float(c) for c in counts / counts.sum()],
+            'mean': float(values.mean()),
+            'std': float(values.std())
+        }
+
+    return profile
+
+
+class DriftMonitor:
+    """Calcula PSI/KS incrementalmente sobre sensor_readings no DuckDB"""
+
+    def __init__(self, connection: duckdb.DuckDBPyConnection, model_version: str,
+                 profile: dict, window_size: int = 10_000):
+        """
+        Args:
+            connection: Conexão com o banco que contém sensor_readings
+            model_version: Versão do modelo cujo perfil de treino é a referência
+            profile: Perfil gerado por build_training_profile
+            window_size: Número de leituras por janela de avaliação
+        """
+        self.connection = connection
+        self.model_version = model_version
+        self.profile = profile
+        self.window_size = window_size
+        self.features = list(profile['features'])
+
+        self.connection.execute(DRIFT_SCHEMA)
+        self._load_reference()
+
+    def _load_reference(self) -> None:
+        """Materializa os bins de referência no banco (idempotente)"""
+        rows = []
+        for feature, sketch in self.profile['features'].items():
+            bounds = [-np.inf] + sketch['edges'] + [np.inf]
+            for i, pct in enumerate(sketch['expected_pct']):
+                rows.append((self.model_version, feature, i, bounds[i], bounds[i + 1], pct))
+
+        reference_df = pd.DataFrame(rows, columns=[
+            'model_version', 'feature', 'bin_index', 'lower_bound', 'upper_bound', 'expected_pct'
+        ])
+        self.connection.execute("DELETE FROM drift_reference WHERE model_version = ?", [self.model_version])
+        self.connection.register('drift_reference_temp', reference_df)
+        self.connection.execute("INSERT INTO drift_reference SELECT * FROM drift_reference_temp")
+        self.connection.unregister('drift_reference_temp')
+
+    def _load_id(self) -> Optional[int]:
+        """Carga atual do ETL (None se o banco não registra cargas)"""
+        try:
+            return self.connection.execute("SELECT MAX(load_id) FROM etl_loads").fetchone()[0]
+        except duckdb.CatalogException:
+            return None
+
+    def _watermark(self, load_id: Optional[int]) -> int:
+        row = self.connection.execute(
+            "SELECT last_reading_id, load_id FROM drift_watermark WHERE model_version = ?", [self.model_version]
+        ).fetchone()
+        watermark, scored_load_id = row if row else (0, load_id)
+
+        # Recarga completa do ETL reinicia os IDs: recomeçar do início
+        max_id = self.connection.execute("SELECT COALESCE(MAX(reading_id), 0) FROM sensor_readings").fetchone()[0]
+        if scored_load_id != load_id or watermark > max_id:
+            logger.warning("sensor_readings foi recarregada desde a última avaliação. Reiniciando.")
+            watermark = 0
+        return watermark
+
+    def _score_window(self, first_id: int, last_id: int) -> pd.DataFrame:
+        """PSI e KS de uma janela de leituras, inteiramente em SQL"""
+        columns = ', '.join(self.features)
+
+        return self.connection.execute(f"""
+            WITH window_readings AS (
+                SELECT reading_id, reading_timestamp, {columns}
+                FROM sensor_readings
+                WHERE reading_id > ? AND reading_id <= ?
+            ),
+            long_values AS (
+                UNPIVOT window_readings
+                ON {columns}
+                INTO NAME feature VALUE value
+            ),
+            bin_counts AS (
+                SELECT r.feature, r.bin_index, r.expected_pct, COUNT(v.value) AS n
+                FROM drift_reference r
+                LEFT JOIN long_values v
+                    ON v.feature = r.feature
+                   AND v.value >= r.lower_bound AND v.value < r.upper_bound
+                WHERE r.model_version = ?
+                GROUP BY ALL
+            ),
+            distributions AS (
+                SELECT
+                    feature, bin_index, expected_pct,
+                    n / SUM(n) OVER (PARTITION BY feature) AS actual_pct,
+                    SUM(n) OVER (PARTITION BY feature) AS n_readings,
+                    SUM(expected_pct) OVER w AS expected_cdf,
+                    SUM(n) OVER w / SUM(n) OVER (PARTITION BY feature) AS actual_cdf
+                FROM bin_counts
+                WINDOW w AS (PARTITION BY feature ORDER BY bin_index
+                             ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+            )
+            SELECT
+                feature,
+                MAX(n_readings)::BIGINT AS n_readings,
+                SUM((GREATEST(actual_pct, 1e-6) - GREATEST(expected_pct, 1e-6))
+                    * LN(GREATEST(actual_pct, 1e-6) / GREATEST(expected_pct, 1e-6))) AS psi,
+                MAX(ABS(actual_cdf - expected_cdf)) AS ks,
+                (SELECT MIN(reading_timestamp) FROM window_readings) AS window_start,
+                (SELECT MAX(reading_timestamp) FROM window_readings) AS window_end
+            FROM distributions
+            GROUP BY feature
+        """, [first_id, last_id, self.model_version]).df()
+
+    def run(self, flush: bool = False) -> pd.DataFrame:
+        """
+        Processa as janelas completas de leituras novas desde a última execução.
+
+        Args:
+            flush: Se True, também avalia a última janela incompleta
+
+        Returns:
+            Scores gravados em drift_scores nesta execução
+        """
+        load_id = self._load_id()
+        watermark = self._watermark(load_id)
+        max_id = self.connection.execute("SELECT COALESCE(MAX(reading_id), 0) FROM sensor_readings").fetchone()[0]
+
+        scored = []
+        while max_id - watermark >= self.window_size or (flush and max_id > watermark):
+            last_id = min(watermark + self.window_size, max_id)
+            scores = self._score_window(watermark, last_id)
+
+            scores['model_version'] = self.model_version
+            scores['first_reading_id'] = watermark + 1
+            scores['last_reading_id'] = last_id
+            scores['load_id'] = load_id
+            scores['drift_detected'] = (scores['psi'] >= PSI_THRESHOLD) | (scores['ks'] >= KS_THRESHOLD)
+
+            self.connection.execute("BEGIN TRANSACTION")
+            self.connection.register('drift_scores_temp', scores)
+            self.connection.execute("""
+                INSERT INTO drift_scores
+                    (model_version, feature, first_reading_id, last_reading_id, window_start,
+                     window_end, n_readings, psi, ks, drift_detected, load_id)
+                SELECT model_version, feature, first_reading_id, last_reading_id, window_start,
+                       window_end, n_readings, psi, ks, drift_detected, load_id
+                FROM drift_scores_temp
+            """)
+            self.connection.unregister('drift_scores_temp')
+            self.connection.execute("""
+                INSERT OR REPLACE INTO drift_watermark (model_version, last_reading_id, load_id)
+                VALUES (?, ?, ?)
+            """, [self.model_version, last_id, load_id])
+            self.connection.execute("COMMIT")
+
+            drifted = scores.loc[scores['drift_detected'], 'feature'].tolist()
+            logger.info(f"Janela {watermark + 1}-{last_id}: drift em {drifted if drifted else 'nenhuma feature'}")
+
+            scored.append(scores)
+            watermark = last_id
+
+        if not scored:
+            logger.info("Nenhuma janela completa de leituras novas")
+            return pd.DataFrame()
+        return pd.concat(scored, ignore_index=True)
+
+    def drifted_features(self, last_windows: int = 1) -> List[str]:
+        """Features com drift nas últimas janelas avaliadas (gatilho de retreino)"""
+        # IDs recomeçam a cada carga: a janela mais recente é a da carga mais nova
+        rows = self.connection.execute("""
+            WITH recent AS (
+                SELECT DISTINCT load_id, last_reading_id FROM drift_scores
+                WHERE model_version = ?
+                ORDER BY load_id DESC NULLS LAST, last_reading_id DESC
+                LIMIT ?
+            )
+            SELECT DISTINCT s.feature FROM drift_scores s
+            JOIN recent r
+              ON s.load_id IS NOT DISTINCT FROM r.load_id AND s.last_reading_id = r.last_reading_id
+            WHERE s.model_version = ? AND s.drift_detected
+            ORDER BY s.feature
+        """, [self.model_version, last_windows, self.model_version]).fetchall()
+        return [row[0] for row in rows]
+
+
+def main(argv=None, prog=None):
+    # Permite executar como script importando os pacotes de src/
+    src_root = Path(__file__).resolve().parents[1]
+    if str(src_root) not in sys.path:
+        sys.path.insert(0, str(src_root))
+    from ml.model_registry import ModelRegistry
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(prog=prog, description='Monitorar drift dos sensores')
+    parser.add_argument('--project-root', type=str, default='.',
+                        help='Caminho raiz do projeto')
+    parser.add_argument('--window-size', type=int, default=10_000,
+                        help='Leituras por janela de avaliação')
+    parser.add_argument('--flush', action='store_true',
+                        help='Avaliar também a última janela incompleta')
+    args = parser.parse_args(argv)
+
+    project_root = Path(args.project_root)
+    _, metadata = ModelRegistry(project_root / 'models').load()
+    if not metadata.get('drift_profile'):
+        logger.error(f"Versão {metadata['model_version']} não possui perfil de drift")
+        sys.exit(1)
+
+    conn = duckdb.connect(str(project_root / 'db/hermes_reply.duckdb'))
+    try:
+        monitor = DriftMonitor(conn, metadata['model_version'], metadata['drift_profile'],
+                               window_size=args.window_size)
+        monitor.run(flush=args.flush)
+        drifted = monitor.drifted_features()
+    finally:
+        conn.close()
+
+    if drifted:
+        logger.warning(f"Drift detectado em {drifted}: retreino recomendado")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
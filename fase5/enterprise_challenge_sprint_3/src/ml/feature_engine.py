@@ -0,0 +1,249 @@
+"""
+Engine de features temporais por máquina
+Hermes Reply Challenge - Fase 5
+
+Calcula features de tendência sobre sensor_readings usando window functions
+do DuckDB, sem trazer o histórico para o pandas.
+
+Funcionalidades:
+- Média móvel (últimas N leituras e últimas 24h), inclinação (regr_slope),
+  suavização exponencial e delta em relação à leitura anterior
+- Materialização incremental em sensor_features: só as máquinas com leituras
+  novas são recalculadas, a partir da leitura nova mais antiga; uma carga
+  nova do ETL (etl_loads) rematerializa tudo
+- Janelas apenas com leituras passadas e join ASOF (point-in-time), sem leakage
+"""
+
+import argparse
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+# Sensores com features de tendência
+TREND_SENSORS = ['temperature_c', 'vibration_mms', 'power_consumption_kw']
+
+ROLLING_ROWS = 5              # Leituras na média móvel / inclinação
+ROLLING_RANGE = '24 HOURS'    # Janela temporal da média móvel
+EWM_ALPHA = 0.3               # Fator de suavização exponencial
+EWM_LAGS = 12                 # Lags considerados (peso residual < 1.5%)
+
+
+def feature_columns() -> List[str]:
+    """Nomes das colunas de features geradas, na ordem da tabela"""
+    columns = []
+    for sensor in TREND_SENSORS:
+        columns += [
+            f'{sensor}_mean_{ROLLING_ROWS}',
+            f'{sensor}_mean_24h',
+            f'{sensor}_slope_{ROLLING_ROWS}',
+            f'{sensor}_ewm',
+            f'{sensor}_delta_1'
+        ]
+    return columns
+
+
+def _ewm_expression(sensor: str) -> str:
+    """
+    Suavização exponencial truncada em EWM_LAGS leituras, via LAG.
+
+    Os pesos alpha*(1-alpha)^k são renormalizados pelos lags existentes,
+    então o início da série de cada máquina também é tratado.
+    """
+    numerator, denominator = [], []
+    for k in range(EWM_LAGS):
+        weight = EWM_ALPHA * (1 - EWM_ALPHA) ** k
+        value = sensor if k == 0 else f'LAG({sensor}, {k}) OVER w_order'
+        numerator.append(f'{weight:.10f} * COALESCE({value}, 0)')
+        denominator.append(f'{weight:.10f} * ({value} IS NOT NULL)::INTEGER')
+    return f"({' + '.join(numerator)}) / ({' + '.join(denominator)})"
+
+
+def _feature_select() -> str:
+    """Lista SELECT com todas as features (somente leituras passadas e atual)"""
+    expressions = []
+    for sensor in TREND_SENSORS:
+        expressions += [
+            f'AVG({sensor}) OVER w_rows AS {sensor}_mean_{ROLLING_ROWS}',
+            f'AVG({sensor}) OVER w_range AS {sensor}_mean_24h',
+            # Inclinação em unidades por hora
+            f'REGR_SLOPE({sensor}, EPOCH(reading_timestamp) / 3600.0) OVER w_rows AS {sensor}_slope_{ROLLING_ROWS}',
+            f'{_ewm_expression(sensor)} AS {sensor}_ewm',
+            f'{sensor} - LAG({sensor}) OVER w_order AS {sensor}_delta_1'
+        ]
+    return ',\n                '.join(expressions)
+
+
+class FeatureEngine:
+    """Materializa e expõe features temporais de sensor_readings"""
+
+    def __init__(self, connection: duckdb.DuckDBPyConnection):
+        self.connection = connection
+        self._create_tables()
+
+    def _create_tables(self) -> None:
+        column_defs = ',\n                '.join(f'{c} DOUBLE' for c in feature_columns())
+        self.connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS sensor_features (
+                reading_id BIGINT PRIMARY KEY,
+                machine_id VARCHAR(50) NOT NULL,
+                reading_timestamp TIMESTAMP NOT NULL,
+                {column_defs}
+            )
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS feature_watermark (
+                feature_set VARCHAR PRIMARY KEY,
+                last_reading_id BIGINT NOT NULL
+            )
+        """)
+        # Bancos criados antes do controle de cargas
+        self.connection.execute("ALTER TABLE feature_watermark ADD COLUMN IF NOT EXISTS load_id BIGINT")
+        self.connection.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sensor_features_machine_timestamp
+                ON sensor_features(machine_id, reading_timestamp)
+        """)
+
+    def _load_id(self) -> Optional[int]:
+        """Carga atual do ETL (None se o banco não registra cargas)"""
+        try:
+            return self.connection.execute("SELECT MAX(load_id) FROM etl_loads").fetchone()[0]
+        except duckdb.CatalogException:
+            return None
+
+    def _watermark(self, load_id: Optional[int]) -> int:
+        row = self.connection.execute(
+            "SELECT last_reading_id, load_id FROM feature_watermark WHERE feature_set = 'sensor_trends'"
+        ).fetchone()
+        watermark, features_load_id = row if row else (0, load_id)
+
+        max_id = self.connection.execute("SELECT COALESCE(MAX(reading_id), 0) FROM sensor_readings").fetchone()[0]
+        if features_load_id != load_id or watermark > max_id:
+            # Recarga completa do ETL reinicia os IDs: as features gravadas são de outras leituras
+            logger.warning("sensor_readings foi recarregada. Recalculando todas as features.")
+            self.connection.execute("DELETE FROM sensor_features")
+            self.connection.execute("DELETE FROM feature_watermark WHERE feature_set = 'sensor_trends'")
+            watermark = 0
+        return watermark
+
+    def refresh(self) -> int:
+        """
+        Materializa as features das leituras novas desde a última execução.
+
+        Para cada máquina com leituras novas, recalcula a partir da leitura nova
+        mais antiga (cobre leituras atrasadas), usando como contexto as
+        leituras anteriores necessárias para as janelas. O watermark vale só
+        para a carga do ETL em que foi gravado.
+
+        Returns:
+            Número de linhas de features gravadas
+        """
+        load_id = self._load_id()
+        watermark = self._watermark(load_id)
+        max_id = self.connection.execute("SELECT COALESCE(MAX(reading_id), 0) FROM sensor_readings").fetchone()[0]
+        if max_id <= watermark:
+            logger.info("Features temporais já atualizadas")
+            return 0
+
+        context_rows = max(ROLLING_ROWS, EWM_LAGS)
+
+        self.connection.execute("BEGIN TRANSACTION")
+        self.connection.execute("""
+            CREATE OR REPLACE TEMP TABLE affected_machines AS
+            SELECT machine_id, MIN(reading_timestamp) AS since
+            FROM sensor_readings
+            WHERE reading_id > ? AND reading_id <= ?
+            GROUP BY machine_id
+        """, [watermark, max_id])
+
+        self.connection.execute(f"""
+            CREATE OR REPLACE TEMP TABLE feature_batch AS
+            WITH machine_history AS (
+                SELECT sr.reading_id, sr.machine_id, sr.reading_timestamp, {', '.join('sr.' + s for s in TREND_SENSORS)},
+                       am.since,
+                       sr.reading_timestamp >= am.since AS is_target,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY sr.machine_id, sr.reading_timestamp >= am.since
+                           ORDER BY sr.reading_timestamp DESC, sr.reading_id DESC
+                       ) AS recency
+                FROM sensor_readings sr
+                JOIN affected_machines am ON sr.machine_id = am.machine_id
+            ),
+            windowed_input AS (
+                -- Alvos + contexto: últimas leituras antes do alvo e as de 24h antes
+                SELECT * FROM machine_history
+                WHERE is_target
+                   OR recency <= {context_rows}
+                   OR reading_timestamp >= since - INTERVAL {ROLLING_RANGE}
+            ),
+            features AS (
+                SELECT
+                    reading_id, machine_id, reading_timestamp, is_target,
+                    {_feature_select()}
+                FROM windowed_input
+                WINDOW
+                    w_order AS (PARTITION BY machine_id ORDER BY reading_timestamp, reading_id),
+                    w_rows AS (PARTITION BY machine_id ORDER BY reading_timestamp, reading_id
+                               ROWS BETWEEN {ROLLING_ROWS - 1} PRECEDING AND CURRENT ROW),
+                    w_range AS (PARTITION BY machine_id ORDER BY reading_timestamp
+                                RANGE BETWEEN INTERVAL {ROLLING_RANGE} PRECEDING AND CURRENT ROW)
+            )
+            SELECT * EXCLUDE (is_target) FROM features WHERE is_target
+        """)
+
+        self.connection.execute("""
+            INSERT OR REPLACE INTO sensor_features
+            SELECT * FROM feature_batch
+        """)
+        written = self.connection.execute("SELECT COUNT(*) FROM feature_batch").fetchone()[0]
+        self.connection.execute("""
+            INSERT OR REPLACE INTO feature_watermark (feature_set, last_reading_id, load_id)
+            VALUES ('sensor_trends', ?, ?)
+        """, [max_id, load_id])
+        self.connection.execute("COMMIT")
+        self.connection.execute("DROP TABLE IF EXISTS feature_batch")
+        self.connection.execute("DROP TABLE IF EXISTS affected_machines")
+
+        logger.info(f"Features temporais materializadas: {written:,} leituras (até reading_id {max_id:,})")
+        return written
+
+    def create_training_view(self) -> None:
+        """
+        Cria vw_ml_features: vw_ml_dataset + features temporais point-in-time.
+
+        O ASOF JOIN pega, para cada linha, as features da última leitura da
+        mesma máquina com timestamp <= ao da linha (nunca leituras futuras).
+        """
+        columns = ', '.join(f'f.{c}' for c in feature_columns())
+        self.connection.execute(f"""
+            CREATE OR REPLACE VIEW vw_ml_features AS
+            SELECT d.*, {columns}
+            FROM vw_ml_dataset d
+            ASOF LEFT JOIN sensor_features f
+                ON d.machine_id = f.machine_id
+               AND d.reading_timestamp >= f.reading_timestamp
+        """)
+
+
+def main(argv=None, prog=None):
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(prog=prog, description='Materializar features temporais dos sensores')
+    parser.add_argument('--project-root', type=str, default='.',
+                        help='Caminho raiz do projeto')
+    args = parser.parse_args(argv)
+
+    conn = duckdb.connect(str(Path(args.project_root) / 'db/hermes_reply.duckdb'))
+    try:
+        engine = FeatureEngine(conn)
+        engine.refresh()
+        engine.create_training_view()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Registro local de modelos versionados
+Hermes Reply Challenge - Fase 5
+
+Cada treinamento gera uma nova versão em models/registry/vNNNN/ em vez de
+sobrescrever o modelo anterior. Os metadados de todas as versões ficam
+indexados em DuckDB (models/registry.duckdb).
+
+Funcionalidades:
+- Diretórios versionados com modelo, pré-processadores e metadados
+- Índice em DuckDB com métricas e estágio (staging/production/archived)
+- Promoção e rollback da versão em produção, com histórico de promoções:
+  rollbacks sucessivos voltam uma promoção por vez
+- Artefatos salvos sem compressão para carga com mmap_mode: os arrays NumPy
+  são lidos direto do arquivo mapeado em memória, sem passar pelo unpickler
+"""
+
+import argparse
+import json
+import logging
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import duckdb
+import joblib
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_versions (
+    version INTEGER PRIMARY KEY,                 -- Número sequencial da versão
+    model_version VARCHAR NOT NULL,              -- Rótulo (v0001, v0002, ...)
+    model_name VARCHAR NOT NULL,                 -- Algoritmo (Random Forest, ...)
+    artifact_dir VARCHAR NOT NULL,               -- Diretório relativo a models/
+    roc_auc DOUBLE,                              -- Métrica principal de seleção
+    metrics JSON,                                -- Todas as métricas de teste
+    stage VARCHAR NOT NULL DEFAULT 'staging',    -- staging | production | archived
+    created_at TIMESTAMP NOT NULL,
+    promoted_at TIMESTAMP                        -- Última promoção para produção
+);
+
+CREATE TABLE IF NOT EXISTS promotions (
+    promotion_id INTEGER PRIMARY KEY,            -- Ordem das promoções
+    version INTEGER NOT NULL,                    -- Versão colocada em produção
+    promoted_at TIMESTAMP NOT NULL,
+    rolled_back_at TIMESTAMP                     -- Preenchido quando desfeita por rollback
+);
+
+-- Registros anteriores ao histórico: uma promoção por versão, na ordem de promoted_at
+INSERT INTO promotions
+SELECT ROW_NUMBER() OVER (ORDER BY promoted_at, version), version, promoted_at, NULL
+FROM model_versions
+WHERE promoted_at IS NOT NULL AND NOT EXISTS (SELECT 1 FROM promotions);
+"""
+
+
+class ModelRegistry:
+    """Registro de modelos com versões imutáveis e índice em DuckDB"""
+
+    def __init__(self, models_path: Path):
+        self.models_path = Path(models_path)
+        self.registry_path = self.models_path / 'registry'
+        self.index_path = self.models_path / 'registry.duckdb'
+        self.registry_path.mkdir(parents=True, exist_ok=True)
+
+    def _connect(self, read_only: bool = False) -> duckdb.DuckDBPyConnection:
+        if read_only and self.index_path.exists():
+            return duckdb.connect(str(self.index_path), read_only=True)
+
+        conn = duckdb.connect(str(self.index_path))
+        conn.execute(REGISTRY_SCHEMA)
+        return conn
+
+    @staticmethod
+    def format_version(version: int) -> str:
+        return f'v{version:04d}'
+
+    def register(self, model, model_name: str, metrics: dict, feature_names: list,
+                 artifacts: Optional[Dict[str, object]] = None,
+                 metadata: Optional[dict] = None) -> str:
+        """
+        Registra uma nova versão do modelo.
+
+        Args:
+            model: Estimador treinado
+            model_name: Nome do algoritmo
+            metrics: Métricas de teste (deve conter roc_auc)
+            feature_names: Ordem das features esperada pelo modelo
+            artifacts: Objetos auxiliares (scaler, label encoder, ...)
+            metadata: Informações adicionais gravadas no metadata.json
+
+        Returns:
+            Rótulo da versão criada (ex.: v0003)
+        """
+        conn = self._connect()
+        try:
+            version = conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM model_versions").fetchone()[0]
+            model_version = self.format_version(version)
+            version_dir = self.registry_path / model_version
+            if version_dir.exists():
+                # Diretório sem linha no índice (índice apagado ou restaurado de backup): não sobrescrever
+                raise FileExistsError(f"{version_dir} já existe, mas {model_version} não está no índice "
+                                      f"{self.index_path}; mova o diretório ou restaure o índice")
+            tmp_dir = self.registry_path / f'.{model_version}.tmp'
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            tmp_dir.mkdir(parents=True)
+
+            # Sem compressão: permite joblib.load(..., mmap_mode='r')
+            joblib.dump(model, tmp_dir / 'model.joblib')
+            for name, obj in (artifacts or {}).items():
+                joblib.dump(obj, tmp_dir / f'{name}.joblib')
+
+            created_at = datetime.now()
+            version_metadata = {
+                'model_name': model_name,
+                'model_version': model_version,
+                'model_file': 'model.joblib',
+                'artifacts': sorted(artifacts or {}),
+                'metrics': metrics,
+                'feature_names': feature_names,
+                'training_date': created_at.isoformat(),
+                **(metadata or {})
+            }
+            with open(tmp_dir / 'metadata.json', 'w') as f:
+                json.dump(version_metadata, f, indent=2)
+
+            # Linha do índice e diretório publicados juntos: se um falhar, o outro é desfeito
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                conn.execute("""
+                    INSERT INTO model_versions
+                        (version, model_version, model_name, artifact_dir, roc_auc, metrics, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [version, model_version, model_name,
+                      str(version_dir.relative_to(self.models_path)),
+                      metrics.get('roc_auc'), json.dumps(metrics), created_at])
+                tmp_dir.rename(version_dir)  # Publicação atômica do diretório da versão
+            except Exception:
+                conn.execute("ROLLBACK")
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise
+            try:
+                conn.execute("COMMIT")
+            except Exception:
+                shutil.rmtree(version_dir, ignore_errors=True)
+                raise
+        finally:
+            conn.close()
+
+        logger.info(f"Modelo registrado: {model_name} {model_version} ({version_dir})")
+        return model_version
+
+    def _resolve(self, conn, model_version: Optional[str]) -> Tuple[int, str, str]:
+        if model_version is None:
+            row = conn.execute("""
+                SELECT version, model_version, artifact_dir FROM model_versions
+                WHERE stage = 'production'
+            """).fetchone()
+            if row is None:
+                raise LookupError("Nenhuma versão em produção no registro")
+        else:
+            row = conn.execute("""
+                SELECT version, model_version, artifact_dir FROM model_versions
+                WHERE model_version = ?
+            """, [model_version]).fetchone()
+            if row is None:
+                raise LookupError(f"Versão não encontrada no registro: {model_version}")
+        return row
+
+    def production_version(self) -> Optional[str]:
+        """Rótulo da versão em produção (None se não houver)"""
+        if not self.index_path.exists():
+            return None
+        conn = self._connect(read_only=True)
+        try:
+            row = conn.execute(
+                "SELECT model_version FROM model_versions WHERE stage = 'production'"
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_production(conn, version: int, promoted_at: datetime) -> None:
+        conn.execute("UPDATE model_versions SET stage = 'archived' WHERE stage = 'production'")
+        conn.execute("""
+            UPDATE model_versions SET stage = 'production', promoted_at = ?
+            WHERE version = ?
+        """, [promoted_at, version])
+
+    def promote(self, model_version: str) -> None:
+        """Coloca a versão em produção, arquivando a versão anterior, e empilha a promoção no histórico"""
+        conn = self._connect()
+        try:
+            version, model_version, _ = self._resolve(conn, model_version)
+            stage = conn.execute("SELECT stage FROM model_versions WHERE version = ?", [version]).fetchone()[0]
+            if stage == 'production':
+                logger.info(f"Versão {model_version} já está em produção")
+                return
+            promoted_at = datetime.now()
+            conn.execute("BEGIN TRANSACTION")
+            self._set_production(conn, version, promoted_at)
+            conn.execute("""
+                INSERT INTO promotions (promotion_id, version, promoted_at)
+                SELECT COALESCE(MAX(promotion_id), 0) + 1, ?, ? FROM promotions
+            """, [version, promoted_at])
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        logger.info(f"Versão promovida para produção: {model_version}")
+
+    def rollback(self) -> str:
+        """
+        Desfaz a última promoção ativa e volta para a versão da promoção anterior.
+
+        Rollbacks sucessivos percorrem o histórico para trás (v3 -> v2 -> v1);
+        uma promoção nova volta a ser o topo do histórico.
+        """
+        conn = self._connect()
+        try:
+            active = conn.execute("""
+                SELECT p.promotion_id, v.version, v.model_version
+                FROM promotions p JOIN model_versions v ON v.version = p.version
+                WHERE p.rolled_back_at IS NULL
+                ORDER BY p.promotion_id DESC
+                LIMIT 2
+            """).fetchall()
+            if len(active) < 2:
+                raise LookupError("Não há promoção anterior para rollback")
+
+            (latest_id, _, _), (_, version, model_version) = active
+            now = datetime.now()
+            conn.execute("BEGIN TRANSACTION")
+            conn.execute("UPDATE promotions SET rolled_back_at = ? WHERE promotion_id = ?", [now, latest_id])
+            self._set_production(conn, version, now)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        logger.info(f"Rollback: versão {model_version} de volta em produção")
+        return model_version
+
+    def load(self, model_version: Optional[str] = None, mmap: bool = True) -> Tuple[object, dict]:
+        """
+        Carrega modelo e metadados (produção por padrão).
+
+        Com mmap=True os arrays NumPy são mapeados em memória (somente leitura),
+        evitando a cópia pelo unpickler e permitindo que processos de scoring
+        compartilhem as páginas do arquivo.
+        """
+        conn = self._connect(read_only=True)
+        try:
+            _, _, artifact_dir = self._resolve(conn, model_version)
+        finally:
+            conn.close()
+
+        version_dir = self.models_path / artifact_dir
+        with open(version_dir / 'metadata.json', 'r') as f:
+            metadata = json.load(f)
+
+        mmap_mode = 'r' if mmap else None
+        model = joblib.load(version_dir / metadata['model_file'], mmap_mode=mmap_mode)
+        return model, metadata
+
+    def version_dir(self, model_version: Optional[str] = None) -> Path:
+        """Diretório de uma versão (produção por padrão)"""
+        conn = self._connect(read_only=True)
+        try:
+            _, _, artifact_dir = self._resolve(conn, model_version)
+        finally:
+            conn.close()
+        return self.models_path / artifact_dir
+
+    def load_artifact(self, name: str, model_version: Optional[str] = None, mmap: bool = False):
+        """Carrega um artefato auxiliar (ex.: scaler) de uma versão; mmap=True mapeia os arrays"""
+        conn = self._connect(read_only=True)
+        try:
+            _, _, artifact_dir = self._resolve(conn, model_version)
+        finally:
+            conn.close()
+        return joblib.load(self.models_path / artifact_dir / f'{name}.joblib',
+                           mmap_mode='r' if mmap else None)
+
+    def list_versions(self):
+        """Lista as versões registradas (mais recentes primeiro)"""
+        conn = self._connect(read_only=True)
+        try:
+            return conn.execute("""
+                SELECT model_version, model_name, roc_auc, stage, created_at, promoted_at
+                FROM model_versions
+                ORDER BY version DESC
+            """).df()
+        finally:
+            conn.close()
+
+
+def main(argv=None, prog=None):
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(prog=prog, description='Gerenciar o registro de modelos')
+    parser.add_argument('--project-root', type=str, default='.',
+                        help='Caminho raiz do projeto')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='Listar versões registradas')
+    promote_parser = subparsers.add_parser('promote', help='Promover uma versão para produção')
+    promote_parser.add_argument('version', help='Versão (ex.: v0003)')
+    subparsers.add_parser('rollback', help='Desfazer a última promoção (repetível)')
+
+    args = parser.parse_args(argv)
+    registry = ModelRegistry(Path(args.project_root) / 'models')
+
+    try:
+        if args.command == 'list':
+            print(registry.list_versions().to_string(index=False))
+        elif args.command == 'promote':
+            registry.promote(args.version)
+        elif args.command == 'rollback':
+            registry.rollback()
+    except LookupError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,50 +10,228 @@ diretamente via linha de comando, independente do Jupyter.
 import pandas as pd
 import numpy as np
 import duckdb
-import matplotlib
-matplotlib.use('Agg') 
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
-import joblib
 import json
 from datetime import datetime
 import argparse
+import hashlib
+import os
 import sys
+import tempfile
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# Machine Learning imports
-from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import (
-    classification_report, confusion_matrix, roc_auc_score, 
-    roc_curve, precision_recall_curve, average_precision_score,
-    balanced_accuracy_score, f1_score
-)
+# Permite executar como script (python src/ml/model_trainer.py) importando os pacotes de src/
+SRC_ROOT = Path(__file__).resolve().parents[1]
+if str(SRC_ROOT) not in sys.path:
+    sys.path.insert(0, str(SRC_ROOT))
+
+from etl.schema_types import compact_frame, csv_dtypes, frame_dtypes, memory_mb
+from ml.drift_monitor import build_training_profile
+from ml.feature_engine import FeatureEngine, feature_columns as trend_feature_columns
+from ml.model_registry import ModelRegistry
+from ml.reporting import ReportRenderer, build_report_payload, compute_curve_data, save_report_payload
+from ml.tree_compiler import compile_and_verify
+
+# scikit-learn é importado dentro das funções que o usam: importar este módulo
+# (ex.: hermes train --help) não paga os ~2s de import do sklearn
 
 # Configuração
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 np.random.seed(42)
 
+# Caches de folds e de importância: gravação atômica, leitura tolerante a arquivo ilegível
+def _write_json_atomic(path: Path, data, **kwargs) -> None:
+    """Grava o JSON em um temporário e renomeia: uma execução interrompida não deixa arquivo truncado"""
+    temporary = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    with open(temporary, 'w') as f:
+        json.dump(data, f, **kwargs)
+    os.replace(temporary, path)
+
+def _read_json_cache(path: Path):
+    """Conteúdo de um arquivo de cache, ou None se ausente ou ilegível"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError:
+        logger.warning(f"Cache ilegível ignorado: {path.name}")
+        return None
+
+# ============================================================================
+# Validação cruzada paralela e intervalos de confiança (bootstrap)
+# ============================================================================
+
+# Dados compartilhados por cada processo de validação cruzada (definidos uma vez por worker)
+_CV_DATA = {}
+
+def _init_cv_worker(X: np.ndarray, y: np.ndarray) -> None:
+    """Inicializa o worker com os arrays do dataset (evita reenviá-los a cada fold)"""
+    _CV_DATA['X'] = X
+    _CV_DATA['y'] = y
+
+def _fit_and_score_fold(name: str, model, train_idx: np.ndarray, test_idx: np.ndarray) -> dict:
+    """Treina e avalia um modelo em um fold (executado em processo separado)"""
+    from sklearn.base import clone
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    
+    X, y = _CV_DATA['X'], _CV_DATA['y']
+    
+    estimator = clone(model)
+    if 'n_jobs' in estimator.get_params():
+        estimator.set_params(n_jobs=1)  # O paralelismo já é feito entre folds
+    if 'Logistic' in name:
+        estimator = make_pipeline(StandardScaler(), estimator)
+    
+    estimator.fit(X[train_idx], y[train_idx])
+    y_te = y[test_idx]
+    y_pred = estimator.predict(X[test_idx])
+    y_pred_proba = estimator.predict_proba(X[test_idx])[:, 1]
+    
+    return {metric: float(value) for metric, value in _classification_metrics(y_te, y_pred, y_pred_proba).items()}
+
+# ============================================================================
+# Importância por permutação (paralela, arrays de teste compartilhados)
+# ============================================================================
+
+IMPORTANCE_FILENAME = 'permutation_importance.json'
+
+# Modelo e arrays de teste de cada worker de importância (carregados uma vez por processo)
+_IMPORTANCE_DATA = {}
+
+def _init_importance_worker(model_file: str, X_file: str, y_file: str) -> None:
+    """
+    Carrega modelo e arrays de teste com mmap: as páginas dos arquivos são
+    compartilhadas entre os workers em vez de copiadas para cada um.
+    """
+    import joblib
+    
+    model = joblib.load(model_file, mmap_mode='r')
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)  # O paralelismo já é feito entre features
+    X = np.load(X_file, mmap_mode='r')
+    _IMPORTANCE_DATA['model'] = model
+    _IMPORTANCE_DATA['X'] = X
+    _IMPORTANCE_DATA['y'] = np.load(y_file, mmap_mode='r')
+    # Única cópia gravável por worker; cada job permuta uma coluna e a restaura
+    _IMPORTANCE_DATA['scratch'] = np.array(X)
+
+def _permutation_drops(feature: int, base_score: float, n_repeats: int, seed: int) -> list:
+    """Queda de ROC-AUC ao embaralhar uma feature, em cada repetição (executado no worker)"""
+    from sklearn.metrics import roc_auc_score
+    
+    model, X, y, scratch = (_IMPORTANCE_DATA[k] for k in ('model', 'X', 'y', 'scratch'))
+    rng = np.random.default_rng([seed, feature])
+    drops = []
+    try:
+        for _ in range(n_repeats):
+            scratch[:, feature] = X[rng.permutation(len(X)), feature]
+            drops.append(base_score - roc_auc_score(y, model.predict_proba(scratch)[:, 1]))
+    finally:
+        scratch[:, feature] = X[:, feature]
+    return drops
+
+def _classification_metrics(y_true, y_pred, y_pred_proba) -> dict:
+    """Métricas de avaliação usadas no teste e na validação cruzada"""
+    from sklearn.metrics import (
+        roc_auc_score, average_precision_score,
+        balanced_accuracy_score, f1_score
+    )
+    
+    return {
+        'balanced_accuracy': balanced_accuracy_score(y_true, y_pred),
+        'f1_score': f1_score(y_true, y_pred),
+        'roc_auc': roc_auc_score(y_true, y_pred_proba),
+        'average_precision': average_precision_score(y_true, y_pred_proba)
+    }
+
+def bootstrap_auc_ap(y_true, y_proba, n_bootstrap: int = 1000, alpha: float = 0.05,
+                     chunk_size: int = None, random_state: int = 42) -> dict:
+    """
+    Intervalos de confiança de ROC-AUC e Average Precision por bootstrap.
+    
+    Vetorizado: os scores são agrupados em valores distintos uma única vez e
+    cada lote de réplicas é resolvido com bincount/cumsum (sem reordenar nem
+    chamar o sklearn por réplica). Os valores coincidem com roc_auc_score e
+    average_precision_score aplicados a cada amostra.
+    """
+    y_true = np.asarray(y_true).astype(np.int64)
+    y_proba = np.asarray(y_proba)
+    n = len(y_true)
+    rng = np.random.default_rng(random_state)
+    
+    # Limita cada lote a ~5M índices reamostrados para manter a memória estável
+    chunk_size = chunk_size or max(1, min(100, 5_000_000 // n))
+    
+    _, groups = np.unique(y_proba, return_inverse=True)
+    n_groups = groups.max() + 1
+    
+    aucs, aps = [], []
+    for start in range(0, n_bootstrap, chunk_size):
+        b = min(chunk_size, n_bootstrap - start)
+        idx = rng.integers(0, n, size=(b, n))
+        
+        # Contagem de positivos/negativos por (réplica, score distinto)
+        flat = (np.arange(b)[:, None] * n_groups + groups[idx]).ravel()
+        pos = np.bincount(flat, weights=y_true[idx].ravel(), minlength=b * n_groups).reshape(b, n_groups)
+        tot = np.bincount(flat, minlength=b * n_groups).reshape(b, n_groups)
+        neg = tot - pos
+        n_pos, n_neg = pos.sum(axis=1), neg.sum(axis=1)
+        valid = (n_pos > 0) & (n_neg > 0)
+        
+        # ROC-AUC (Mann-Whitney com empates valendo 0.5)
+        neg_below = np.cumsum(neg, axis=1) - neg
+        auc = (pos * (neg_below + 0.5 * neg)).sum(axis=1) / np.where(valid, n_pos * n_neg, 1)
+        
+        # Average Precision (limiares em ordem decrescente de score)
+        tp = np.cumsum(pos[:, ::-1], axis=1)
+        fp = np.cumsum(neg[:, ::-1], axis=1)
+        precision = np.divide(tp, tp + fp, out=np.zeros_like(tp), where=(tp + fp) > 0)
+        recall_step = pos[:, ::-1] / np.where(n_pos > 0, n_pos, 1)[:, None]
+        ap = (recall_step * precision).sum(axis=1)
+        
+        aucs.append(auc[valid])
+        aps.append(ap[valid])
+    
+    aucs, aps = np.concatenate(aucs), np.concatenate(aps)
+    q = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+    return {
+        'roc_auc': [float(v) for v in np.percentile(aucs, q)],
+        'average_precision': [float(v) for v in np.percentile(aps, q)],
+        'n_bootstrap': int(len(aucs)),
+        'confidence_level': 1 - alpha
+    }
+
+
 class IndustrialFailurePrediction:
     """Classe para predição de falhas industriais"""
     
-    def __init__(self, project_root: Path):
+    def __init__(self, project_root: Path, preview_figures: bool = False,
+                 cv_folds: int = 5, n_jobs: int = None,
+                 time_series_features: bool = False,
+                 importance_repeats: int = 5, importance_sample: int = None):
         self.project_root = project_root
         self.db_path = project_root / 'db/hermes_reply.duckdb'
         self.reports_path = project_root / 'reports/figures'
         self.models_path = project_root / 'models'
+        self.cv_cache_path = self.models_path / 'cv_cache'
+        self.cv_folds = cv_folds
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.time_series_features = time_series_features
+        self.importance_repeats = importance_repeats
+        self.importance_sample = importance_sample
         
         # Criar diretórios necessários
         self.reports_path.mkdir(parents=True, exist_ok=True)
         self.models_path.mkdir(parents=True, exist_ok=True)
         
-        # Configurar matplotlib
-        plt.rcParams['figure.figsize'] = (12, 8)
-        plt.style.use('default')
+        # Versões de modelos (models/registry/ + índice em DuckDB)
+        self.registry = ModelRegistry(self.models_path)
+        
+        # Renderização das figuras em processos separados (matplotlib só é importado nos workers)
+        self.report_renderer = ReportRenderer(self.reports_path, preview=preview_figures)
         
     def load_data(self) -> pd.DataFrame:
         """Carrega dados do DuckDB ou CSV"""
@@ -62,15 +240,24 @@ class IndustrialFailurePrediction:
             logger.info(f"Carregando dados do DuckDB: {self.db_path}")
             conn = duckdb.connect(str(self.db_path))
             
-            query = """
+            source, trend_columns = 'vw_ml_dataset', ''
+            if self.time_series_features:
+                # Features temporais materializadas no DuckDB (incremental, point-in-time)
+                engine = FeatureEngine(conn)
+                engine.refresh()
+                engine.create_training_view()
+                source = 'vw_ml_features'
+                trend_columns = ', ' + ', '.join(trend_feature_columns())
+            
+            query = f"""
             SELECT 
                 machine_id, machine_type, installation_year, operational_hours,
                 temperature_c, vibration_mms, sound_db, oil_level_pct,
                 coolant_level_pct, power_consumption_kw, last_maintenance_days_ago,
                 maintenance_history_count, failure_history_count, ai_supervision,
                 ai_override_events, error_codes_last_30_days,
-                remaining_useful_life_days, failure_within_7_days
-            FROM vw_ml_dataset
+                remaining_useful_life_days, failure_within_7_days{trend_columns}
+            FROM {source}
             ORDER BY machine_id
             """
             
@@ -81,7 +268,7 @@ class IndustrialFailurePrediction:
             # Fallback para CSV
             csv_path = self.project_root / 'data/raw/factory_sensor_simulator_2040.csv'
             logger.info(f"DuckDB não encontrado. Carregando CSV: {csv_path}")
-            df = pd.read_csv(csv_path)
+            df = pd.read_csv(csv_path, dtype=csv_dtypes())
             
             # Renomear colunas para padronizar
             column_mapping = {
@@ -106,11 +293,17 @@ class IndustrialFailurePrediction:
             }
             df = df.rename(columns=column_mapping)
         
+        # Tipos compactos derivados do schema (category, inteiros reduzidos, float32)
+        memory_before = memory_mb(df)
+        df = compact_frame(df, frame_dtypes())
+        
         logger.info(f"Dados carregados: {df.shape[0]:,} registros, {df.shape[1]} colunas")
+        logger.info(f"Memória: {memory_before:.2f} MB -> {memory_mb(df):.2f} MB (tipos do schema)")
         return df
     
     def prepare_features(self, df: pd.DataFrame) -> tuple:
         """Prepara features para modelagem (SEM DATA LEAKAGE)"""
+        from sklearn.preprocessing import LabelEncoder
         
         numeric_features = [
             'installation_year',              # Idade da máquina (OK)
@@ -127,8 +320,15 @@ class IndustrialFailurePrediction:
             'error_codes_last_30_days'        # Erros recentes (OK)
         ]
         
+        # Features temporais (presentes quando carregadas de vw_ml_features)
+        trend_features = [c for c in trend_feature_columns() if c in df.columns]
+        
         # Preparar features
-        X = df[numeric_features + ['machine_type', 'ai_supervision']].copy()
+        X = df[numeric_features + trend_features + ['machine_type', 'ai_supervision']].copy()
+        
+        # Inclinação/delta não existem na primeira leitura da máquina: sem tendência = 0
+        if trend_features:
+            X[trend_features] = X[trend_features].fillna(0.0)
         
         # Encoder para machine_type
         le_machine_type = LabelEncoder()
@@ -146,22 +346,10 @@ class IndustrialFailurePrediction:
         
         return X, y, le_machine_type
     
-    def train_models(self, X: pd.DataFrame, y: pd.Series) -> dict:
-        """Treina e avalia modelos com validação mais rigorosa"""
-        
-        # Split estratificado (mantendo proporção de classes)
-        # Usando test_size maior para validação mais robusta
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.4, random_state=42, stratify=y
-        )
-        
-        logger.info(f"Split treino/teste: {len(X_train):,} / {len(X_test):,}")
-        logger.info(f"Proporção falhas - Treino: {y_train.mean()*100:.2f}% | Teste: {y_test.mean()*100:.2f}%")
-        
-        # Normalização
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
+    def build_models(self) -> dict:
+        """Instancia os modelos candidatos (não treinados)"""
+        from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+        from sklearn.linear_model import LogisticRegression
         
         # Modelos com hiperparâmetros mais conservadores (anti-overfitting)
         models = {
@@ -192,6 +380,29 @@ class IndustrialFailurePrediction:
             )
         }
         
+        return models
+    
+    def train_models(self, X: pd.DataFrame, y: pd.Series) -> dict:
+        """Treina e avalia modelos com validação mais rigorosa"""
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+        
+        # Split estratificado (mantendo proporção de classes)
+        # Usando test_size maior para validação mais robusta
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.4, random_state=42, stratify=y
+        )
+        
+        logger.info(f"Split treino/teste: {len(X_train):,} / {len(X_test):,}")
+        logger.info(f"Proporção falhas - Treino: {y_train.mean()*100:.2f}% | Teste: {y_test.mean()*100:.2f}%")
+        
+        # Normalização
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
+        
+        models = self.build_models()
+        
         results = {}
         
         for name, model in models.items():
@@ -211,28 +422,98 @@ class IndustrialFailurePrediction:
             y_pred_proba = model.predict_proba(X_te)[:, 1]
             
             # Métricas
-            metrics = {
-                'balanced_accuracy': balanced_accuracy_score(y_test, y_pred),
-                'f1_score': f1_score(y_test, y_pred),
-                'roc_auc': roc_auc_score(y_test, y_pred_proba),
-                'average_precision': average_precision_score(y_test, y_pred_proba)
-            }
+            metrics = _classification_metrics(y_test, y_pred, y_pred_proba)
+            
+            # Intervalos de confiança (bootstrap vetorizado sobre o conjunto de teste)
+            confidence_intervals = bootstrap_auc_ap(y_test, y_pred_proba)
             
             results[name] = {
                 'model': model,
                 'metrics': metrics,
+                'confidence_intervals': confidence_intervals,
                 'predictions': y_pred,
                 'probabilities': y_pred_proba,
+                'curves': compute_curve_data(y_test, y_pred_proba),
                 'test_data': (X_te, y_test)
             }
             
-            logger.info(f"{name} - ROC-AUC: {metrics['roc_auc']:.4f}")
-        
-        # Salvar objetos de preprocessing
-        joblib.dump(scaler, self.models_path / 'scaler.pkl')
+            auc_low, auc_high = confidence_intervals['roc_auc']
+            logger.info(f"{name} - ROC-AUC: {metrics['roc_auc']:.4f} (IC95%: {auc_low:.4f}-{auc_high:.4f})")
         
         return results, (X_train, X_test, y_train, y_test), scaler
     
+    def cross_validate_models(self, X: pd.DataFrame, y: pd.Series) -> dict:
+        """
+        Validação cruzada estratificada com folds executados em paralelo.
+        
+        Cada par (modelo, fold) é um job independente. Resultados concluídos são
+        gravados em models/cv_cache/ e reaproveitados, permitindo retomar
+        execuções interrompidas.
+        """
+        from sklearn.model_selection import StratifiedKFold
+        
+        X_values = np.ascontiguousarray(X.values, dtype=np.float64)
+        y_values = np.ascontiguousarray(y.values, dtype=np.int64)
+        
+        # Chave do dataset: mesmos dados + mesmos folds => mesmo diretório de cache
+        data_hash = hashlib.sha256()
+        data_hash.update(X_values.tobytes())
+        data_hash.update(y_values.tobytes())
+        data_hash.update(f'{self.cv_folds}|{",".join(X.columns)}'.encode())
+        cache_dir = self.cv_cache_path / data_hash.hexdigest()[:16]
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        skf = StratifiedKFold(n_splits=self.cv_folds, shuffle=True, random_state=42)
+        splits = list(skf.split(X_values, y_values))
+        models = self.build_models()
+        
+        fold_scores = {name: [None] * self.cv_folds for name in models}
+        jobs = []
+        
+        for name, model in models.items():
+            params_hash = hashlib.sha256(repr(sorted(model.get_params().items())).encode()).hexdigest()[:12]
+            slug = name.lower().replace(" ", "_")
+            
+            for fold, (train_idx, test_idx) in enumerate(splits):
+                cache_file = cache_dir / f'{slug}_fold{fold}_{params_hash}.json'
+                fold_scores[name][fold] = _read_json_cache(cache_file)
+                if fold_scores[name][fold] is None:
+                    jobs.append((name, model, fold, train_idx, test_idx, cache_file))
+        
+        cached = len(models) * self.cv_folds - len(jobs)
+        logger.info(f"Validação cruzada {self.cv_folds}-fold: {len(jobs)} jobs a executar, {cached} em cache")
+        
+        if jobs:
+            with ProcessPoolExecutor(max_workers=min(self.n_jobs, len(jobs)),
+                                     initializer=_init_cv_worker,
+                                     initargs=(X_values, y_values)) as executor:
+                futures = {
+                    executor.submit(_fit_and_score_fold, name, model, train_idx, test_idx): (name, fold, cache_file)
+                    for name, model, fold, train_idx, test_idx, cache_file in jobs
+                }
+                
+                for future in as_completed(futures):
+                    name, fold, cache_file = futures[future]
+                    scores = future.result()
+                    fold_scores[name][fold] = scores
+                    
+                    # Persistir imediatamente para permitir retomada
+                    _write_json_atomic(cache_file, scores)
+                    logger.info(f"CV {name} fold {fold + 1}/{self.cv_folds} - ROC-AUC: {scores['roc_auc']:.4f}")
+        
+        cv_results = {}
+        for name, folds in fold_scores.items():
+            summary = {'folds': folds}
+            for metric in folds[0]:
+                values = np.array([fold[metric] for fold in folds])
+                summary[f'{metric}_mean'] = float(values.mean())
+                summary[f'{metric}_std'] = float(values.std())
+            cv_results[name] = summary
+            
+            logger.info(f"CV {name} - ROC-AUC: {summary['roc_auc_mean']:.4f} ± {summary['roc_auc_std']:.4f}")
+        
+        return cv_results
+    
     def select_best_model(self, results: dict) -> tuple:
         """Seleciona o melhor modelo baseado no ROC-AUC"""
         
@@ -246,119 +527,140 @@ class IndustrialFailurePrediction:
         
         return best_name, best_model, best_metrics
     
-    def create_visualizations(self, results: dict, best_name: str) -> None:
-        """Cria visualizações dos resultados"""
-        
-        # 1. Comparação de modelos
-        metrics_df = pd.DataFrame({
-            name: res['metrics'] for name, res in results.items()
-        }).T
-        
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-        metrics_list = ['balanced_accuracy', 'f1_score', 'roc_auc', 'average_precision']
-        colors = ['skyblue', 'lightcoral', 'lightgreen']
-        
-        for i, metric in enumerate(metrics_list):
-            ax = axes[i//2, i%2]
-            bars = metrics_df[metric].plot(kind='bar', ax=ax, color=colors)
-            ax.set_title(f'{metric.replace("_", " ").title()}')
-            ax.set_ylabel('Score')
-            ax.tick_params(axis='x', rotation=45)
-            ax.set_ylim(0, 1)
-            
-            for j, v in enumerate(metrics_df[metric]):
-                ax.text(j, v + 0.01, f'{v:.3f}', ha='center', va='bottom')
-        
-        plt.tight_layout()
-        plt.savefig(self.reports_path / 'model_comparison.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        # 2. Matriz de confusão do melhor modelo
-        best_preds = results[best_name]['predictions']
-        _, y_test = results[best_name]['test_data']
-        
-        cm = confusion_matrix(y_test, best_preds)
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
-                    xticklabels=['Sem Falha', 'Com Falha'],
-                    yticklabels=['Sem Falha', 'Com Falha'])
-        plt.title(f'Matriz de Confusão - {best_name}')
-        plt.xlabel('Predito')
-        plt.ylabel('Real')
-        plt.tight_layout()
-        plt.savefig(self.reports_path / 'confusion_matrix.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        # 3. Curvas ROC e PR
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
-        colors = ['blue', 'red', 'green']
-        
-        for i, (name, res) in enumerate(results.items()):
-            _, y_test = res['test_data']
-            y_proba = res['probabilities']
-            
-            # ROC
-            fpr, tpr, _ = roc_curve(y_test, y_proba)
-            auc_score = res['metrics']['roc_auc']
-            ax1.plot(fpr, tpr, color=colors[i], lw=2, 
-                     label=f'{name} (AUC = {auc_score:.3f})')
+    def permutation_importance(self, model_version: str, X_test: np.ndarray, y_test,
+                               base_proba: np.ndarray, feature_names: list) -> dict:
+        """
+        Importância por permutação (queda de ROC-AUC), válida para qualquer modelo.
+        
+        A predição base é a já calculada na avaliação (base_proba): só as
+        permutações chamam o modelo. Cada feature é um job em um pool de
+        processos; os workers leem o modelo registrado e os arrays de teste
+        por mmap. Com importance_sample, usa uma amostra estratificada do
+        teste (modo rápido para conjuntos grandes).
+        
+        O resultado fica em cache no diretório da versão: chamadas com os
+        mesmos parâmetros e dados de teste não recalculam.
+        
+        Returns:
+            {'features', 'mean', 'std', 'base_score', 'n_samples', ...}
+        """
+        from sklearn.metrics import roc_auc_score
+        from sklearn.utils import resample
+        
+        X_test = np.ascontiguousarray(X_test, dtype=np.float64)
+        y_test = np.ascontiguousarray(y_test, dtype=np.int64)
+        base_proba = np.asarray(base_proba)
+        
+        if self.importance_sample and self.importance_sample < len(y_test):
+            sample = resample(np.arange(len(y_test)), replace=False, n_samples=self.importance_sample,
+                              stratify=y_test, random_state=42)
+            sample.sort()
+            X_test, y_test, base_proba = X_test[sample], y_test[sample], base_proba[sample]
+        
+        data_hash = hashlib.sha256()
+        data_hash.update(X_test.tobytes())
+        data_hash.update(y_test.tobytes())
+        params = {
+            'n_repeats': self.importance_repeats,
+            'sample': self.importance_sample,
+            'seed': 42,
+            'data_hash': data_hash.hexdigest()[:16]
+        }
+        
+        version_dir = self.registry.version_dir(model_version)
+        cache_file = version_dir / IMPORTANCE_FILENAME
+        cached = _read_json_cache(cache_file)
+        if cached is not None and cached.get('params') == params:
+            logger.info(f"Importância por permutação de {model_version} lida do cache")
+            return cached
+        
+        base_score = float(roc_auc_score(y_test, base_proba))
+        n_features = X_test.shape[1]
+        drops = [None] * n_features
+        
+        logger.info(f"Importância por permutação: {n_features} features x {self.importance_repeats} "
+                    f"repetições em {len(y_test):,} leituras")
+        with tempfile.TemporaryDirectory(dir=self.models_path) as workdir:
+            X_file, y_file = Path(workdir) / 'X_test.npy', Path(workdir) / 'y_test.npy'
+            np.save(X_file, X_test)
+            np.save(y_file, y_test)
             
-            # PR
-            precision, recall, _ = precision_recall_curve(y_test, y_proba)
-            ap_score = res['metrics']['average_precision']
-            ax2.plot(recall, precision, color=colors[i], lw=2,
-                     label=f'{name} (AP = {ap_score:.3f})')
-        
-        # Configurar ROC
-        ax1.plot([0, 1], [0, 1], 'k--', lw=1, alpha=0.8)
-        ax1.set_xlim([0.0, 1.0])
-        ax1.set_ylim([0.0, 1.05])
-        ax1.set_xlabel('Taxa de Falsos Positivos')
-        ax1.set_ylabel('Taxa de Verdadeiros Positivos')
-        ax1.set_title('Curvas ROC')
-        ax1.legend(loc="lower right")
-        ax1.grid(True, alpha=0.3)
-        
-        # Configurar PR
-        baseline = y_test.mean()
-        ax2.axhline(y=baseline, color='k', linestyle='--', alpha=0.8)
-        ax2.set_xlim([0.0, 1.0])
-        ax2.set_ylim([0.0, 1.05])
-        ax2.set_xlabel('Recall')
-        ax2.set_ylabel('Precision')
-        ax2.set_title('Curvas Precision-Recall')
-        ax2.legend(loc="lower left")
-        ax2.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        plt.savefig(self.reports_path / 'roc_pr_curves.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        logger.info(f"Visualizações salvas em: {self.reports_path}")
+            with ProcessPoolExecutor(max_workers=min(self.n_jobs, n_features),
+                                     initializer=_init_importance_worker,
+                                     initargs=(str(version_dir / 'model.joblib'), str(X_file), str(y_file))) as executor:
+                futures = {executor.submit(_permutation_drops, feature, base_score,
+                                           self.importance_repeats, params['seed']): feature
+                           for feature in range(n_features)}
+                for future in as_completed(futures):
+                    drops[futures[future]] = future.result()
+        
+        drops = np.array(drops)
+        importance = {
+            'model_version': model_version,
+            'params': params,
+            'base_score': base_score,
+            'n_samples': int(len(y_test)),
+            'features': list(feature_names),
+            'mean': [float(v) for v in drops.mean(axis=1)],
+            'std': [float(v) for v in drops.std(axis=1)]
+        }
+        _write_json_atomic(cache_file, importance, indent=2)
+        
+        ranking = sorted(zip(importance['features'], importance['mean']), key=lambda item: -item[1])
+        for name, value in ranking[:5]:
+            logger.info(f"  {name}: {value:+.4f} ROC-AUC")
+        return importance
+    
+    def create_visualizations(self, results: dict, best_name: str,
+                              cv_results: dict = None, importance: dict = None) -> list:
+        """
+        Agenda a renderização das visualizações (não bloqueante).
+        
+        Pode ser chamada a cada estágio com os dados já disponíveis: só as
+        figuras novas ou alteradas são agendadas, e o payload salvo é sempre
+        o mais completo.
+        """
+        
+        payload = build_report_payload(results, best_name, cv_results, importance)
+        save_report_payload(payload, self.reports_path)
+        scheduled = self.report_renderer.submit(payload)
+        
+        if scheduled:
+            logger.info(f"Renderizando em segundo plano: {', '.join(scheduled)}")
+        
+        return scheduled
     
     def save_model_and_results(self, best_name: str, best_model, 
-                              best_metrics: dict, feature_names: list) -> None:
-        """Salva o modelo e resultados"""
-        
-        # Salvar modelo
-        model_filename = f'{best_name.lower().replace(" ", "_")}_model.pkl'
-        joblib.dump(best_model, self.models_path / model_filename)
-        
-        # Salvar metadados
-        metadata = {
-            'model_name': best_name,
-            'model_file': model_filename,
-            'metrics': best_metrics,
-            'feature_names': feature_names,
-            'training_date': datetime.now().isoformat(),
-            'model_version': '1.0.0'
-        }
+                              best_metrics: dict, feature_names: list,
+                              confidence_intervals: dict = None,
+                              cross_validation: dict = None,
+                              artifacts: dict = None,
+                              drift_profile: dict = None) -> str:
+        """Registra o modelo como nova versão e promove se superar a produção"""
+        
+        model_version = self.registry.register(
+            best_model, best_name, best_metrics, feature_names,
+            artifacts=artifacts,
+            metadata={
+                'confidence_intervals': confidence_intervals,
+                'cross_validation': cross_validation,
+                'drift_profile': drift_profile
+            }
+        )
         
-        with open(self.models_path / 'model_metadata.json', 'w') as f:
-            json.dump(metadata, f, indent=2)
+        # Promoção automática: primeira versão ou ROC-AUC maior/igual ao da produção
+        production = self.registry.production_version()
+        if production is None:
+            self.registry.promote(model_version)
+        else:
+            _, production_metadata = self.registry.load(production)
+            if best_metrics['roc_auc'] >= production_metadata['metrics']['roc_auc']:
+                self.registry.promote(model_version)
+            else:
+                logger.info(f"Versão {model_version} mantida em staging "
+                            f"(produção {production} tem ROC-AUC maior)")
         
-        logger.info(f"Modelo salvo: {self.models_path / model_filename}")
-        logger.info(f"Metadados salvos: {self.models_path / 'model_metadata.json'}")
+        return model_version
     
     def run_training_pipeline(self) -> None:
         """Pipeline completo de treinamento"""
@@ -378,25 +680,65 @@ class IndustrialFailurePrediction:
         # 4. Selecionar melhor modelo
         best_name, best_model, best_metrics = self.select_best_model(results)
         
-        # 5. Criar visualizações
+        # 5. Figuras da avaliação: renderizam em segundo plano durante a CV e a importância
         self.create_visualizations(results, best_name)
         
-        # 6. Salvar modelo e resultados
-        self.save_model_and_results(best_name, best_model, best_metrics, list(X.columns))
+        # 6. Validação cruzada estratificada (paralela, com cache de folds)
+        cv_results = self.cross_validate_models(X, y) if self.cv_folds >= 2 else None
+        if cv_results:
+            self.create_visualizations(results, best_name, cv_results)
+        
+        # 7. Registrar nova versão do modelo (ensembles de árvores também em forma compilada,
+        #    validada bit a bit contra o scikit-learn no conjunto de teste)
+        artifacts = {'scaler': scaler, 'label_encoder': label_encoder}
+        compiled = compile_and_verify(best_model, results[best_name]['test_data'][0])
+        if compiled is not None:
+            artifacts['compiled_model'] = compiled
+        
+        model_version = self.save_model_and_results(
+            best_name, best_model, best_metrics, list(X.columns),
+            confidence_intervals=results[best_name]['confidence_intervals'],
+            cross_validation=cv_results[best_name] if cv_results else None,
+            artifacts=artifacts,
+            drift_profile=build_training_profile(splits[0])
+        )
+        
+        # 8. Importância por permutação do modelo registrado (cache por versão)
+        if self.importance_repeats > 0:
+            X_test, y_test = results[best_name]['test_data']
+            importance = self.permutation_importance(model_version, X_test, y_test,
+                                                     results[best_name]['probabilities'], list(X.columns))
+            self.create_visualizations(results, best_name, cv_results, importance)
+        
+        # 9. Aguardar renderização das figuras (só o que ainda não terminou)
+        self.report_renderer.wait()
         
         end_time = datetime.now()
         duration = end_time - start_time
         
         logger.info("=== TREINAMENTO CONCLUÍDO ===")
         logger.info(f"Tempo total: {duration}")
-        logger.info(f"Melhor modelo: {best_name} (ROC-AUC: {best_metrics['roc_auc']:.4f})")
+        logger.info(f"Melhor modelo: {best_name} {model_version} (ROC-AUC: {best_metrics['roc_auc']:.4f})")
 
-def main():
-    parser = argparse.ArgumentParser(description='Treinar modelo de predição de falhas')
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='Treinar modelo de predição de falhas')
     parser.add_argument('--project-root', type=str, default='.',
                        help='Caminho raiz do projeto')
+    parser.add_argument('--preview-figures', action='store_true',
+                       help='Gera figuras em modo preview (SVG, DPI baixo)')
+    parser.add_argument('--cv-folds', type=int, default=5,
+                       help='Número de folds da validação cruzada (0 desativa)')
+    parser.add_argument('--n-jobs', type=int, default=None,
+                       help='Processos paralelos da validação cruzada (padrão: todos os núcleos)')
+    parser.add_argument('--time-series-features', action='store_true',
+                       help='Inclui features temporais (médias móveis, inclinação, EWM, deltas)')
+    parser.add_argument('--importance-repeats', type=int, default=5,
+                       help='Repetições por feature da importância por permutação (0 desativa)')
+    parser.add_argument('--importance-sample', type=int, default=None,
+                       help='Modo rápido: calcula a importância em uma amostra estratificada do teste')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
     
     project_root = Path(args.project_root)
     if not project_root.exists():
@@ -404,7 +746,15 @@ def main():
         sys.exit(1)
     
     # Executar treinamento
-    trainer = IndustrialFailurePrediction(project_root)
+    trainer = IndustrialFailurePrediction(
+        project_root,
+        preview_figures=args.preview_figures,
+        cv_folds=args.cv_folds,
+        n_jobs=args.n_jobs,
+        time_series_features=args.time_series_features,
+        importance_repeats=args.importance_repeats,
+        importance_sample=args.importance_sample
+    )
     trainer.run_training_pipeline()
 
 if __name__ == "__main__":
@@ -0,0 +1,365 @@
+"""
+Estágio de relatórios do treinamento ML
+Hermes Reply Challenge - Fase 5
+
+Gera as figuras de avaliação (comparação de modelos, matriz de confusão,
+curvas ROC/PR, validação cruzada e importância por permutação) a partir de
+dados já calculados na avaliação.
+
+Funcionalidades:
+- Curvas ROC/PR calculadas uma única vez durante a avaliação
+- Renderização em pool de processos, fora do caminho crítico do treino
+- Modo preview (DPI baixo e saída vetorial SVG)
+- Cache por fingerprint: figuras com entradas inalteradas não são refeitas
+- Payload salvo junto das figuras: `hermes report` as refaz sem retreinar
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILENAME = '.render_cache.json'
+PAYLOAD_FILENAME = 'report_payload.joblib'
+
+
+def compute_curve_data(y_true, y_proba) -> Dict[str, np.ndarray]:
+    """Calcula os pontos das curvas ROC e Precision-Recall de um modelo"""
+    from sklearn.metrics import precision_recall_curve, roc_curve
+    
+    fpr, tpr, _ = roc_curve(y_true, y_proba)
+    precision, recall, _ = precision_recall_curve(y_true, y_proba)
+    return {'fpr': fpr, 'tpr': tpr, 'precision': precision, 'recall': recall}
+
+
+def build_report_payload(results: dict, best_name: str, cv_results: Optional[dict] = None,
+                         importance: Optional[dict] = None) -> dict:
+    """Extrai dos resultados apenas os dados (picklable) usados pelas figuras"""
+    from sklearn.metrics import confusion_matrix
+    
+    _, y_test = results[best_name]['test_data']
+    y_test = np.asarray(y_test)
+
+    payload = {
+        'best_name': best_name,
+        'metrics': {name: res['metrics'] for name, res in results.items()},
+        'curves': {name: res['curves'] for name, res in results.items()},
+        'confusion_matrix': confusion_matrix(y_test, results[best_name]['predictions']),
+        'baseline': float(y_test.mean())
+    }
+
+    if cv_results:
+        payload['cv'] = {
+            name: {metric: [fold[metric] for fold in cv['folds']]
+                   for metric in ('roc_auc', 'average_precision')}
+            for name, cv in cv_results.items()
+        }
+
+    if importance:
+        payload['importance'] = {key: importance[key] for key in ('features', 'mean', 'std', 'base_score')}
+
+    return payload
+
+
+def save_report_payload(payload: dict, reports_path: Path) -> Path:
+    """Salva o payload das figuras para re-renderização sem retreinar"""
+    import joblib
+    
+    path = Path(reports_path) / PAYLOAD_FILENAME
+    joblib.dump(payload, path)
+    return path
+
+
+def load_report_payload(reports_path: Path) -> dict:
+    import joblib
+    
+    return joblib.load(Path(reports_path) / PAYLOAD_FILENAME)
+
+
+def _fingerprint(*parts) -> str:
+    """Hash estável das entradas de uma figura"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(np.ascontiguousarray(part).tobytes())
+        elif isinstance(part, dict):
+            for key in sorted(part):
+                digest.update(str(key).encode())
+                digest.update(_fingerprint(part[key]).encode())
+        else:
+            digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+
+def _setup_matplotlib():
+    """Importa o matplotlib com backend não interativo (executado no worker)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plt.rcParams['figure.figsize'] = (12, 8)
+    plt.style.use('default')
+    return plt
+
+
+def _render_model_comparison(payload: dict, output: str, dpi: int) -> str:
+    """Figura 1: comparação de métricas entre modelos"""
+    import pandas as pd
+    plt = _setup_matplotlib()
+
+    metrics_df = pd.DataFrame(payload['metrics']).T
+
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    metrics_list = ['balanced_accuracy', 'f1_score', 'roc_auc', 'average_precision']
+    colors = ['skyblue', 'lightcoral', 'lightgreen']
+
+    for i, metric in enumerate(metrics_list):
+        ax = axes[i//2, i%2]
+        metrics_df[metric].plot(kind='bar', ax=ax, color=colors)
+        ax.set_title(f'{metric.replace("_", " ").title()}')
+        ax.set_ylabel('Score')
+        ax.tick_params(axis='x', rotation=45)
+        ax.set_ylim(0, 1)
+
+        for j, v in enumerate(metrics_df[metric]):
+            ax.text(j, v + 0.01, f'{v:.3f}', ha='center', va='bottom')
+
+    plt.tight_layout()
+    plt.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return output
+
+
+def _render_confusion_matrix(payload: dict, output: str, dpi: int) -> str:
+    """Figura 2: matriz de confusão do melhor modelo"""
+    plt = _setup_matplotlib()
+    import seaborn as sns
+
+    fig = plt.figure(figsize=(8, 6))
+    sns.heatmap(payload['confusion_matrix'], annot=True, fmt='d', cmap='Blues',
+                xticklabels=['Sem Falha', 'Com Falha'],
+                yticklabels=['Sem Falha', 'Com Falha'])
+    plt.title(f'Matriz de Confusão - {payload["best_name"]}')
+    plt.xlabel('Predito')
+    plt.ylabel('Real')
+    plt.tight_layout()
+    plt.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return output
+
+
+def _render_roc_pr_curves(payload: dict, output: str, dpi: int) -> str:
+    """Figura 3: curvas ROC e Precision-Recall de todos os modelos"""
+    plt = _setup_matplotlib()
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+    colors = ['blue', 'red', 'green']
+
+    for i, (name, curves) in enumerate(payload['curves'].items()):
+        metrics = payload['metrics'][name]
+
+        # ROC
+        ax1.plot(curves['fpr'], curves['tpr'], color=colors[i], lw=2,
+                 label=f'{name} (AUC = {metrics["roc_auc"]:.3f})')
+
+        # PR
+        ax2.plot(curves['recall'], curves['precision'], color=colors[i], lw=2,
+                 label=f'{name} (AP = {metrics["average_precision"]:.3f})')
+
+    # Configurar ROC
+    ax1.plot([0, 1], [0, 1], 'k--', lw=1, alpha=0.8)
+    ax1.set_xlim([0.0, 1.0])
+    ax1.set_ylim([0.0, 1.05])
+    ax1.set_xlabel('Taxa de Falsos Positivos')
+    ax1.set_ylabel('Taxa de Verdadeiros Positivos')
+    ax1.set_title('Curvas ROC')
+    ax1.legend(loc="lower right")
+    ax1.grid(True, alpha=0.3)
+
+    # Configurar PR
+    ax2.axhline(y=payload['baseline'], color='k', linestyle='--', alpha=0.8)
+    ax2.set_xlim([0.0, 1.0])
+    ax2.set_ylim([0.0, 1.05])
+    ax2.set_xlabel('Recall')
+    ax2.set_ylabel('Precision')
+    ax2.set_title('Curvas Precision-Recall')
+    ax2.legend(loc="lower left")
+    ax2.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return output
+
+
+def _render_cross_validation(payload: dict, output: str, dpi: int) -> str:
+    """Figura 4: distribuição das métricas por fold da validação cruzada"""
+    plt = _setup_matplotlib()
+
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6))
+    names = list(payload['cv'].keys())
+
+    for ax, metric in zip(axes, ('roc_auc', 'average_precision')):
+        scores = [payload['cv'][name][metric] for name in names]
+        ax.boxplot(scores)
+        ax.set_xticks(range(1, len(names) + 1))
+        ax.set_xticklabels(names, rotation=45)
+        ax.set_title(f'Validação Cruzada - {metric.replace("_", " ").title()}')
+        ax.set_ylabel('Score')
+        ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return output
+
+
+def _render_feature_importance(payload: dict, output: str, dpi: int) -> str:
+    """Figura 5: importância por permutação do melhor modelo (queda de ROC-AUC)"""
+    plt = _setup_matplotlib()
+
+    importance = payload['importance']
+    order = np.argsort(importance['mean'])
+    features = [importance['features'][i] for i in order]
+
+    fig, ax = plt.subplots(figsize=(12, max(6, 0.4 * len(features))))
+    ax.barh(features, np.asarray(importance['mean'])[order],
+            xerr=np.asarray(importance['std'])[order], color='steelblue', alpha=0.8)
+    ax.axvline(0, color='black', linewidth=0.8)
+    ax.set_title(f"Importância por Permutação - {payload['best_name']} "
+                 f"(ROC-AUC base: {importance['base_score']:.4f})")
+    ax.set_xlabel('Queda de ROC-AUC ao embaralhar a feature')
+    ax.grid(True, axis='x', alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return output
+
+
+# Figura -> (função de renderização, chaves do payload que a afetam)
+FIGURES = {
+    'model_comparison': (_render_model_comparison, ('metrics',)),
+    'confusion_matrix': (_render_confusion_matrix, ('best_name', 'confusion_matrix')),
+    'roc_pr_curves': (_render_roc_pr_curves, ('metrics', 'curves', 'baseline')),
+    'cross_validation': (_render_cross_validation, ('cv',)),
+    'feature_importance': (_render_feature_importance, ('best_name', 'importance'))
+}
+
+
+class ReportRenderer:
+    """Renderiza as figuras de avaliação em paralelo, com cache de entradas"""
+
+    def __init__(self, reports_path: Path, preview: bool = False,
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            reports_path: Diretório de saída das figuras
+            preview: Se True, gera SVG com DPI baixo (rápido, para CI/revisão)
+            max_workers: Número de processos de renderização (padrão: 1 por figura)
+        """
+        self.reports_path = Path(reports_path)
+        self.preview = preview
+        self.dpi = 72 if preview else 300
+        self.fmt = 'svg' if preview else 'png'
+        self.max_workers = max_workers or len(FIGURES)
+        self.cache_path = self.reports_path / CACHE_FILENAME
+        self._executor = None
+        self._pending = {}
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_cache(self, cache: dict) -> None:
+        with open(self.cache_path, 'w') as f:
+            json.dump(cache, f, indent=2)
+
+    def submit(self, payload: dict) -> List[str]:
+        """
+        Agenda a renderização das figuras cujas entradas mudaram.
+
+        Retorna imediatamente; use wait() para aguardar a conclusão. Pode ser
+        chamado de novo com um payload mais completo antes do wait(): figuras
+        já agendadas com as mesmas entradas não são reenviadas.
+        """
+        cache = self._load_cache()
+        scheduled = []
+
+        for figure, (render_fn, keys) in FIGURES.items():
+            if any(k not in payload for k in keys):
+                continue
+
+            output = self.reports_path / f'{figure}.{self.fmt}'
+            fingerprint = _fingerprint(self.dpi, self.fmt, *(payload[k] for k in keys))
+
+            if output.name in self._pending and self._pending[output.name][1] == fingerprint:
+                continue
+            if output.exists() and cache.get(output.name) == fingerprint:
+                logger.info(f"Figura inalterada, renderização ignorada: {output.name}")
+                continue
+
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+            future = self._executor.submit(render_fn, payload, str(output), self.dpi)
+            self._pending[output.name] = (future, fingerprint)
+            scheduled.append(output.name)
+
+        return scheduled
+
+    def wait(self) -> None:
+        """Aguarda as renderizações pendentes e atualiza o cache"""
+        if not self._pending:
+            return
+
+        cache = self._load_cache()
+        try:
+            for name, (future, fingerprint) in self._pending.items():
+                try:
+                    future.result()
+                    cache[name] = fingerprint
+                except Exception as e:
+                    logger.error(f"Erro ao renderizar {name}: {e}")
+                    cache.pop(name, None)
+        finally:
+            self._pending = {}
+            self._executor.shutdown()
+            self._executor = None
+            self._save_cache(cache)
+
+        logger.info(f"Visualizações salvas em: {self.reports_path}")
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='Renderizar as figuras do último treinamento')
+    parser.add_argument('--project-root', type=str, default='.',
+                        help='Caminho raiz do projeto')
+    parser.add_argument('--preview', action='store_true',
+                        help='Gera figuras em modo preview (SVG, DPI baixo)')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    reports_path = Path(args.project_root) / 'reports/figures'
+    try:
+        payload = load_report_payload(reports_path)
+    except FileNotFoundError:
+        logger.error(f"Payload não encontrado em {reports_path}; execute o treinamento primeiro")
+        sys.exit(1)
+
+    renderer = ReportRenderer(reports_path, preview=args.preview)
+    scheduled = renderer.submit(payload)
+    renderer.wait()
+    logger.info(f"Figuras renderizadas: {len(scheduled)} "
+                f"({len(FIGURES) - len(scheduled)} inalteradas ou sem dados)")
@@ -0,0 +1,288 @@
+"""
+Scoring com o modelo em produção
+Hermes Reply Challenge - Fase 5
+
+Aplica a versão em produção do registro de modelos às leituras do DuckDB e
+devolve a probabilidade de falha em 7 dias por leitura.
+
+Funcionalidades:
+- Modelo e pré-processadores carregados do registro (mmap, sem cópia)
+- Features montadas na ordem gravada em metadata.json
+- Features temporais lidas de vw_ml_features quando o modelo as usa
+- Saída em CSV ou no console, com a versão do modelo em cada linha
+- Lotes pequenos pontuados pela inferência compilada das árvores
+  (ml/tree_compiler.py), idêntica ao scikit-learn e sem o custo por estimador
+- Scoring em lote dentro do banco: leituras lidas em blocos do DuckDB
+  (fetch_df_chunk, DataFrames do pandas), um predict_proba vetorizado por
+  bloco e gravação em model_predictions, com partições de máquinas
+  processadas em paralelo e troca atômica dos scores da versão
+"""
+
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+# Permite executar como script (python src/ml/scoring.py) importando os pacotes de src/
+SRC_ROOT = Path(__file__).resolve().parents[1]
+if str(SRC_ROOT) not in sys.path:
+    sys.path.insert(0, str(SRC_ROOT))
+
+from ml.feature_engine import FeatureEngine, feature_columns as trend_feature_columns
+from ml.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+DUCKDB_VECTOR_SIZE = 2048      # Linhas por vetor do DuckDB (unidade de fetch_df_chunk)
+COMPILED_MAX_ROWS = 1_000      # Acima disso o Cython do scikit-learn empata ou vence (bench_tree_inference.py)
+
+PREDICTIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_predictions (
+    reading_id BIGINT NOT NULL,                  -- Leitura pontuada (sensor_readings)
+    machine_id VARCHAR(50) NOT NULL,
+    reading_timestamp TIMESTAMP,
+    model_version VARCHAR NOT NULL,              -- Versão do registro que gerou o score
+    failure_probability DOUBLE NOT NULL,
+    predicted_failure BOOLEAN NOT NULL,
+    scored_at TIMESTAMP NOT NULL                 -- Execução do scoring
+)
+"""
+
+
+def _feature_source(conn: duckdb.DuckDBPyConnection, feature_names: list) -> tuple:
+    """(view, colunas a ler); materializa as features temporais se o modelo as usa"""
+    trend_columns = [c for c in trend_feature_columns() if c in feature_names]
+    source = 'vw_ml_dataset'
+    if trend_columns:
+        engine = FeatureEngine(conn)
+        engine.refresh()
+        engine.create_training_view()
+        source = 'vw_ml_features'
+
+    base_columns = [c for c in feature_names if c not in trend_columns and c != 'machine_type_encoded']
+    return source, ['machine_id', 'machine_type', 'reading_timestamp'] + base_columns + trend_columns
+
+
+def load_scoring_data(conn: duckdb.DuckDBPyConnection, feature_names: list) -> pd.DataFrame:
+    """Lê as leituras a pontuar; usa vw_ml_features se o modelo tiver features temporais"""
+    source, columns = _feature_source(conn, feature_names)
+    return conn.execute(f"SELECT {', '.join(columns)} FROM {source} ORDER BY machine_id, reading_timestamp").df()
+
+
+def build_feature_matrix(df: pd.DataFrame, feature_names: list, machine_type_classes) -> pd.DataFrame:
+    """Reproduz prepare_features do treino com os encoders já ajustados"""
+    X = pd.DataFrame(index=df.index)
+    trend_columns = set(trend_feature_columns())
+    for name in feature_names:
+        if name == 'machine_type_encoded':
+            # Tipos não vistos no treino recebem -1 (em vez de erro do LabelEncoder)
+            X[name] = pd.Categorical(df['machine_type'], categories=machine_type_classes).codes
+        elif name == 'ai_supervision':
+            X[name] = df[name].astype(int)
+        elif name in trend_columns:
+            X[name] = df[name].fillna(0.0)
+        else:
+            X[name] = df[name]
+    return X
+
+
+class BatchScorer:
+    """Modelo de uma versão do registro pronto para pontuar lotes de leituras"""
+
+    def __init__(self, project_root: Path, model_version: Optional[str] = None,
+                 threshold: float = 0.5, use_compiled: bool = True):
+        self.project_root = Path(project_root)
+        self.db_path = self.project_root / 'db/hermes_reply.duckdb'
+        self.threshold = threshold
+
+        registry = ModelRegistry(self.project_root / 'models')
+        self.model, self.metadata = registry.load(model_version)
+        self.model_version = self.metadata['model_version']
+        self.feature_names = self.metadata['feature_names']
+        self.machine_type_classes = registry.load_artifact('label_encoder', self.model_version).classes_
+        self.scaler = None
+        if 'Logistic' in self.metadata['model_name']:
+            # Regressão logística foi treinada com o array escalado
+            self.scaler = registry.load_artifact('scaler', self.model_version)
+        self.compiled = None
+        if use_compiled and 'compiled_model' in self.metadata.get('artifacts', []):
+            self.compiled = registry.load_artifact('compiled_model', self.model_version, mmap=True)
+
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        """Probabilidade de falha de um lote (uma chamada vetorizada ao modelo)"""
+        X = build_feature_matrix(df, self.feature_names, self.machine_type_classes)
+        # O scaler foi ajustado no DataFrame; os modelos, em arrays (X.values) sem nomes de colunas
+        X = self.scaler.transform(X) if self.scaler is not None else X.to_numpy()
+        if self.compiled is not None and len(X) <= COMPILED_MAX_ROWS:
+            return self.compiled.predict_proba(X)[:, 1]
+        return self.model.predict_proba(X)[:, 1]
+
+    def score_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        probability = self.predict_proba(df)
+        return pd.DataFrame({
+            'machine_id': df['machine_id'],
+            'reading_timestamp': df['reading_timestamp'],
+            'failure_probability': probability,
+            'predicted_failure': (probability >= self.threshold).astype(np.int8),
+            'model_version': self.model_version
+        })
+
+    def _score_partition(self, conn: duckdb.DuckDBPyConnection, source: str, columns: list, staging: str,
+                         partition: int, n_partitions: int, batch_rows: int, scored_at: datetime) -> int:
+        """Lê, pontua e grava as leituras de uma partição de máquinas, bloco a bloco"""
+        reader, writer = conn.cursor(), conn.cursor()
+        try:
+            result = reader.execute(f"""
+                SELECT reading_id, {', '.join(columns)} FROM {source}
+                WHERE hash(machine_id) % {n_partitions} = {partition}
+            """)
+            vectors = max(1, batch_rows // DUCKDB_VECTOR_SIZE)
+            written = 0
+            while True:
+                batch = result.fetch_df_chunk(vectors)
+                if batch.empty:
+                    break
+                probability = self.predict_proba(batch)
+                scores = pd.DataFrame({
+                    'reading_id': batch['reading_id'],
+                    'machine_id': batch['machine_id'],
+                    'reading_timestamp': batch['reading_timestamp'],
+                    'failure_probability': probability,
+                    'predicted_failure': probability >= self.threshold
+                })
+                writer.register('scores_batch', scores)
+                writer.execute(f"""
+                    INSERT INTO {staging}
+                    SELECT reading_id, machine_id, reading_timestamp, ?, failure_probability,
+                           predicted_failure, ?
+                    FROM scores_batch
+                """, [self.model_version, scored_at])
+                writer.unregister('scores_batch')
+                written += len(batch)
+            return written
+        finally:
+            reader.close()
+            writer.close()
+
+    def score_to_database(self, partitions: int = 4, batch_rows: int = 100_000) -> int:
+        """
+        Pontua todas as leituras e grava em model_predictions.
+
+        As máquinas são divididas em partições por hash(machine_id); cada
+        partição roda em uma thread com seus próprios cursores (o DuckDB e o
+        predict_proba liberam o GIL no trabalho pesado).
+
+        As partições gravam em uma tabela de staging da versão (cada cursor é
+        uma conexão, então não compartilham uma transação). Só com todas
+        concluídas os scores anteriores da versão são substituídos, em uma
+        única transação; se alguma falhar, model_predictions fica intacta.
+
+        Returns:
+            Número de leituras pontuadas
+        """
+        start = time.perf_counter()
+        staging = f'model_predictions_staging_{self.model_version}'
+        conn = duckdb.connect(str(self.db_path))
+        try:
+            conn.execute(PREDICTIONS_SCHEMA)
+            conn.execute(f"CREATE OR REPLACE TABLE {staging} AS SELECT * FROM model_predictions LIMIT 0")
+            source, columns = _feature_source(conn, self.feature_names)
+            scored_at = datetime.now()
+
+            with ThreadPoolExecutor(max_workers=partitions) as executor:
+                futures = [executor.submit(self._score_partition, conn, source, columns, staging,
+                                           partition, partitions, batch_rows, scored_at)
+                           for partition in range(partitions)]
+                total = sum(future.result() for future in futures)
+
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                conn.execute("DELETE FROM model_predictions WHERE model_version = ?", [self.model_version])
+                conn.execute(f"INSERT INTO model_predictions SELECT * FROM {staging}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.execute(f"DROP TABLE IF EXISTS {staging}")
+            conn.close()
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"model_predictions: {total:,} leituras pontuadas com {self.model_version} "
+                    f"em {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} leituras/s)")
+        return total
+
+
+def score(project_root: Path, model_version: Optional[str] = None,
+          threshold: float = 0.5, use_compiled: bool = True) -> pd.DataFrame:
+    """
+    Pontua as leituras do banco com uma versão do registro (produção por padrão).
+
+    Returns:
+        DataFrame com machine_id, reading_timestamp, failure_probability,
+        predicted_failure e model_version
+    """
+    scorer = BatchScorer(project_root, model_version, threshold, use_compiled)
+
+    conn = duckdb.connect(str(scorer.db_path))
+    try:
+        df = load_scoring_data(conn, scorer.feature_names)
+    finally:
+        conn.close()
+
+    scores = scorer.score_frame(df)
+    logger.info(f"Leituras pontuadas: {len(df):,} com {scorer.metadata['model_name']} {scorer.model_version}")
+    return scores
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='Pontuar leituras com o modelo em produção')
+    parser.add_argument('--project-root', type=str, default='.',
+                        help='Caminho raiz do projeto')
+    parser.add_argument('--model-version', type=str, default=None,
+                        help='Versão do registro (padrão: produção)')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Probabilidade mínima para prever falha')
+    parser.add_argument('--output', type=str, default=None,
+                        help='CSV de saída (padrão: exibe um resumo no console)')
+    parser.add_argument('--to-db', action='store_true',
+                        help='Grava os scores em model_predictions no DuckDB (scoring em lote)')
+    parser.add_argument('--partitions', type=int, default=4,
+                        help='Partições de máquinas pontuadas em paralelo (--to-db)')
+    parser.add_argument('--batch-rows', type=int, default=100_000,
+                        help='Linhas por lote lido do DuckDB (--to-db)')
+    parser.add_argument('--no-compiled', action='store_true',
+                        help='Usa sempre o predict_proba do scikit-learn (ignora o modelo compilado)')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        if args.to_db:
+            scorer = BatchScorer(Path(args.project_root), args.model_version, args.threshold,
+                                 use_compiled=not args.no_compiled)
+            scorer.score_to_database(args.partitions, args.batch_rows)
+            return
+        scores = score(Path(args.project_root), args.model_version, args.threshold,
+                       use_compiled=not args.no_compiled)
+    except LookupError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    if args.output:
+        scores.to_csv(args.output, index=False)
+        logger.info(f"Scores salvos em: {args.output}")
+    else:
+        print(scores.sort_values('failure_probability', ascending=False).head(20).to_string(index=False))
+        print(f"\nFalhas previstas: {int(scores['predicted_failure'].sum()):,} de {len(scores):,} leituras")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Inferência compilada para ensembles de árvores
+Hermes Reply Challenge - Fase 5
+
+Achata as árvores de um RandomForestClassifier ou GradientBoostingClassifier
+treinado em arrays NumPy contíguos (feature, threshold, filhos, valor) e
+avalia todas as árvores de um lote com um percurso vetorizado: um passo por
+nível de profundidade, para todas as leituras e árvores ao mesmo tempo, sem
+o custo Python por estimador do scikit-learn.
+
+O resultado é idêntico bit a bit ao predict_proba do scikit-learn:
+- X é convertido para float32 e comparado com os thresholds em float64
+  (mesma regra das árvores do scikit-learn)
+- Random Forest: frações das folhas somadas na ordem das árvores e divididas
+  pelo número de árvores (a ordem do scikit-learn com n_jobs=1)
+- Gradient Boosting: predição inicial constante + learning_rate * folha,
+  estágio a estágio, e expit no final
+
+O objeto compilado é salvo como artefato da versão no registro
+(compiled_model.joblib) e carregado com mmap pelo scoring.
+"""
+
+import logging
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 1024      # Leituras por bloco do percurso (arrays n_árvores x bloco no cache)
+
+
+class CompiledTreeEnsemble:
+    """Ensemble de árvores em arrays contíguos, com predict_proba vetorizado"""
+
+    def __init__(self, kind: str, feature: np.ndarray, threshold: np.ndarray,
+                 children: np.ndarray, value: np.ndarray, roots: np.ndarray,
+                 max_depth: int, n_features: int, classes: np.ndarray,
+                 learning_rate: float = 1.0, init_raw: float = 0.0):
+        """
+        Args:
+            kind: 'forest' (média das frações) ou 'boosting' (soma + expit)
+            feature: Feature testada em cada nó (0 nas folhas)
+            threshold: Threshold de cada nó (float64, como no scikit-learn)
+            children: Filhos achatados: children[2 * nó] à esquerda,
+                      children[2 * nó + 1] à direita; folhas apontam para si mesmas
+            value: Frações das classes (forest, n_nós x n_classes) ou valor da folha (boosting)
+            roots: Índice global da raiz de cada árvore
+            max_depth: Profundidade máxima (número de passos do percurso)
+        """
+        self.kind = kind
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.classes_ = classes
+        self.learning_rate = learning_rate
+        self.init_raw = init_raw
+        self._intp = None
+
+    def __getstate__(self):
+        # Cópias intp não vão para o artefato (recriadas na primeira predição)
+        return {**self.__dict__, '_intp': None}
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.threshold)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children, self.value, self.roots))
+
+    def _index_arrays(self) -> tuple:
+        """feature/filhos/raízes em intp (índices nativos do NumPy); o artefato guarda a versão compacta"""
+        if getattr(self, '_intp', None) is None:
+            self._intp = (self.feature.astype(np.intp), self.children.astype(np.intp),
+                          self.roots.astype(np.intp))
+        return self._intp
+
+    def _leaves(self, X_flat: np.ndarray, n_columns: int, start: int, stop: int) -> np.ndarray:
+        """Folha alcançada por cada leitura do bloco em cada árvore: (n_árvores, n_leituras)"""
+        feature, children, roots = self._index_arrays()
+        row_base = (np.arange(start, stop) * n_columns)[None, :]
+        node = np.repeat(roots[:, None], stop - start, axis=1)
+        for _ in range(self.max_depth):
+            # float32 > float64: a comparação é feita em float64, como no scikit-learn
+            go_right = np.take(X_flat, row_base + np.take(feature, node)) > np.take(self.threshold, node)
+            node = np.take(children, 2 * node + go_right)
+        return node
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Probabilidades por classe, como o predict_proba do scikit-learn.
+
+        As leituras são percorridas em blocos de CHUNK_ROWS: os arrays
+        intermediários (n_árvores x bloco) cabem no cache da CPU.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Esperadas {self.n_features} features, recebido shape {X.shape}")
+        if np.isnan(X).any():
+            raise ValueError("Inferência compilada não aceita valores ausentes")
+
+        n_samples = len(X)
+        X_flat = X.ravel()
+
+        if self.kind == 'forest':
+            class_values = self.value.T
+            proba = np.zeros((n_samples, len(class_values)), dtype=np.float64)
+            for start in range(0, n_samples, CHUNK_ROWS):
+                stop = min(n_samples, start + CHUNK_ROWS)
+                leaves = self._leaves(X_flat, X.shape[1], start, stop)
+                for k, values in enumerate(class_values):
+                    column = proba[start:stop, k]
+                    # Soma árvore a árvore, na ordem do scikit-learn
+                    for tree_values in np.take(values, leaves):
+                        column += tree_values
+            proba /= self.n_trees
+            return proba
+
+        from scipy.special import expit
+
+        raw = np.full(n_samples, self.init_raw, dtype=np.float64)
+        for start in range(0, n_samples, CHUNK_ROWS):
+            stop = min(n_samples, start + CHUNK_ROWS)
+            block = raw[start:stop]
+            for tree_values in np.take(self.value, self._leaves(X_flat, X.shape[1], start, stop)):
+                block += self.learning_rate * tree_values
+        proba = np.empty((n_samples, 2), dtype=np.float64)
+        proba[:, 1] = expit(raw)
+        proba[:, 0] = 1 - proba[:, 1]
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def _tree_kind(model) -> Optional[str]:
+    from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        return 'forest'
+    if isinstance(model, GradientBoostingClassifier):
+        return 'boosting'
+    return None
+
+
+def is_compilable(model) -> bool:
+    return _tree_kind(model) is not None
+
+
+def compile_ensemble(model) -> CompiledTreeEnsemble:
+    """
+    Compila um RandomForestClassifier/ExtraTreesClassifier ou um
+    GradientBoostingClassifier binário (log_loss, init constante) treinado.
+
+    Raises:
+        TypeError: Modelo ou configuração não suportados
+    """
+    kind = _tree_kind(model)
+    if kind is None:
+        raise TypeError(f"Modelo não suportado pela inferência compilada: {type(model).__name__}")
+
+    learning_rate, init_raw = 1.0, 0.0
+    if kind == 'forest':
+        if model.n_outputs_ != 1:
+            raise TypeError("Random Forest com múltiplas saídas não é suportado")
+        trees = [estimator.tree_ for estimator in model.estimators_]
+    else:
+        from sklearn.dummy import DummyClassifier
+        if model.n_trees_per_iteration_ != 1 or model.loss != 'log_loss':
+            raise TypeError("Gradient Boosting suportado apenas para classificação binária com log_loss")
+        if not (model.init_ == 'zero' or isinstance(model.init_, DummyClassifier)):
+            raise TypeError("Gradient Boosting com estimador inicial não constante não é suportado")
+        trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+        learning_rate = float(model.learning_rate)
+        # Predição inicial (prior) é a mesma para qualquer leitura
+        init_raw = float(model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0, 0])
+
+    sizes = np.array([tree.node_count for tree in trees])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    n_nodes = int(sizes.sum())
+    index_dtype = np.int32 if 2 * n_nodes < np.iinfo(np.int32).max else np.int64
+    feature_dtype = np.int16 if model.n_features_in_ < np.iinfo(np.int16).max else np.int32
+
+    feature = np.empty(n_nodes, dtype=feature_dtype)
+    threshold = np.empty(n_nodes, dtype=np.float64)
+    children = np.empty(2 * n_nodes, dtype=index_dtype)
+    values = []
+
+    for tree, offset, size in zip(trees, offsets, sizes):
+        nodes = slice(offset, offset + size)
+        own_index = np.arange(offset, offset + size)
+        is_leaf = tree.children_left == -1
+
+        feature[nodes] = np.where(is_leaf, 0, tree.feature)
+        threshold[nodes] = np.where(is_leaf, np.inf, tree.threshold)
+        children[2 * offset:2 * (offset + size):2] = np.where(is_leaf, own_index, tree.children_left + offset)
+        children[2 * offset + 1:2 * (offset + size):2] = np.where(is_leaf, own_index, tree.children_right + offset)
+        # forest: frações por classe; boosting: valor da folha de regressão
+        values.append(tree.value[:, 0, :] if kind == 'forest' else tree.value[:, 0, 0])
+
+    return CompiledTreeEnsemble(
+        kind=kind,
+        feature=feature,
+        threshold=threshold,
+        children=children,
+        value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+        roots=offsets.astype(index_dtype),
+        max_depth=max(tree.max_depth for tree in trees),
+        n_features=model.n_features_in_,
+        classes=np.asarray(model.classes_),
+        learning_rate=learning_rate,
+        init_raw=init_raw
+    )
+
+
+def verify_compiled(compiled: CompiledTreeEnsemble, model, X) -> None:
+    """
+    Confere que a inferência compilada reproduz o predict_proba do modelo bit a bit.
+
+    O Random Forest é avaliado com n_jobs=1: com várias threads o scikit-learn
+    soma as árvores em ordem variável e o último bit pode mudar entre execuções.
+
+    Raises:
+        ValueError: Alguma probabilidade difere
+    """
+    n_jobs = getattr(model, 'n_jobs', None)
+    if n_jobs is not None:
+        model.set_params(n_jobs=1)
+    try:
+        expected = model.predict_proba(np.ascontiguousarray(X, dtype=np.float32))
+    finally:
+        if n_jobs is not None:
+            model.set_params(n_jobs=n_jobs)
+
+    actual = compiled.predict_proba(X)
+    if not np.array_equal(actual, expected):
+        mismatches = int(np.sum(actual != expected))
+        max_diff = float(np.max(np.abs(actual - expected)))
+        raise ValueError(f"Inferência compilada diverge do scikit-learn em {mismatches:,} valores "
+                         f"(diferença máxima {max_diff:.3g})")
+
+
+def compile_and_verify(model, X) -> Optional[CompiledTreeEnsemble]:
+    """Compila e valida o modelo; None se não for um ensemble suportado ou se divergir"""
+    if not is_compilable(model):
+        return None
+    try:
+        compiled = compile_ensemble(model)
+        verify_compiled(compiled, model, X)
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Inferência compilada indisponível: {e}")
+        return None
+
+    logger.info(f"Inferência compilada: {compiled.n_trees} árvores, {compiled.n_nodes:,} nós, "
+                f"{compiled.nbytes / 1024:.1f} KB (idêntica ao scikit-learn em {len(X):,} leituras)")
+    return compiled